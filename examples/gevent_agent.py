@@ -14,6 +14,8 @@ monkey.patch_all()
 
 import websocket  # This will be the patched websocket by gevent
 
+from volttron.messagebus.fastapi.ids import IdGenerator
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -30,6 +32,7 @@ class GeventAgent:
         self.ws = None
         self.running = False
         self.greenlet = None
+        self.ids = IdGenerator(f"{agent_id}-")
     
     def start(self):
         """Start the agent."""
@@ -99,7 +102,7 @@ class GeventAgent:
         
     def send_ping(self):
         """Send a ping message to the server."""
-        ping_id = str(uuid.uuid4())
+        ping_id = self.ids()
         self.ws.send(json.dumps({
             "type": "ping", 
             "id": ping_id
@@ -108,7 +111,7 @@ class GeventAgent:
         
     def subscribe(self, topic):
         """Subscribe to a topic."""
-        sub_id = str(uuid.uuid4())
+        sub_id = self.ids()
         self.ws.send(json.dumps({
             "type": "subscribe",
             "id": sub_id,
@@ -118,7 +121,7 @@ class GeventAgent:
         
     def publish(self, topic, data):
         """Publish a message to a topic."""
-        pub_id = str(uuid.uuid4())
+        pub_id = self.ids()
         self.ws.send(json.dumps({
             "type": "publish",
             "id": pub_id,
@@ -132,7 +135,7 @@ class GeventAgent:
         if params is None:
             params = []
             
-        rpc_id = str(uuid.uuid4())
+        rpc_id = self.ids()
         self.ws.send(json.dumps({
             "type": "rpc",
             "id": rpc_id,
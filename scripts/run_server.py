@@ -18,6 +18,9 @@ def main():
                        help="Port to listen on (default: 8000)")
     parser.add_argument("--log-level", default="info", 
                        help="Log level (default: info)")
+    parser.add_argument("--no-ws-per-message-deflate", dest="ws_per_message_deflate",
+                       action="store_false",
+                       help="Disable permessage-deflate negotiation on WebSocket connections")
     
     args = parser.parse_args()
     
@@ -36,6 +39,7 @@ def main():
     logger.info(f"Host: {args.host}")
     logger.info(f"Port: {args.port}")
     logger.info(f"Log level: {args.log_level}")
+    logger.info(f"permessage-deflate: {args.ws_per_message_deflate}")
     logger.info(f"Press Ctrl+C to stop the server")
     logger.info("=" * 60)
     
@@ -46,6 +50,7 @@ def main():
             host=args.host,
             port=args.port,
             log_level=args.log_level,
+            ws_per_message_deflate=args.ws_per_message_deflate,
             factory=True
         )
     except KeyboardInterrupt:
@@ -24,8 +24,8 @@
 
 import logging
 
-from volttron.utils.time import get_aware_utc_now, format_timestamp
-from volttron.utils import jsonapi
+from volttron.utils.time import utc_clock
+from volttron.utils import get_logger, jsonapi
 
 CURRENT_STATUS = "current_status"
 LAST_UPDATED = "utc_last_updated"
@@ -60,13 +60,18 @@ class Status(object):
 
     The build() method also takes a context and a callback function that will
     be called when the status changes.
+
+    The serialized status is cached, so repeated calls to as_json() do not
+    serialize again.
     """
 
     def __init__(self):
         self._status = GOOD_STATUS
         self._context = None
-        self._last_updated = format_timestamp(get_aware_utc_now())
+        self._last_updated = utc_clock.format()
         self._status_changed_callback = None
+        self._context_json = "null"
+        self._json = None
 
     @property
     def status(self):
@@ -97,15 +102,18 @@ class Status(object):
         """
         if status not in ACCEPTABLE_STATUS:
             raise ValueError("Invalid status value {}".format(status))
+        # Serializing validates the context
         try:
-            jsonapi.dumps(context)
+            context_json = jsonapi.dumps(context)
         except TypeError:
             raise ValueError("Context must be JSON serializable.")
 
         status_changed = status != self._status
         self._status = status
         self._context = context
-        self._last_updated = format_timestamp(get_aware_utc_now())
+        self._context_json = context_json
+        self._last_updated = utc_clock.format()
+        self._json = None
 
         if status_changed and self._status_changed_callback:
             self._status_changed_callback()
@@ -128,7 +136,10 @@ class Status(object):
 
         :return:
         """
-        return jsonapi.dumps(self.as_dict())
+        if self._json is None:
+            self._json = '{{"status": {}, "context": {}, "last_updated": {}}}'.format(
+                jsonapi.dumps(self._status), self._context_json, jsonapi.dumps(self._last_updated))
+        return self._json
 
     @staticmethod
     def from_json(data, status_changed_callback=None):
@@ -150,6 +161,8 @@ class Status(object):
         del cp["context"]
         statusobj.__dict__ = cp
         statusobj._status_changed_callback = status_changed_callback
+        statusobj._context_json = jsonapi.dumps(statusobj._context)
+        statusobj._json = None
         return statusobj
 
     @staticmethod
@@ -42,7 +42,7 @@ class Agent(AbstractAgent):
                 self.config = ConfigStore(owner, core, self.rpc)
             self.auth = Auth(owner, core, self.rpc)
     
-    def __init__(self, _, credentials: Credentials = None, options: AgentOptions = None, 
+    def __init__(self, _=None, credentials: Credentials = None, options: AgentOptions = None, 
                 address: str = None, **kwargs):
         """
         Initialize the agent.
@@ -1,24 +1,20 @@
 # src/volttron/client/vip/agent/core.py
 """Core agent functionality for FastAPI messagebus."""
-import asyncio
-import functools
-import inspect
+import json
 import logging
 import os
-import sys
-import threading
 import time
-import uuid
-from datetime import datetime
 from typing import Any, Callable, Dict, List, Optional, Set, Union
 
 import gevent
-from gevent import Greenlet
 from gevent.event import Event
+from websocket import WebSocketConnectionClosedException, create_connection
 
-from volttron.types import Key
+from volttron.messagebus.fastapi.ids import IdGenerator
+from volttron.messagebus.fastapi.websocket.framing import build_frame
 from volttron.types.agent_context import AgentContext
 from volttron.types.auth.auth_credentials import Credentials
+from volttron.utils.scheduling import ScheduledEvent, Scheduler, periodic
 _log = logging.getLogger(__name__)
 
 class Core:
@@ -39,10 +35,16 @@ class Core:
         
         # Connection setup
         self._websocket = None
+        self._connection = None  # shared multiplexed connection, if any
         self._connection_greenlet = None
         self._connected = Event()
         self._stopping = Event()
-        self._message_queue = []
+        self._handlers: Dict[str, Callable] = {}
+        self.ids = IdGenerator(f"{self.identity}-" if self.identity else None)
+        
+        # Flow control
+        self._flow_window = context.options.flow_control_window if context else 0
+        self._credits_consumed = 0
         
         # Event callbacks
         self._onsetup = set()
@@ -53,9 +55,7 @@ class Core:
         self._onexit = set()
         
         # Scheduling
-        self._schedule = Event()
-        self._schedule_event = None
-        self._schedule_callback = None
+        self._scheduler = Scheduler()
         
         # Message bus type
         self._message_bus = os.environ.get('VOLTTRON_MESSAGEBUS', 'fastapi')
@@ -80,8 +80,11 @@ class Core:
         # Connect to the server
         self._connect()
         
-        # Start processing messages
-        self._connection_greenlet = gevent.spawn(self._process_loop)
+        # Start processing messages and scheduled jobs; a shared
+        # connection receives for all of its agents
+        if self._connection is None:
+            self._connection_greenlet = gevent.spawn(self._process_loop)
+        self._scheduler.start()
         
         # Trigger callbacks
         for callback in self._onstartup:
@@ -95,6 +98,7 @@ class Core:
         _log.debug(f"Stopping Core for {self.identity}")
         
         self._stopping.set()
+        self._scheduler.stop()
         
         # Trigger callbacks
         for callback in self._onstop:
@@ -102,7 +106,10 @@ class Core:
         
         # Disconnect
         if self._websocket:
-            # TODO: Implement WebSocket disconnection
+            try:
+                self._websocket.close()
+            except Exception as e:
+                _log.debug(f"Error closing connection: {e}")
             self._websocket = None
             
         # Stop greenlet
@@ -114,49 +121,199 @@ class Core:
         for callback in self._onfinish:
             callback()
     
-    def _connect(self):
-        """Connect to the WebSocket server."""
-        # TODO: Implement WebSocket connection
-        _log.debug(f"Connecting to {self.address} as {self.identity}")
+    def use_connection(self, connection):
+        """
+        Share a multiplexed connection instead of opening one for this agent.
+        
+        Must be called before the core starts.
+        
+        Args:
+            connection: The MultiplexedConnection to register with
+        """
+        self._connection = connection
+    
+    @property
+    def connected(self) -> bool:
+        """True once connected to the server, until the core stops."""
+        return self._connected.is_set() and not self._stopping.is_set()
+    
+    def onsetup(self, callback: Callable):
+        """
+        Register a callback to run when the agent is set up.
+        
+        Args:
+            callback: Callable invoked with the core
+        """
+        self._onsetup.add(callback)
+    
+    def onstartup(self, callback: Callable):
+        """
+        Register a callback to run once the agent has connected.
         
-        # Placeholder for WebSocket connection
+        Args:
+            callback: Callable invoked without arguments
+        """
+        self._onstartup.add(callback)
+    
+    def onstop(self, callback: Callable):
+        """
+        Register a callback to run when the agent stops.
+        
+        Args:
+            callback: Callable invoked without arguments
+        """
+        self._onstop.add(callback)
+    
+    def register_handler(self, message_type: str, handler: Callable):
+        """
+        Register the handler for a message type received from the server.
+        
+        Args:
+            message_type: The message type, e.g. "message" or "rpc"
+            handler: Callable invoked with the decoded message
+        """
+        self._handlers[message_type] = handler
+    
+    def send(self, message: dict):
+        """
+        Send a message to the server.
+        
+        Args:
+            message: The JSON-serializable message to send
+        """
+        if self._websocket is None:
+            raise ConnectionError(f"{self.identity} is not connected to the message bus")
+        self._websocket.send(json.dumps(message))
+    
+    def send_frame(self, header: dict, payload: bytes):
+        """
+        Send a binary payload frame to the server.
+        
+        The server routes the payload without decoding it, which saves
+        encoding work for large device payloads.
+        
+        Args:
+            header: The routing metadata, e.g. {"type": "publish", "topic": ...}
+            payload: The payload bytes; JSON unless header sets "content_type"
+        """
+        if self._websocket is None:
+            raise ConnectionError(f"{self.identity} is not connected to the message bus")
+        self._websocket.send_binary(build_frame(header, payload))
+    
+    def grant_credits(self, messages: Optional[int] = None, nbytes: Optional[int] = None):
+        """
+        Grant the server credit to deliver more pubsub messages.
+        
+        Args:
+            messages: Number of additional messages this agent can absorb
+            nbytes: Number of additional bytes this agent can absorb
+        """
+        credit = {"type": "credit"}
+        if messages is not None:
+            credit["messages"] = messages
+        if nbytes is not None:
+            credit["bytes"] = nbytes
+        self.send(credit)
+    
+    def _connect(self):
+        """Connect to the WebSocket server, or register on the shared connection."""
+        if self._connection is not None:
+            _log.debug(f"Registering {self.identity} on multiplexed connection {self._connection.connection_id}")
+            self._websocket = self._connection.register(self)
+        else:
+            url = f"{self.address}/messagebus/v1/{self.identity}"
+            _log.debug(f"Connecting to {url} as {self.identity}")
+            
+            self._websocket = create_connection(url)
+            welcome = json.loads(self._websocket.recv())
+            if welcome.get("type") != "connection_established":
+                raise ConnectionError(f"Unexpected response from server: {welcome}")
         self._connected.set()
         
+        # Open the flow control window; it is replenished as deliveries are processed
+        if self._flow_window:
+            self.grant_credits(self._flow_window)
+        
     def _process_loop(self):
         """Process incoming messages."""
         while not self._stopping.is_set():
             try:
-                # Process any queued messages
-                if self._message_queue:
-                    message = self._message_queue.pop(0)
-                    self._process_message(message)
-                
-                # Wait a bit before checking again
-                gevent.sleep(0.1)
-                
+                frame = self._websocket.recv()
+            except WebSocketConnectionClosedException:
+                if not self._stopping.is_set():
+                    _log.warning(f"Connection to message bus closed for {self.identity}")
+                break
             except Exception as e:
+                if self._stopping.is_set():
+                    break
                 _log.error(f"Error in process loop: {e}")
                 gevent.sleep(1)
+                continue
+            
+            try:
+                decoded = json.loads(frame)
+            except ValueError:
+                _log.error(f"Invalid JSON received: {frame}")
+                continue
+            
+            # Batched frames carry a list of messages
+            for message in decoded if isinstance(decoded, list) else (decoded, ):
+                try:
+                    self._process_message(message)
+                except Exception as e:
+                    _log.error(f"Error processing message: {e}")
     
     def _process_message(self, message):
         """Process a received message."""
-        # TODO: Implement message processing
-        _log.debug(f"Processing message: {message}")
+        message_type = message.get("type")
+        handler = self._handlers.get(message_type)
+        if handler is not None:
+            handler(message)
+        else:
+            _log.debug(f"No handler for message: {message}")
+        
+        if message_type == "message" and self._flow_window:
+            self._replenish_credit()
     
-    def schedule(self, time_to_run, callback, *args, **kwargs):
+    def _replenish_credit(self):
+        """Return credit to the server once half of the flow control window is consumed."""
+        self._credits_consumed += 1
+        if self._credits_consumed >= max(1, self._flow_window // 2):
+            self.grant_credits(self._credits_consumed)
+            self._credits_consumed = 0
+    
+    def schedule(self, time_to_run, callback, *args, **kwargs) -> ScheduledEvent:
         """
         Schedule a callback to run at the specified time.
         
+        Jobs can be scheduled before the agent starts; they run once it has.
+        
+        Args:
+            time_to_run: When to run the callback: a datetime, a timedelta from
+                now, seconds since the epoch, or an iterator of deadlines such
+                as periodic() or cron() for a repeating job
+            callback: The callback function
+            *args: Arguments to pass to the callback
+            **kwargs: Keyword arguments to pass to the callback
+            
+        Returns:
+            The scheduled event; call its cancel() method to cancel the job
+        """
+        return self._scheduler.schedule(time_to_run, callback, *args, **kwargs)
+    
+    def periodic(self, period, callback, *args, wait=None, **kwargs) -> ScheduledEvent:
+        """
+        Run a callback every period.
+        
         Args:
-            time_to_run: When to run the callback
+            period: Seconds, or a timedelta, between runs
             callback: The callback function
             *args: Arguments to pass to the callback
+            wait: Delay before the first run; defaults to one period
             **kwargs: Keyword arguments to pass to the callback
             
         Returns:
-            The scheduled time
+            The scheduled event; call its cancel() method to cancel the job
         """
-        self._schedule_callback = (callback, args, kwargs)
-        self._schedule_event = time_to_run
-        self._schedule.set()
-        return time_to_run
\ No newline at end of file
+        start = None if wait is None else time.time() + wait
+        return self.schedule(periodic(period, start), callback, *args, **kwargs)
\ No newline at end of file
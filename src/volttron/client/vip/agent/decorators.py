@@ -17,4 +17,28 @@ def annotate(**annotations):
 
 def is_annotated(func, annotation):
     """Check if a function has an annotation."""
-    return getattr(func, annotation, None) is not None
\ No newline at end of file
+    return getattr(func, annotation, None) is not None
+
+
+class dualmethod:
+    """
+    Method with separate implementations for instance and class access.
+
+    Accessed on an instance it binds the instance implementation; accessed
+    on the class it binds the implementation registered with classmethod().
+    """
+
+    def __init__(self, finstance: Callable, fclass: Callable = None):
+        self.finstance = finstance
+        self.fclass = fclass
+        functools.update_wrapper(self, finstance)
+
+    def classmethod(self, fclass: Callable) -> "dualmethod":
+        """Register the implementation used when accessed on the class."""
+        self.fclass = fclass
+        return self
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self.fclass.__get__(owner, type(owner))
+        return self.finstance.__get__(instance, owner)
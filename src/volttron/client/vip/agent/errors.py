@@ -2,4 +2,15 @@
 
 class VIPError(Exception):
     """Base class for VIP errors."""
-    pass
\ No newline at end of file
+    pass
+
+class RemoteError(VIPError):
+    """An exception raised by the peer handling an RPC call."""
+
+    def __init__(self, message: str, exc_type: str = None):
+        super().__init__(message)
+        self.message = message
+        self.exc_type = exc_type
+
+    def __str__(self):
+        return f"{self.exc_type}: {self.message}" if self.exc_type else self.message
@@ -0,0 +1,162 @@
+# src/volttron/client/vip/agent/host.py
+"""Runs many agents in one process."""
+import logging
+import os
+import signal
+from typing import Any, Dict, Set
+
+import gevent
+from gevent import monkey
+from gevent.event import Event
+from gevent.pool import Pool
+
+from volttron.types.auth.auth_credentials import Credentials
+
+from .multiplex import MultiplexedConnection
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_START_CONCURRENCY = 32
+
+class AgentHost:
+    """
+    Runs many agents as greenlets in one process.
+
+    A process per agent costs every agent its own interpreter, imports and
+    heap; agents on a host share them. Each agent still has its own core,
+    whose message loop and scheduler run as greenlets, so an agent that
+    blocks without yielding to gevent stalls every agent on the host.
+    Agents on the same host deliver publishes to each other in-process
+    through the local bus.
+
+    By default the agents share one multiplexed connection to the server,
+    so the host holds one socket and one receive greenlet however many
+    agents it runs.
+    """
+
+    def __init__(self, address: str = None, start_concurrency: int = DEFAULT_START_CONCURRENCY,
+                 multiplex: bool = True):
+        """
+        Initialize a host with no agents.
+
+        Args:
+            address: Server address, defaults to $VOLTTRON_SERVER
+            start_concurrency: How many agents connect to the server at once
+            multiplex: Share one connection between the agents instead of
+                connecting each agent separately
+        """
+        self.address = address or os.environ.get('VOLTTRON_SERVER', 'ws://localhost:8000')
+        self.start_concurrency = start_concurrency
+        self.connection = MultiplexedConnection(self.address) if multiplex else None
+        self.agents: Dict[str, Any] = {}  # identity -> agent
+        self._running: Set[str] = set()
+        self._stopped = Event()
+
+    def __len__(self):
+        return len(self.agents)
+
+    def __contains__(self, identity: str) -> bool:
+        return identity in self.agents
+
+    def add(self, agent_class, identity: str, **kwargs):
+        """
+        Create an agent on the host.
+
+        The agent is created the way vip_main creates it, with credentials
+        for the identity and the host's address. It is started by start().
+
+        Args:
+            agent_class: The agent class
+            identity: The agent's identity
+            **kwargs: Further arguments for the agent class, e.g. config_path
+
+        Returns:
+            The agent
+        """
+        if identity in self.agents:
+            raise ValueError(f"An agent with identity {identity} is already hosted")
+        agent = agent_class(credentials=Credentials(identity=identity), address=self.address, **kwargs)
+        if self.connection is not None:
+            agent.core.use_connection(self.connection)
+        self.agents[identity] = agent
+        return agent
+
+    def remove(self, identity: str, timeout: float = 5):
+        """
+        Stop an agent and remove it from the host.
+
+        Args:
+            identity: The agent's identity
+            timeout: Seconds to wait for the agent to stop
+        """
+        if identity in self._running:
+            self._stop_agent(identity, timeout)
+        self.agents.pop(identity, None)
+
+    def start(self):
+        """
+        Start every hosted agent that is not running yet.
+
+        Agents connect concurrently, at most start_concurrency at a time.
+        An agent that fails to start is logged and left stopped.
+
+        Raises:
+            ConnectionError: If the shared connection cannot be opened
+        """
+        if not monkey.is_module_patched("socket"):
+            raise RuntimeError("Agents on a host share one thread; "
+                               "call gevent.monkey.patch_all() before importing them")
+        self._stopped.clear()
+        if self.connection is not None:
+            self.connection.connect()
+        pool = Pool(self.start_concurrency)
+        for identity, agent in list(self.agents.items()):
+            if identity not in self._running:
+                pool.spawn(self._start_agent, identity, agent)
+        pool.join()
+        _log.info(f"Hosting {len(self._running)} of {len(self.agents)} agents")
+
+    def stop(self, timeout: float = 5):
+        """
+        Stop every running agent.
+
+        Args:
+            timeout: Seconds to wait for each agent to stop
+        """
+        gevent.joinall([gevent.spawn(self._stop_agent, identity, timeout) for identity in list(self._running)])
+        if self.connection is not None:
+            self.connection.close()
+        self._stopped.set()
+
+    def run(self):
+        """Start the agents and serve until stop() is called or the process is interrupted or terminated."""
+        handlers = []
+        try:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                handlers.append(gevent.signal_handler(signum, self._stopped.set))
+        except ValueError:
+            _log.debug("Not in the main thread; signals will not stop the host")
+        try:
+            self.start()
+            self._stopped.wait()
+        finally:
+            for handler in handlers:
+                handler.cancel()
+            self.stop()
+
+    def _start_agent(self, identity: str, agent):
+        """Start one agent, logging rather than raising a failure."""
+        try:
+            agent.core.start()
+        except Exception as e:
+            _log.error(f"Failed to start agent {identity}: {e}")
+            return
+        self._running.add(identity)
+
+    def _stop_agent(self, identity: str, timeout: float):
+        """Stop one agent, logging rather than raising a failure."""
+        self._running.discard(identity)
+        try:
+            self.agents[identity].core.stop(timeout)
+        except Exception as e:
+            _log.error(f"Failed to stop agent {identity}: {e}")
@@ -0,0 +1,136 @@
+# src/volttron/client/vip/agent/local_bus.py
+"""In-process delivery of publishes between co-located agents."""
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+import gevent
+
+from .topics import TopicTrie
+
+_log = logging.getLogger(__name__)
+
+class LocalBus:
+    """
+    Delivers publishes between agents running in the same process.
+
+    Co-located subscribers receive the published objects themselves, with no
+    serialization and no round trip through the server, so callbacks must
+    not modify them. The publisher still forwards the message to the server
+    for remote subscribers, excluding the agents served here. Each delivery
+    runs in a new greenlet on the hub of the subscriber, the one it joined
+    from, so callbacks never run in the publisher's thread or greenlet.
+
+    The subscription prefixes of every member are kept in one trie mapping
+    prefixes to identities, so a publish costs one match however many agents
+    share the bus, and only members with a matching subscription are served.
+    """
+
+    def __init__(self):
+        """Initialize a bus with no members."""
+        self._members: Dict[str, Tuple[Any, Any]] = {}  # identity -> (PubSub, hub)
+        self._prefixes: Dict[str, Set[str]] = {}  # identity -> subscribed prefixes
+        self._subscriptions = TopicTrie()  # prefix -> identities
+        self._lock = threading.Lock()
+
+    def join(self, identity: str, pubsub, prefixes: Iterable[str] = ()):
+        """
+        Add an agent to the bus.
+
+        Publishes are delivered to the agent on the hub of the calling thread.
+
+        Args:
+            identity: The agent's identity
+            pubsub: The agent's PubSub subsystem
+            prefixes: The prefixes the agent is subscribed to
+        """
+        with self._lock:
+            self._members[identity] = (pubsub, gevent.get_hub())
+            self._prefixes[identity] = set()
+            for prefix in prefixes:
+                self._subscribe(identity, prefix)
+        _log.debug(f"{identity} joined the local bus")
+
+    def leave(self, identity: str):
+        """Remove an agent and its subscriptions from the bus."""
+        with self._lock:
+            self._members.pop(identity, None)
+            for prefix in self._prefixes.pop(identity, ()):
+                self._subscriptions.remove(prefix, identity)
+
+    def subscribe(self, identity: str, prefix: str):
+        """
+        Record a subscription of a member; ignored for agents not on the bus.
+
+        Args:
+            identity: The agent's identity
+            prefix: The topic prefix subscribed to
+        """
+        with self._lock:
+            if identity in self._members:
+                self._subscribe(identity, prefix)
+
+    def unsubscribe(self, identity: str, prefix: str):
+        """
+        Forget a subscription of a member.
+
+        Args:
+            identity: The agent's identity
+            prefix: The topic prefix no longer subscribed to
+        """
+        with self._lock:
+            prefixes = self._prefixes.get(identity)
+            if prefixes is not None and prefix in prefixes:
+                prefixes.discard(prefix)
+                self._subscriptions.remove(prefix, identity)
+
+    def _subscribe(self, identity: str, prefix: str):
+        """Record a subscription; the caller holds the lock."""
+        self._prefixes[identity].add(prefix)
+        self._subscriptions.add(prefix, identity)
+
+    def publish(self, sender: str, topic: str, headers: dict, message: Any) -> List[str]:
+        """
+        Deliver a publish to the other agents on the bus subscribed to its topic.
+
+        Deliveries are scheduled on the subscribers' hubs and run after the
+        publisher yields.
+
+        Args:
+            sender: Identity of the publishing agent
+            topic: The topic published to
+            headers: The message headers
+            message: The message
+
+        Returns:
+            The identities of the agents the publish was delivered to here
+        """
+        with self._lock:
+            members = [(identity, self._members[identity])
+                       for identity in set(self._subscriptions.match(topic)) if identity != sender]
+        for _, (pubsub, hub) in members:
+            if hub.thread_ident == threading.get_ident():
+                gevent.spawn(pubsub.deliver, sender, topic, headers, message)
+            else:
+                hub.loop.run_callback_threadsafe(gevent.spawn, pubsub.deliver, sender, topic, headers, message)
+        return [identity for identity, _ in members]
+
+# One bus per server address, since only agents on the same server may skip it
+_buses: Dict[str, LocalBus] = {}
+_buses_lock = threading.Lock()
+
+def get_local_bus(address: str) -> LocalBus:
+    """
+    Return the local bus shared by agents connecting to an address.
+
+    Args:
+        address: The server address
+
+    Returns:
+        The local bus for the address
+    """
+    with _buses_lock:
+        bus = _buses.get(address)
+        if bus is None:
+            bus = _buses[address] = LocalBus()
+        return bus
@@ -0,0 +1,219 @@
+# src/volttron/client/vip/agent/multiplex.py
+"""One WebSocket connection shared by many agents."""
+import json
+import logging
+import os
+import socket
+from typing import Any, Dict, Optional
+
+import gevent
+from gevent.event import AsyncResult
+from gevent.lock import Semaphore
+from websocket import WebSocketConnectionClosedException, create_connection
+
+from volttron.messagebus.fastapi.ids import IdGenerator
+from volttron.messagebus.fastapi.websocket.framing import encode_field, insert_field, insert_header_field
+
+_log = logging.getLogger(__name__)
+
+IDENTITY_FIELD = "identity"
+
+class IdentitySocket:
+    """
+    The part of a multiplexed connection that belongs to one agent.
+
+    Has the send side of a websocket-client connection, so a core uses it in
+    place of a connection of its own. Every frame is stamped with the
+    agent's identity without being decoded again.
+    """
+
+    def __init__(self, connection: "MultiplexedConnection", identity: str):
+        self.connection = connection
+        self.identity = identity
+        self._field = encode_field(IDENTITY_FIELD, identity)
+
+    def send(self, text: str):
+        """Send an encoded JSON object as the agent."""
+        self.connection.send_text(insert_field(text, self._field))
+
+    def send_binary(self, frame: bytes):
+        """Send a binary payload frame as the agent."""
+        self.connection.send_binary(insert_header_field(frame, self._field))
+
+    def close(self):
+        """Remove the agent from the connection; the connection stays open."""
+        self.connection.unregister(self.identity)
+
+class MultiplexedConnection:
+    """
+    One WebSocket connection to the server carrying the traffic of many agents.
+
+    A connection per agent costs the server a socket, a receive task and a
+    writer per agent, and the host a receive greenlet per agent. Agents on a
+    multiplexed connection register their identity with the server, which
+    only accepts frames for registered identities. One greenlet receives
+    for all of them and hands each message to the core of the agent it is
+    addressed to.
+    """
+
+    def __init__(self, address: str = None, connection_id: str = None):
+        """
+        Initialize an unconnected connection.
+
+        Args:
+            address: Server address, defaults to $VOLTTRON_SERVER
+            connection_id: Name of the connection in server logs, defaults to host and process ID
+        """
+        self.address = address or os.environ.get('VOLTTRON_SERVER', 'ws://localhost:8000')
+        self.connection_id = connection_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.ids = IdGenerator()
+        self._websocket = None
+        self._receiver: Optional[gevent.Greenlet] = None
+        self._connecting = Semaphore()
+        self._cores: Dict[str, Any] = {}  # identity -> core
+        self._pending: Dict[str, AsyncResult] = {}  # registration id -> result
+
+    @property
+    def connected(self) -> bool:
+        """True while the connection is open."""
+        return self._websocket is not None
+
+    def connect(self):
+        """Open the connection, if it is not open, and start receiving."""
+        # Agents starting concurrently must not each open a connection
+        with self._connecting:
+            if self._websocket is None:
+                self._open()
+
+    def _open(self):
+        """Connect to the server and read its welcome message."""
+        url = f"{self.address}/messagebus/v1/mux/{self.connection_id}"
+        _log.debug(f"Connecting to {url}")
+        websocket = create_connection(url)
+        welcome = json.loads(websocket.recv())
+        if welcome.get("type") != "connection_established" or not welcome.get("multiplexed"):
+            websocket.close()
+            raise ConnectionError(f"Unexpected response from server: {welcome}")
+        self._websocket = websocket
+        self._receiver = gevent.spawn(self._receive)
+
+    def register(self, core, timeout: float = 30) -> IdentitySocket:
+        """
+        Register an agent's identity and route its messages to its core.
+
+        Connects first if needed.
+
+        Args:
+            core: The core of the agent
+            timeout: Seconds to wait for the server to accept the identity
+
+        Returns:
+            The socket the core sends through
+
+        Raises:
+            ConnectionError: If the identity is already registered or the server refused it
+        """
+        if core.identity in self._cores:
+            raise ConnectionError(f"Identity {core.identity} is already registered on this connection")
+        self.connect()
+        registration_id = self.ids()
+        result = self._pending[registration_id] = AsyncResult()
+        self._cores[core.identity] = core
+        try:
+            self.send_text(json.dumps({"type": "register", "id": registration_id, IDENTITY_FIELD: core.identity}))
+            result.get(timeout=timeout)
+        except BaseException:
+            self._cores.pop(core.identity, None)
+            raise
+        finally:
+            self._pending.pop(registration_id, None)
+        return IdentitySocket(self, core.identity)
+
+    def unregister(self, identity: str):
+        """
+        Stop routing messages to an agent and release its identity on the server.
+
+        Args:
+            identity: The identity of the agent
+        """
+        if self._cores.pop(identity, None) is None or self._websocket is None:
+            return
+        try:
+            self.send_text(json.dumps({"type": "unregister", "id": self.ids(), IDENTITY_FIELD: identity}))
+        except Exception as e:
+            _log.debug(f"Error unregistering {identity}: {e}")
+
+    def send_text(self, text: str):
+        """Send an encoded JSON frame."""
+        if self._websocket is None:
+            raise ConnectionError("The multiplexed connection is not open")
+        self._websocket.send(text)
+
+    def send_binary(self, frame: bytes):
+        """Send a binary payload frame."""
+        if self._websocket is None:
+            raise ConnectionError("The multiplexed connection is not open")
+        self._websocket.send_binary(frame)
+
+    def close(self):
+        """Close the connection; the server releases every identity on it."""
+        websocket, self._websocket = self._websocket, None
+        if websocket is not None:
+            try:
+                websocket.close()
+            except Exception as e:
+                _log.debug(f"Error closing multiplexed connection: {e}")
+        if self._receiver is not None:
+            self._receiver.kill(block=False)
+            self._receiver = None
+        self._cores.clear()
+
+    def _receive(self):
+        """Receive frames and hand each message to the core it is addressed to."""
+        while self._websocket is not None:
+            try:
+                frame = self._websocket.recv()
+            except WebSocketConnectionClosedException:
+                if self._websocket is not None:
+                    _log.warning(f"Multiplexed connection {self.connection_id} closed by the server")
+                break
+            except Exception as e:
+                if self._websocket is None:
+                    break
+                _log.error(f"Error receiving on multiplexed connection: {e}")
+                gevent.sleep(1)
+                continue
+            if self._websocket is None:
+                break
+
+            try:
+                decoded = json.loads(frame)
+            except ValueError:
+                _log.error(f"Invalid JSON received: {frame}")
+                continue
+
+            # Batched frames carry a list of messages
+            for message in decoded if isinstance(decoded, list) else (decoded, ):
+                try:
+                    self._dispatch(message)
+                except Exception as e:
+                    _log.error(f"Error processing message: {e}")
+
+    def _dispatch(self, message: dict):
+        """Route one received message."""
+        pending = self._pending.get(message.get("id"))
+        if pending is not None:
+            if message.get("type") == "error":
+                pending.set_exception(ConnectionError(message.get("error")))
+            else:
+                pending.set(message)
+            return
+
+        identity = message.pop(IDENTITY_FIELD, None)
+        core = self._cores.get(identity)
+        if core is not None:
+            core._process_message(message)
+        elif message.get("type") == "error":
+            _log.warning(f"Error from server: {message.get('error')}")
+        else:
+            _log.debug(f"Discarding message for unknown identity {identity}: {message}")
@@ -0,0 +1,87 @@
+# src/volttron/client/vip/agent/subsystems/health.py
+"""Health subsystem for VIP agents."""
+import logging
+from typing import Callable, List
+
+from volttron.client.messaging.health import ALERT_KEY, STATUS_GOOD, Status
+
+_log = logging.getLogger(__name__)
+
+class Health:
+    """
+    Health subsystem for VIP agents.
+
+    Holds the agent's current status. Listeners, such as the heartbeat, are
+    notified only when the status value changes, and the serialized status
+    is cached until the next update.
+    """
+
+    def __init__(self, owner=None, core=None, rpc=None):
+        """Initialize the Health subsystem."""
+        self._owner = owner
+        self._core = core
+        self._rpc = rpc
+        self._listeners: List[Callable] = []
+        self._statusobj = Status.build(STATUS_GOOD, status_changed_callback=self._status_changed)
+
+        if rpc is not None:
+            rpc.export(self.set_status, "health.set_status")
+            rpc.export(self.get_status, "health.get_status")
+            rpc.export(self.get_status_json, "health.get_status_json")
+            rpc.export(self.send_alert, "health.send_alert")
+
+    def set_status(self, status, context=None):
+        """
+        Update the agent's status.
+
+        Args:
+            status: One of the status values in messaging.health
+            context: Optional JSON serializable details
+
+        Raises:
+            ValueError: If the status or context is invalid
+        """
+        self._statusobj.update_status(status, context)
+
+    def get_status(self) -> dict:
+        """Return the current status as a dictionary."""
+        return self._statusobj.as_dict()
+
+    def get_status_json(self) -> str:
+        """Return the current status serialized as JSON."""
+        return self._statusobj.as_json()
+
+    def get_status_value(self) -> str:
+        """Return the current status value, e.g. GOOD."""
+        return self._statusobj.status
+
+    def add_status_listener(self, callback: Callable):
+        """
+        Register a callback to run when the status value changes.
+
+        Args:
+            callback: Callable invoked without arguments
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def send_alert(self, alert_key, statusobj):
+        """
+        Publish an alert on behalf of the agent.
+
+        Args:
+            alert_key: Key identifying the kind of alert
+            statusobj: The Status describing the alert
+        """
+        topic = f"alerts/{self._core.identity}"
+        headers = {ALERT_KEY: alert_key}
+        self._owner.vip.pubsub.publish_encoded("pubsub", topic, headers,
+                                               statusobj.as_dict(), statusobj.as_json())
+
+    def _status_changed(self):
+        """Notify listeners that the status value changed."""
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                _log.error(f"Error in status listener: {e}")
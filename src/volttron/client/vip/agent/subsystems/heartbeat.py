@@ -0,0 +1,163 @@
+# src/volttron/client/vip/agent/subsystems/heartbeat.py
+"""Heartbeat subsystem for VIP agents."""
+import functools
+import logging
+import threading
+from typing import Dict, Set, Tuple
+
+import gevent
+
+from volttron.utils.time import utc_clock
+
+_log = logging.getLogger(__name__)
+
+class _HeartbeatGroup:
+    """
+    Publishes the heartbeats of co-located agents that share a period.
+
+    One greenlet wakes once per period for the whole group instead of each
+    agent running its own timer, so the heartbeats of agents in a process
+    go out together.
+    """
+
+    def __init__(self, thread: int, period: float):
+        self.thread = thread
+        self.period = period
+        self.members: Set["Heartbeat"] = set()
+        self._greenlet = None
+
+    def add(self, heartbeat: "Heartbeat"):
+        self.members.add(heartbeat)
+        if self._greenlet is None:
+            self._greenlet = gevent.spawn(self._run)
+
+    def remove(self, heartbeat: "Heartbeat"):
+        self.members.discard(heartbeat)
+        if not self.members and self._greenlet is not None:
+            greenlet, self._greenlet = self._greenlet, None
+            if threading.get_ident() == self.thread:
+                greenlet.kill(block=False)
+            else:
+                # A greenlet can only be killed from the thread of its hub
+                greenlet.parent.loop.run_callback_threadsafe(functools.partial(greenlet.kill, block=False))
+
+    def _run(self):
+        while True:
+            gevent.sleep(self.period)
+            for heartbeat in list(self.members):
+                heartbeat.publish()
+
+# (thread, period) -> group; greenlets cannot be shared between threads
+_groups: Dict[Tuple[int, float], _HeartbeatGroup] = {}
+_groups_lock = threading.Lock()
+
+def _join_group(heartbeat: "Heartbeat") -> _HeartbeatGroup:
+    """Add a heartbeat to the group for its period in the current thread and return the group."""
+    key = (threading.get_ident(), heartbeat.period)
+    with _groups_lock:
+        group = _groups.get(key)
+        if group is None:
+            group = _groups[key] = _HeartbeatGroup(*key)
+        group.add(heartbeat)
+        return group
+
+def _leave_group(group: _HeartbeatGroup, heartbeat: "Heartbeat"):
+    """Remove a heartbeat from its group, discarding the group once it is empty."""
+    with _groups_lock:
+        group.remove(heartbeat)
+        key = (group.thread, group.period)
+        if not group.members and _groups.get(key) is group:
+            del _groups[key]
+
+class Heartbeat:
+    """
+    Heartbeat subsystem for VIP agents.
+
+    Publishes the agent's health status on ``heartbeat/<identity>`` once per
+    period, and immediately when the status value changes. The status is
+    published from the Health subsystem's cached serialization.
+    """
+
+    def __init__(self, owner, core, rpc=None, pubsub=None, heartbeat_autostart=False,
+                 heartbeat_period=60):
+        """Initialize the Heartbeat subsystem."""
+        self.owner = owner
+        self.core = core
+        self.pubsub = pubsub
+        self.autostart = heartbeat_autostart
+        self.period = heartbeat_period
+        self.enabled = False
+        self._group = None
+
+        if rpc is not None:
+            rpc.export(self.start, "heartbeat.start")
+            rpc.export(self.start_with_period, "heartbeat.start_with_period")
+            rpc.export(self.stop, "heartbeat.stop")
+            rpc.export(self.restart, "heartbeat.restart")
+            rpc.export(self.set_period, "heartbeat.set_period")
+
+        core.onstartup(self._on_startup)
+        core.onstop(self.stop)
+
+    @property
+    def topic(self) -> str:
+        """The topic heartbeats are published on."""
+        return f"heartbeat/{self.core.identity}"
+
+    def start(self):
+        """Start publishing heartbeats."""
+        if not self.enabled:
+            self.enabled = True
+            self._group = _join_group(self)
+
+    def start_with_period(self, period):
+        """Start publishing heartbeats with the given period in seconds."""
+        self.set_period(period)
+        self.start()
+
+    def stop(self):
+        """Stop publishing heartbeats."""
+        if self.enabled:
+            self.enabled = False
+            # Leave the group joined on start, whichever thread stops
+            group, self._group = self._group, None
+            _leave_group(group, self)
+
+    def restart(self):
+        """Restart publishing heartbeats."""
+        self.stop()
+        self.start()
+
+    def set_period(self, period):
+        """Change the heartbeat period, restarting if running."""
+        if period == self.period:
+            return
+        if self.enabled:
+            self.stop()
+            self.period = period
+            self.start()
+        else:
+            self.period = period
+
+    def publish(self):
+        """Publish the current health status."""
+        if not self.core.connected:
+            return
+        health = self.owner.vip.health
+        headers = {"Date": utc_clock.format()}
+        try:
+            self.pubsub.publish_encoded("pubsub", self.topic, headers,
+                                        health.get_status(), health.get_status_json())
+        except Exception as e:
+            _log.error(f"Failed to publish heartbeat: {e}")
+
+    def _on_startup(self):
+        """Follow status changes and start publishing if configured to."""
+        self.owner.vip.health.add_status_listener(self._status_changed)
+        if self.autostart:
+            self.start()
+
+    def _status_changed(self):
+        """Publish at once when the status value changes."""
+        if self.enabled:
+            self.publish()
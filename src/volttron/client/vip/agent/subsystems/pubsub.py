@@ -1,37 +1,137 @@
 # src/volttron/client/vip/agent/subsystems/pubsub.py
 """PubSub subsystem for VIP agents."""
+import json
 import logging
-from typing import Any, Callable, Dict, List, Set
+from typing import Any, Dict
+
+from ..local_bus import get_local_bus
+from ..topics import TopicTrie
 
 _log = logging.getLogger(__name__)
 
 class PubSub:
     """PubSub subsystem for VIP agents."""
-    
-    def __init__(self, core=None, rpc_subsys=None, peerlist_subsys=None, owner=None, 
+
+    def __init__(self, core=None, rpc_subsys=None, peerlist_subsys=None, owner=None,
                 tag_vip_id=None, tag_refresh_interval=None):
         """Initialize the PubSub subsystem."""
         self.core = core
         self.rpc = rpc_subsys
         self.peerlist = peerlist_subsys
         self.owner = owner
-        self._subscriptions = {}
-        
+        self._subscriptions = TopicTrie()
+        self._local_bus = None
+
+        if core is not None:
+            core.register_handler("message", self._dispatch)
+            core.onstartup(self._send_subscriptions)
+            if core.context is None or core.context.options.local_delivery:
+                self._local_bus = get_local_bus(core.address)
+                core.onstartup(self._join_local_bus)
+                core.onstop(self._leave_local_bus)
+
     def subscribe(self, peer, prefix, callback, bus=None, all_platforms=False):
-        """Subscribe to a topic prefix."""
-        if prefix not in self._subscriptions:
-            self._subscriptions[prefix] = set()
-        self._subscriptions[prefix].add(callback)
-        
-        # TODO: Send subscription message to server
-        _log.debug(f"Subscribing to {prefix}")
-        
+        """
+        Subscribe to a topic prefix.
+
+        The server is only asked for a subscription the first time a prefix
+        is used; further callbacks on the same prefix are dispatched locally.
+        """
+        if self._subscriptions.add(prefix, callback) and self.core is not None:
+            if self._local_bus is not None:
+                self._local_bus.subscribe(self.core.identity, prefix)
+            if self.core.connected:
+                _log.debug(f"Subscribing to {prefix}")
+                self.core.send({"type": "subscribe", "id": self.core.ids(), "topic": prefix})
+
         return prefix
-    
+
+    def unsubscribe(self, peer, prefix, callback=None, bus=None, all_platforms=False):
+        """Remove a callback, or all callbacks, from a topic prefix."""
+        if self._subscriptions.remove(prefix, callback) and self.core is not None:
+            if self._local_bus is not None:
+                self._local_bus.unsubscribe(self.core.identity, prefix)
+            if self.core.connected:
+                _log.debug(f"Unsubscribing from {prefix}")
+                self.core.send({"type": "unsubscribe", "id": self.core.ids(), "topic": prefix})
+
     def publish(self, peer, topic, headers=None, message=None, bus=''):
-        """Publish a message to a topic."""
+        """
+        Publish a message to a topic.
+
+        Agents in the same process receive the message directly; the server
+        delivers it to the remaining subscribers.
+        """
         if headers is None:
             headers = {}
-            
-        # TODO: Send publish message to server
-        _log.debug(f"Publishing to {topic}: {message}")
\ No newline at end of file
+
+        _log.debug(f"Publishing to {topic}: {message}")
+        frame = {
+            "type": "publish",
+            "id": self.core.ids(),
+            "topic": topic,
+            "data": {"headers": headers, "message": message}
+        }
+        if self._local_bus is not None:
+            local = self._local_bus.publish(self.core.identity, topic, headers, message)
+            if local:
+                frame["exclude"] = local
+        self.core.send(frame)
+
+    def publish_encoded(self, peer, topic, headers, message, encoded):
+        """
+        Publish a message that has already been serialized to JSON.
+
+        The encoded message is sent as the payload of a binary frame, so
+        a cached serialization can be reused on every publish. Agents in
+        the same process receive the message object itself.
+
+        Args:
+            peer: Unused, kept for symmetry with publish()
+            topic: The topic to publish to
+            headers: The message headers
+            message: The message object
+            encoded: The message serialized as JSON
+        """
+        header = {
+            "type": "publish",
+            "id": self.core.ids(),
+            "topic": topic
+        }
+        if self._local_bus is not None:
+            local = self._local_bus.publish(self.core.identity, topic, headers, message)
+            if local:
+                header["exclude"] = local
+        payload = '{"headers":' + json.dumps(headers) + ',"message":' + encoded + '}'
+        self.core.send_frame(header, payload.encode("utf-8"))
+
+    def deliver(self, sender, topic, headers, message):
+        """Call the callbacks of every prefix matching a topic."""
+        for callback in self._subscriptions.match(topic):
+            try:
+                callback("pubsub", sender, "", topic, headers, message)
+            except Exception as e:
+                _log.error(f"Error in subscription callback for {topic}: {e}")
+
+    def _join_local_bus(self):
+        """Start receiving publishes from co-located agents."""
+        self._local_bus.join(self.core.identity, self, self._subscriptions.prefixes())
+
+    def _leave_local_bus(self):
+        """Stop receiving publishes from co-located agents."""
+        self._local_bus.leave(self.core.identity)
+
+    def _send_subscriptions(self):
+        """Send the subscriptions made before the agent connected."""
+        prefixes = self._subscriptions.prefixes()
+        if prefixes:
+            self.core.send({"type": "subscribe_many", "id": self.core.ids(), "topics": prefixes})
+
+    def _dispatch(self, message: Dict[str, Any]):
+        """Deliver a message received from the server."""
+        data = message.get("data")
+        if isinstance(data, dict) and "headers" in data:
+            headers, payload = data["headers"], data.get("message")
+        else:
+            headers, payload = {}, data
+        self.deliver(message.get("sender"), message.get("topic", ""), headers, payload)
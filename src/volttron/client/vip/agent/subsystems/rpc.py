@@ -0,0 +1,221 @@
+# src/volttron/client/vip/agent/subsystems/rpc.py
+"""RPC subsystem for VIP agents."""
+import heapq
+import inspect
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import gevent
+from gevent.event import AsyncResult
+
+from ..decorators import annotate, dualmethod
+from ..errors import RemoteError, VIPError
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30.0
+
+class RPC:
+    """
+    RPC subsystem for VIP agents.
+
+    Calls are sent without waiting for earlier calls to complete; each
+    returns an AsyncResult that is resolved when the response with its
+    correlation ID arrives, so any number of calls can be in flight on the
+    agent's single connection. Timeouts are enforced by one shared timer
+    that always waits for the earliest deadline.
+    """
+
+    def __init__(self, core=None, owner=None, peerlist_subsys=None):
+        """Initialize the RPC subsystem."""
+        self.core = core
+        self.owner = owner
+        self.peerlist = peerlist_subsys
+        self.default_timeout = DEFAULT_TIMEOUT
+        self._exports: Dict[str, Callable] = {}
+        self._pending: Dict[str, AsyncResult] = {}  # correlation id -> result
+        self._deadlines: List[Tuple[float, str]] = []  # heap of (deadline, correlation id)
+        self._timer: Optional[gevent.Greenlet] = None
+        self._timer_deadline = 0.0
+
+        if core is not None:
+            core.register_handler("rpc", self._handle_request)
+            core.register_handler("rpc_response", self._handle_response)
+            core.register_handler("error", self._handle_error)
+            core.onsetup(self._export_annotated)
+            core.onstop(self._cancel_pending)
+
+    @dualmethod
+    def export(self, method: Callable, name: Optional[str] = None) -> Callable:
+        """
+        Export a method so that peers can call it.
+
+        Args:
+            method: The callable to export
+            name: The name peers call it by, defaults to the method name
+
+        Returns:
+            The method
+        """
+        self._exports[name or method.__name__] = method
+        return method
+
+    @export.classmethod
+    def export(cls, name=None):
+        """
+        Decorator marking an agent method for export when the agent is set up.
+
+        Usable bare, as ``@RPC.export``, or with a name, as ``@RPC.export("name")``.
+        """
+        if callable(name):
+            return annotate(_rpc_export=name.__name__)(name)
+        return lambda method: annotate(_rpc_export=name or method.__name__)(method)
+
+    def call(self, peer: str, method: str, *args, **kwargs) -> AsyncResult:
+        """
+        Call a method exported by a peer.
+
+        Args:
+            peer: The identity of the peer
+            method: The exported name of the method
+            *args: Positional arguments for the method
+            **kwargs: Keyword arguments for the method
+
+        Returns:
+            An AsyncResult resolved with the result of the call
+        """
+        return self.call_with_timeout(self.default_timeout, peer, method, *args, **kwargs)
+
+    def call_with_timeout(self, timeout: float, peer: str, method: str, *args, **kwargs) -> AsyncResult:
+        """
+        Call a method exported by a peer with a specific timeout.
+
+        Arguments are passed either positionally or by keyword, not both.
+
+        Args:
+            timeout: Seconds before the call fails with TimeoutError
+            peer: The identity of the peer
+            method: The exported name of the method
+            *args: Positional arguments for the method
+            **kwargs: Keyword arguments for the method
+
+        Returns:
+            An AsyncResult resolved with the result of the call
+        """
+        if args and kwargs:
+            raise ValueError("RPC arguments must be all positional or all keyword")
+        params = kwargs if kwargs else list(args)
+
+        result = AsyncResult()
+        correlation_id = self.core.ids()
+        self._pending[correlation_id] = result
+        try:
+            self.core.send({
+                "type": "rpc",
+                "id": correlation_id,
+                "target": peer,
+                "method": method,
+                "params": params,
+                "sender": self.core.identity
+            })
+        except Exception as e:
+            self._pending.pop(correlation_id, None)
+            result.set_exception(e)
+            return result
+
+        heapq.heappush(self._deadlines, (time.monotonic() + timeout, correlation_id))
+        self._arm_timer()
+        return result
+
+    def _export_annotated(self, core):
+        """Export the owner's methods marked with the export decorator."""
+        if self.owner is None:
+            return
+        for _, member in inspect.getmembers(self.owner, inspect.ismethod):
+            name = getattr(member, "_rpc_export", None)
+            if name is not None:
+                self._exports[name] = member
+
+    def _handle_request(self, message: dict):
+        """Serve a call from a peer without blocking the receive loop."""
+        gevent.spawn(self._serve, message)
+
+    def _serve(self, message: dict):
+        """Run an exported method and send its result back to the caller."""
+        response = {
+            "type": "rpc_response",
+            "id": message.get("id"),
+            "target": message.get("sender"),
+            "sender": self.core.identity
+        }
+        name = message.get("method")
+        method = self._exports.get(name)
+        params = message.get("params", [])
+        try:
+            if method is None:
+                raise NameError(f"No such method: {name}")
+            result = method(**params) if isinstance(params, dict) else method(*params)
+            response["result"] = result
+        except Exception as e:
+            _log.debug(f"RPC {name} from {message.get('sender')} failed: {e}")
+            response["error"] = {"message": str(e), "type": type(e).__name__}
+
+        try:
+            self.core.send(response)
+        except Exception as e:
+            _log.error(f"Failed to send RPC response for {name}: {e}")
+
+    def _handle_response(self, message: dict):
+        """Resolve the pending call a response belongs to."""
+        result = self._pending.pop(message.get("id"), None)
+        if result is None:
+            _log.debug(f"Discarding response for unknown or expired call {message.get('id')}")
+            return
+        error = message.get("error")
+        if error is not None:
+            result.set_exception(RemoteError(error.get("message"), error.get("type")))
+        else:
+            result.set(message.get("result"))
+
+    def _handle_error(self, message: dict):
+        """Fail the pending call the server could not deliver, if any."""
+        result = self._pending.pop(message.get("id"), None)
+        if result is not None:
+            result.set_exception(VIPError(message.get("error")))
+        else:
+            _log.warning(f"Error from server: {message.get('error')}")
+
+    def _arm_timer(self):
+        """Make the shared timer wake up for the earliest deadline."""
+        if not self._deadlines:
+            return
+        deadline = self._deadlines[0][0]
+        if self._timer is not None:
+            if self._timer_deadline <= deadline:
+                return
+            self._timer.kill(block=False)
+        self._timer_deadline = deadline
+        self._timer = gevent.spawn_later(max(0.0, deadline - time.monotonic()), self._expire)
+
+    def _expire(self):
+        """Fail every call whose deadline has passed."""
+        self._timer = None
+        now = time.monotonic()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, correlation_id = heapq.heappop(self._deadlines)
+            # Entries of calls that already completed are simply discarded
+            result = self._pending.pop(correlation_id, None)
+            if result is not None:
+                result.set_exception(TimeoutError(f"RPC call {correlation_id} timed out"))
+        self._arm_timer()
+
+    def _cancel_pending(self):
+        """Fail all calls still in flight when the agent stops."""
+        pending, self._pending = self._pending, {}
+        for result in pending.values():
+            result.set_exception(ConnectionError("Agent stopped before the call completed"))
+        self._deadlines.clear()
+        if self._timer is not None:
+            self._timer.kill(block=False)
+            self._timer = None
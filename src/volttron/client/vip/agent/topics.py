@@ -0,0 +1,130 @@
+# src/volttron/client/vip/agent/topics.py
+"""Matching of topics against subscription prefixes."""
+from typing import Dict, Hashable, List, Optional, Set
+
+class _TopicNode:
+    """A node of the topic trie, reached by a path of whole topic segments."""
+    __slots__ = ("children", "partials", "lengths")
+
+    def __init__(self):
+        self.children: Dict[str, "_TopicNode"] = {}
+        # last prefix segment -> callbacks; matches segments starting with it
+        self.partials: Dict[str, Set[Hashable]] = {}
+        # length of a last prefix segment -> number of such segments
+        self.lengths: Dict[int, int] = {}
+
+class TopicTrie:
+    """
+    Prefix trie mapping topic prefixes to callbacks.
+
+    Any hashable value can stand in for a callback; the local bus maps
+    prefixes to agent identities.
+
+    Prefixes keep VOLTTRON's string prefix semantics, so "devices/a" matches
+    "devices/abc/x". A prefix is stored as the path of its whole segments
+    followed by its last, possibly partial, segment. Matching a topic walks
+    one node per topic segment and, at each node, looks up the leading parts
+    of the segment whose lengths are those of the stored last segments, so
+    its cost grows with the topic depth rather than with the number of
+    subscriptions.
+    """
+
+    def __init__(self):
+        """Initialize an empty trie."""
+        self._root = _TopicNode()
+        self._prefixes: Dict[str, Set[Hashable]] = {}
+
+    def __contains__(self, prefix: str) -> bool:
+        return prefix in self._prefixes
+
+    def prefixes(self) -> List[str]:
+        """Return the prefixes that have callbacks."""
+        return list(self._prefixes)
+
+    def add(self, prefix: str, callback: Hashable) -> bool:
+        """
+        Register a callback for a prefix.
+
+        Args:
+            prefix: The topic prefix
+            callback: The callback to register
+
+        Returns:
+            True if the prefix had no callbacks before
+        """
+        *path, last = prefix.split("/")
+        node = self._root
+        for segment in path:
+            node = node.children.setdefault(segment, _TopicNode())
+        callbacks = node.partials.get(last)
+        if callbacks is None:
+            callbacks = node.partials[last] = set()
+            node.lengths[len(last)] = node.lengths.get(len(last), 0) + 1
+        callbacks.add(callback)
+        new = prefix not in self._prefixes
+        self._prefixes[prefix] = callbacks
+        return new
+
+    def remove(self, prefix: str, callback: Optional[Hashable] = None) -> bool:
+        """
+        Remove one or all callbacks for a prefix.
+
+        Args:
+            prefix: The topic prefix
+            callback: The callback to remove, or None to remove them all
+
+        Returns:
+            True if the prefix no longer has any callbacks
+        """
+        callbacks = self._prefixes.get(prefix)
+        if callbacks is None:
+            return False
+        if callback is None:
+            callbacks.clear()
+        else:
+            callbacks.discard(callback)
+        if callbacks:
+            return False
+
+        del self._prefixes[prefix]
+        *path, last = prefix.split("/")
+        nodes = [self._root]
+        for segment in path:
+            nodes.append(nodes[-1].children[segment])
+        node = nodes[-1]
+        del node.partials[last]
+        node.lengths[len(last)] -= 1
+        if not node.lengths[len(last)]:
+            del node.lengths[len(last)]
+        # Prune nodes that no longer lead to any prefix
+        for segment, parent, node in zip(reversed(path), reversed(nodes[:-1]), reversed(nodes[1:])):
+            if node.children or node.partials:
+                break
+            del parent.children[segment]
+        return True
+
+    def match(self, topic: str) -> List[Hashable]:
+        """
+        Find the callbacks of every prefix matching a topic.
+
+        A callback registered under several matching prefixes is returned
+        once for each of them, so it is called once per subscription.
+
+        Args:
+            topic: The topic of a received message
+
+        Returns:
+            The matching callbacks
+        """
+        matched = []
+        node = self._root
+        for segment in topic.split("/"):
+            for length in node.lengths:
+                if length <= len(segment):
+                    callbacks = node.partials.get(segment[:length])
+                    if callbacks is not None:
+                        matched.extend(callbacks)
+            node = node.children.get(segment)
+            if node is None:
+                break
+        return matched
@@ -8,7 +8,8 @@ import os
 import random
 import re
 import sys
-import uuid
+
+from volttron.messagebus.fastapi.ids import IdGenerator
 
 __all__ = ['Message']
 
@@ -16,18 +17,42 @@ __all__ = ['Message']
 # be used when available.
 _use_json_module = True
 
+# Source of message IDs; far cheaper than a uuid4 per message
+_message_ids = IdGenerator()
+
+# Reusing one encoder avoids building a new one on every to_json() call
+_encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+
 
 class Message(object):
-    """VIP message class used for compatibility with VOLTTRON protocol."""
+    """
+    VIP message class used for compatibility with VOLTTRON protocol.
+
+    Messages are slotted to keep them small, and an ID is only assigned
+    the first time one is needed.
+    """
+
+    __slots__ = ('peer', 'subsystem', 'args', '_id', 'user', 'via')
 
     def __init__(self, peer='', subsystem='', args=None, msg_id='', user='', via=None):
         self.peer = peer
         self.subsystem = subsystem
         self.args = args or []
-        self.id = msg_id or str(uuid.uuid4())
+        self._id = msg_id or None
         self.user = user
         self.via = via
 
+    @property
+    def id(self):
+        """The message ID, generated on first use if none was given."""
+        if self._id is None:
+            self._id = _message_ids.next_id()
+        return self._id
+
+    @id.setter
+    def id(self, value):
+        self._id = value or None
+
     @classmethod
     def from_dict(cls, dct):
         """Create a message object from a dictionary."""
@@ -56,8 +81,8 @@ class Message(object):
         return cls.from_dict(json.loads(json_string))
         
     def to_json(self):
-        """Convert to a JSON string."""
-        return json.dumps(self.to_dict())
+        """Convert to a compact JSON string."""
+        return _encode(self.to_dict())
 
     def __repr__(self):
         attrs = ['peer', 'subsystem', 'args', 'id', 'user', 'via']
@@ -66,4 +91,4 @@ class Message(object):
         return '%s(%s)' % (self.__class__.__name__, kwargs)
 
     def __str__(self):
-        return '<%s at %s>' % (self.__class__.__name__, id(self))
\ No newline at end of file
+        return '<%s at %s>' % (self.__class__.__name__, id(self))
@@ -1,9 +1,13 @@
 """
 VOLTTRON FastAPI MessageBus implementation package.
 """
-from importlib.metadata import version, PackageNotFoundError
 
-try:
-    __version__ = version("volttron-lib-fastapi")
-except PackageNotFoundError:
-    __version__ = "unknown"
\ No newline at end of file
+def __getattr__(name):
+    # Reading the installed metadata is slow, so only do it when asked for
+    if name == "__version__":
+        from importlib.metadata import version, PackageNotFoundError
+        try:
+            return version("volttron-lib-fastapi")
+        except PackageNotFoundError:
+            return "unknown"
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,11 @@
 from .loop import CoreLoop
-from .gevent_loop import GeventCoreLoop
 
-# Export both classes directly
-__all__ = ['CoreLoop', 'GeventCoreLoop']
\ No newline at end of file
+# Export both classes directly; GeventCoreLoop is imported on first use so
+# that asyncio servers do not load gevent
+__all__ = ['CoreLoop', 'GeventCoreLoop']
+
+def __getattr__(name):
+    if name == "GeventCoreLoop":
+        from .gevent_loop import GeventCoreLoop
+        return GeventCoreLoop
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
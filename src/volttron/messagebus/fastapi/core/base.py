@@ -3,7 +3,7 @@
 Base interface for the core message processing loop.
 """
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Dict, Optional, Set, Union
+from typing import Any, Callable, Dict, Optional, Union
 
 class BaseCoreLoop(ABC):
     """
@@ -24,7 +24,6 @@ class BaseCoreLoop(ABC):
         self.agent_id = agent_id
         self.websocket = websocket
         self.running = False
-        self.subscriptions: Dict[str, Set[str]] = {}  # topic -> set of subscriber ids
         self.rpc_methods: Dict[str, Callable] = {}
     
     @abstractmethod
@@ -65,6 +64,11 @@ class BaseCoreLoop(ABC):
         """Handle a topic subscription request."""
         pass
             
+    @abstractmethod
+    def handle_unsubscribe(self, message: dict) -> dict:
+        """Handle a topic unsubscription request."""
+        pass
+            
     @abstractmethod
     def handle_publish(self, message: dict) -> dict:
         """Handle a message publication."""
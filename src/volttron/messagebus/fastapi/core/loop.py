@@ -4,10 +4,14 @@ Core message processing loop for the VOLTTRON FastAPI messagebus.
 import asyncio
 import json
 import logging
-import uuid
-from typing import Any, Callable, Dict, Optional, Set
+from typing import Any, Callable, Dict, Optional, Set, Tuple
 
+from ..ids import IdGenerator
+from ..priority import PRIORITY_HIGH, priority_rules as global_priority_rules
 from ..router import router as global_router
+from ..router.aggregation import aggregator as global_aggregator
+from ..websocket.framing import CONTENT_TYPE_JSON
+from .ratelimit import DELAY, DROP, REJECT, rate_limiter as global_rate_limiter
 
 _log = logging.getLogger(__name__)
 
@@ -18,17 +22,39 @@ class CoreLoop:
     This class manages the processing of messages for a single WebSocket connection.
     It provides mechanisms for sending and receiving messages, handling RPC calls,
     and managing subscriptions.
+    
+    Messages are dispatched on their ``type`` through the ``handlers`` table,
+    which plugin subsystems extend with ``register_handler``.
     """
     
+    # message type -> (handler, raw)
+    handlers: Dict[str, Tuple[Callable, bool]] = {}
+    
     def __init__(self, agent_id: str, websocket):
         """Initialize the core loop for an agent connection."""
         self.agent_id = agent_id
         self.websocket = websocket
         self.running = False
-        self.subscriptions: Dict[str, Set[str]] = {}  # topic -> set of subscriber ids
         self.rpc_methods: Dict[str, Callable] = {}
-        self.pending_requests: Dict[str, asyncio.Future] = {}
+        self.pending_requests: Dict[int, asyncio.Future] = {}
+        self.ids = IdGenerator()
         self.router = global_router
+        self.rate_limiter = global_rate_limiter
+        self.priority_rules = global_priority_rules
+        self.aggregator = global_aggregator
+        
+    @property
+    def subscriptions(self) -> Dict[str, Set[str]]:
+        """
+        Per-connection view of the router's subscription store.
+        
+        The router is the single authoritative store; this returns the
+        topic -> subscriber ids mapping restricted to this agent's topics.
+        """
+        return {
+            topic: self.router.subscriptions[topic]
+            for topic in self.router.agent_topics.get(self.agent_id, ())
+        }
         
     async def start(self):
         """Start the core loop processing."""
@@ -42,6 +68,7 @@ class CoreLoop:
         self.running = False
         # Unregister from the router
         self.router.unregister_agent(self.agent_id)
+        self.rate_limiter.forget(self.agent_id)
         # Clear any pending requests
         for req_id, future in self.pending_requests.items():
             if not future.done():
@@ -49,6 +76,48 @@ class CoreLoop:
         self.pending_requests.clear()
         _log.info(f"Stopped core loop for agent {self.agent_id}")
         
+    @classmethod
+    def register_handler(cls, message_type: str, handler: Optional[Callable] = None,
+                         raw: bool = False):
+        """
+        Register the handler for a message type.
+        
+        Handlers are called as ``handler(core_loop, message)`` and return an
+        optional response for the agent. Raw handlers receive the undecoded
+        frame text instead of the parsed message, so bulk payloads can be
+        passed on without being decoded. Registering on a subclass leaves
+        the handlers of its parent untouched. Can be used as a decorator.
+        
+        Args:
+            message_type: The message type to handle
+            handler: The handler coroutine function
+            raw: True if the handler takes the raw frame text
+        
+        Returns:
+            The handler, or a decorator if no handler was given
+        """
+        def register(func: Callable) -> Callable:
+            if "handlers" not in cls.__dict__:
+                cls.handlers = dict(cls.handlers)
+            cls.handlers[message_type] = (func, raw)
+            return func
+        
+        if handler is None:
+            return register
+        return register(handler)
+        
+    @classmethod
+    def unregister_handler(cls, message_type: str):
+        """Remove the handler for a message type."""
+        if "handlers" not in cls.__dict__:
+            cls.handlers = dict(cls.handlers)
+        cls.handlers.pop(message_type, None)
+        
+    def is_raw_type(self, message_type: str) -> bool:
+        """Check whether a message type is handled on the undecoded frame."""
+        entry = self.handlers.get(message_type)
+        return entry is not None and entry[1]
+        
     async def handle_message(self, message: dict):
         """
         Process an incoming message from the agent.
@@ -60,40 +129,56 @@ class CoreLoop:
             Optional response to send back to the agent
         """
         message_type = message.get("type", "")
+        entry = self.handlers.get(message_type)
+        if entry is None:
+            return self._unsupported(message_type, message.get("id"))
         
-        if message_type == "ping":
-            return {
-                "type": "pong",
-                "id": message.get("id")
-            }
+        handler, raw = entry
+        if raw:
+            message = json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+        return await handler(self, message)
         
-        elif message_type == "rpc":
-            return await self.handle_rpc_request(message)
+    async def handle_raw(self, message_type: str, data: str):
+        """
+        Process an undecoded frame whose type was read without parsing it.
         
-        elif message_type == "rpc_response":
-            return await self.handle_rpc_response(message)
+        Args:
+            message_type: The type read from the frame
+            data: The raw JSON text of the frame
+        
+        Returns:
+            Optional response to send back to the agent
+        """
+        entry = self.handlers.get(message_type)
+        if entry is None:
+            return self._unsupported(message_type, None)
+        
+        handler, raw = entry
+        return await handler(self, data if raw else json.loads(data))
+        
+    def _unsupported(self, message_type: str, message_id: Optional[str]) -> dict:
+        """Build the error response for a message type with no handler."""
+        _log.warning(f"Unknown message type: {message_type}")
+        return {
+            "type": "error",
+            "id": message_id,
+            "error": f"Unsupported message type: {message_type}"
+        }
+        
+    async def handle_ping(self, message: dict) -> dict:
+        """Handle a ping message."""
+        return {
+            "type": "pong",
+            "id": message.get("id")
+        }
         
-        elif message_type == "subscribe":
-            return await self.handle_subscribe(message)
-            
-        elif message_type == "publish":
-            return await self.handle_publish(message)
-            
-        else:
-            _log.warning(f"Unknown message type: {message_type}")
-            return {
-                "type": "error",
-                "id": message.get("id"),
-                "error": f"Unsupported message type: {message_type}"
-            }
-            
     async def handle_rpc_request(self, message: dict) -> dict:
         """Handle an RPC request message."""
         method = message.get("method")
         params = message.get("params", [])
         target = message.get("target")
         sender = message.get("sender", "unknown")
-        req_id = message.get("id", str(uuid.uuid4()))
+        req_id = message.get("id") or self.ids.next_id()
         
         _log.info(f"Handling RPC request: {method} with params {params}, target={target}, sender={sender}")
         
@@ -136,7 +221,7 @@ class CoreLoop:
         _log.info(f"Routing RPC response back to {sender}")
         if sender in self.router.connections:
             try:
-                await self.router.connections[sender].send_json(response)
+                await self.router.connections[sender].send_json(response, PRIORITY_HIGH)
                 _log.debug(f"Routed RPC response to {sender}")
                 return None  # No need to send a response through this connection
             except Exception as e:
@@ -162,8 +247,9 @@ class CoreLoop:
         
         _log.info(f"Handling RPC response: ID={req_id}, target={target}, sender={sender}")
         
-        # If this agent is waiting for this response, resolve the future
-        if req_id in self.pending_requests:
+        # If this agent is waiting for this response, resolve the future;
+        # responses addressed to other agents carry their IDs, not ours
+        if (not target or target == self.agent_id) and req_id in self.pending_requests:
             _log.debug(f"Found pending request {req_id}, resolving future")
             future = self.pending_requests.pop(req_id)
             if not future.done():
@@ -175,7 +261,7 @@ class CoreLoop:
             _log.info(f"Routing RPC response to {target}")
             if target in self.router.connections:
                 try:
-                    await self.router.connections[target].send_json(message)
+                    await self.router.connections[target].send_json(message, PRIORITY_HIGH)
                     _log.debug(f"Routed RPC response from {self.agent_id} to {target}")
                 except Exception as e:
                     _log.error(f"Failed to route RPC response to {target}: {e}")
@@ -196,18 +282,14 @@ class CoreLoop:
     async def handle_subscribe(self, message: dict) -> dict:
         """Handle a topic subscription request."""
         topic = message.get("topic")
-        if not topic:
+        error = self._validate_topic(topic)
+        if error:
             return {
                 "type": "error",
                 "id": message.get("id"),
-                "error": "Missing topic in subscription request"
+                "error": f"{error} in subscription request"
             }
             
-        # Track the subscription locally
-        if topic not in self.subscriptions:
-            self.subscriptions[topic] = set()
-        self.subscriptions[topic].add(self.agent_id)
-        
         # Register with the router
         self.router.subscribe(topic, self.agent_id)
         
@@ -219,22 +301,124 @@ class CoreLoop:
             "topic": topic
         }
             
+    async def handle_subscribe_many(self, message: dict) -> dict:
+        """
+        Handle a bulk topic subscription request.
+        
+        The topics are validated up front and applied to the router in one
+        step, so either every topic is subscribed or none are.
+        """
+        topics = message.get("topics")
+        error = self._validate_topics(topics)
+        if error:
+            return {
+                "type": "error",
+                "id": message.get("id"),
+                "error": f"{error} in subscription request"
+            }
+            
+        self.router.subscribe_many(topics, self.agent_id)
+        
+        return {
+            "type": "subscribe_many_confirm",
+            "id": message.get("id"),
+            "topics": topics
+        }
+        
+    async def handle_unsubscribe(self, message: dict) -> dict:
+        """Handle a topic unsubscription request."""
+        topic = message.get("topic")
+        error = self._validate_topic(topic)
+        if error:
+            return {
+                "type": "error",
+                "id": message.get("id"),
+                "error": f"{error} in unsubscription request"
+            }
+            
+        self.router.unsubscribe(topic, self.agent_id)
+        
+        return {
+            "type": "unsubscribe_confirm",
+            "id": message.get("id"),
+            "topic": topic
+        }
+        
+    async def handle_unsubscribe_many(self, message: dict) -> dict:
+        """
+        Handle a bulk topic unsubscription request.
+        
+        Like subscribe_many, the request is validated before any topic is
+        removed. The confirm lists the topics that were actually removed.
+        """
+        topics = message.get("topics")
+        error = self._validate_topics(topics)
+        if error:
+            return {
+                "type": "error",
+                "id": message.get("id"),
+                "error": f"{error} in unsubscription request"
+            }
+            
+        removed = self.router.unsubscribe_many(topics, self.agent_id)
+        
+        return {
+            "type": "unsubscribe_many_confirm",
+            "id": message.get("id"),
+            "topics": removed
+        }
+        
+    @staticmethod
+    def _validate_topic(topic) -> Optional[str]:
+        """Return an error description if topic is not a non-empty topic string."""
+        if not topic:
+            return "Missing topic"
+        if not isinstance(topic, str):
+            return "Invalid topic"
+        return None
+        
+    @staticmethod
+    def _validate_topics(topics) -> Optional[str]:
+        """Return an error description if topics is not a non-empty list of topic strings."""
+        if not isinstance(topics, list) or not topics:
+            return "Missing topics"
+        if not all(isinstance(topic, str) and topic for topic in topics):
+            return "Invalid topic"
+        return None
+        
     async def handle_publish(self, message: dict) -> dict:
         """Handle a message publication."""
         topic = message.get("topic")
         data = message.get("data")
         
-        if not topic:
+        error = self._validate_topic(topic)
+        if error:
+            return {
+                "type": "error",
+                "id": message.get("id"),
+                "error": f"{error} in publish request"
+            }
+            
+        exclude = message.get("exclude", ())
+        if not self._valid_exclude(exclude):
             return {
                 "type": "error",
                 "id": message.get("id"),
-                "error": "Missing topic in publish request"
+                "error": "Exclude must be a list of agent IDs"
             }
             
+        # Enforce rate limits before doing any routing work
+        response = await self._check_rate_limit(topic, message.get("id"))
+        if response is not None:
+            return response
+            
         _log.debug(f"Agent {self.agent_id} published to {topic}: {data}")
         
         # Forward to subscribers through the router
-        await self.router.publish(topic, data, self.agent_id)
+        priority = self.priority_rules.classify(message)
+        await self.router.publish(topic, data, self.agent_id, priority, frozenset(exclude))
+        if self.aggregator.enabled:
+            self.aggregator.add(topic, data, self.router)
         
         return {
             "type": "publish_confirm",
@@ -242,6 +426,145 @@ class CoreLoop:
             "topic": topic
         }
         
+    async def handle_frame(self, header: dict, payload) -> dict:
+        """
+        Handle a binary payload frame.
+        
+        The payload is routed untouched. JSON payloads are checked once here,
+        since text-framed subscribers receive them spliced into their frames,
+        where one malformed payload would spoil a whole batch.
+        
+        Args:
+            header: The decoded frame header
+            payload: The payload bytes
+        
+        Returns:
+            The response to send back to the agent
+        """
+        if header.get("type") != "publish":
+            return {
+                "type": "error",
+                "id": header.get("id"),
+                "error": f"Unsupported binary frame type: {header.get('type')}"
+            }
+            
+        topic = header.get("topic")
+        error = self._validate_topic(topic)
+        if error:
+            return {
+                "type": "error",
+                "id": header.get("id"),
+                "error": f"{error} in publish request"
+            }
+            
+        exclude = header.get("exclude", ())
+        if not self._valid_exclude(exclude):
+            return {
+                "type": "error",
+                "id": header.get("id"),
+                "error": "Exclude must be a list of agent IDs"
+            }
+            
+        content_type = header.get("content_type", CONTENT_TYPE_JSON)
+        if content_type == CONTENT_TYPE_JSON:
+            try:
+                data = json.loads(bytes(payload))
+            except ValueError:
+                return {
+                    "type": "error",
+                    "id": header.get("id"),
+                    "error": "Payload is not valid JSON"
+                }
+                
+        response = await self._check_rate_limit(topic, header.get("id"))
+        if response is not None:
+            return response
+            
+        _log.debug(f"Agent {self.agent_id} published {len(payload)} payload bytes to {topic}")
+        priority = self.priority_rules.classify(header)
+        await self.router.publish_payload(topic, payload, self.agent_id, priority,
+                                          content_type, frozenset(exclude))
+        if content_type == CONTENT_TYPE_JSON and self.aggregator.enabled:
+            self.aggregator.add(topic, data, self.router)
+        
+        return {
+            "type": "publish_confirm",
+            "id": header.get("id"),
+            "topic": topic
+        }
+        
+    @staticmethod
+    def _valid_exclude(exclude: Any) -> bool:
+        """Check that a publish's exclude field is a list of agent IDs."""
+        return isinstance(exclude, (list, tuple)) and all(isinstance(a, str) for a in exclude)
+        
+    async def _check_rate_limit(self, topic: str, message_id: Optional[str]) -> Optional[dict]:
+        """
+        Apply the publish rate limits, waiting first if the action is to delay.
+        
+        Args:
+            topic: The topic being published to
+            message_id: The ID of the publish request
+        
+        Returns:
+            The response to send instead of routing the publish, or None to route it
+        """
+        if not self.rate_limiter.enabled:
+            return None
+            
+        action, wait = self.rate_limiter.check(self.agent_id, topic)
+        delayed = False
+        while action == DELAY:
+            delayed = True
+            await asyncio.sleep(wait)
+            action, wait = self.rate_limiter.check(self.agent_id, topic)
+            
+        if action == REJECT:
+            self.rate_limiter.record(self.agent_id, "rejected")
+            _log.warning(f"Rejected publish from {self.agent_id} to {topic}: rate limit exceeded")
+            return {
+                "type": "error",
+                "id": message_id,
+                "error": f"Rate limit exceeded for publish to {topic}"
+            }
+        if action == DROP:
+            self.rate_limiter.record(self.agent_id, "dropped")
+            return {
+                "type": "publish_confirm",
+                "id": message_id,
+                "topic": topic,
+                "dropped": True
+            }
+        self.rate_limiter.record(self.agent_id, "delayed" if delayed else "allowed")
+        return None
+        
+    async def handle_credit(self, message: dict) -> Optional[dict]:
+        """
+        Handle a flow control credit grant from the agent.
+        
+        The first grant enables credit-based flow control for this
+        connection's pubsub deliveries. No response is sent on success.
+        """
+        messages = message.get("messages")
+        nbytes = message.get("bytes")
+        
+        if messages is None and nbytes is None:
+            return {
+                "type": "error",
+                "id": message.get("id"),
+                "error": "Missing messages or bytes in credit grant"
+            }
+        for value in (messages, nbytes):
+            if value is not None and (not isinstance(value, int) or value < 0):
+                return {
+                    "type": "error",
+                    "id": message.get("id"),
+                    "error": "Credit grants must be non-negative integers"
+                }
+                
+        await self.websocket.grant_credits(messages, nbytes)
+        return None
+        
     async def call_rpc(self, target_agent: str, method: str, params: list = None) -> Any:
         """
         Call an RPC method on another agent.
@@ -257,7 +580,7 @@ class CoreLoop:
         if params is None:
             params = []
             
-        req_id = str(uuid.uuid4())
+        req_id = self.ids.next_int()
         request = {
             "type": "rpc",
             "id": req_id,
@@ -272,7 +595,7 @@ class CoreLoop:
         self.pending_requests[req_id] = future
         
         # Send the request
-        await self.websocket.send_json(request)
+        await self.websocket.send_json(request, PRIORITY_HIGH)
         
         try:
             # Wait for the response with a timeout
@@ -280,4 +603,18 @@ class CoreLoop:
             return result
         except asyncio.TimeoutError:
             self.pending_requests.pop(req_id, None)
-            raise TimeoutError(f"RPC call to {target_agent}.{method} timed out")
\ No newline at end of file
+            raise TimeoutError(f"RPC call to {target_agent}.{method} timed out")
+
+# Built-in message types
+for _message_type, _handler in (
+    ("ping", CoreLoop.handle_ping),
+    ("rpc", CoreLoop.handle_rpc_request),
+    ("rpc_response", CoreLoop.handle_rpc_response),
+    ("subscribe", CoreLoop.handle_subscribe),
+    ("subscribe_many", CoreLoop.handle_subscribe_many),
+    ("unsubscribe", CoreLoop.handle_unsubscribe),
+    ("unsubscribe_many", CoreLoop.handle_unsubscribe_many),
+    ("publish", CoreLoop.handle_publish),
+    ("credit", CoreLoop.handle_credit),
+):
+    CoreLoop.register_handler(_message_type, _handler)
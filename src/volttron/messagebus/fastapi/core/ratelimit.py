@@ -0,0 +1,215 @@
+"""
+Token-bucket rate limiting for publishes handled by the core loop.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+_log = logging.getLogger(__name__)
+
+REJECT = "reject"
+DELAY = "delay"
+DROP = "drop"
+
+ACTIONS = (REJECT, DELAY, DROP)
+
+@dataclass
+class RateLimitRule:
+    """A token-bucket limit and what to do with publishes over the limit."""
+    rate: float  # publishes per second
+    burst: float  # bucket capacity
+    action: str = REJECT
+
+    def __post_init__(self):
+        if self.rate <= 0 or self.burst < 1:
+            raise ValueError("Rate limits need a positive rate and a burst of at least 1")
+        if self.action not in ACTIONS:
+            raise ValueError(f"Invalid rate limit action {self.action}, must be one of {ACTIONS}")
+
+    @classmethod
+    def from_dict(cls, dct: dict) -> "RateLimitRule":
+        """Create a rule from a configuration dictionary."""
+        return cls(rate=float(dct["rate"]),
+                   burst=float(dct.get("burst", dct["rate"])),
+                   action=dct.get("action", REJECT))
+
+class TokenBucket:
+    """
+    A token bucket that refills continuously at a fixed rate.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum number of tokens the bucket holds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def wait_time(self, now: float) -> float:
+        """
+        Refill the bucket and return how long until one token is available.
+
+        Args:
+            now: The current monotonic time
+
+        Returns:
+            0.0 if a token is available now, otherwise the wait in seconds
+        """
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        """Remove one token from the bucket."""
+        self.tokens -= 1
+
+class RateLimiter:
+    """
+    Per-agent and per-topic publish rate limits.
+
+    Agent limits apply to each agent separately, with an optional default for
+    agents that have no specific rule. Topic limits are keyed by topic prefix
+    and shared by every publisher on matching topics. A publish must pass
+    every limit that applies to it.
+    """
+
+    def __init__(self):
+        """Initialize a rate limiter with no limits configured."""
+        self.default_rule: Optional[RateLimitRule] = None
+        self.agent_rules: Dict[str, RateLimitRule] = {}
+        self.topic_rules: Dict[str, RateLimitRule] = {}  # topic prefix -> rule
+        self._agent_buckets: Dict[str, TokenBucket] = {}
+        self._topic_buckets: Dict[str, TokenBucket] = {}
+        self.counters: Dict[str, Dict[str, int]] = {}  # agent_id -> outcome -> count
+
+    @property
+    def enabled(self) -> bool:
+        """True if any limit is configured."""
+        return bool(self.default_rule or self.agent_rules or self.topic_rules)
+
+    def configure(self, config: Optional[dict] = None):
+        """
+        Replace the configured limits.
+
+        The configuration has the form::
+
+            {
+                "agent": {"rate": 100, "burst": 200, "action": "reject"},
+                "agents": {"<agent_id>": {"rate": 10, "action": "delay"}},
+                "topics": {"devices/": {"rate": 1000, "action": "drop"}}
+            }
+
+        Args:
+            config: The rate limit configuration, or None to remove all limits
+
+        Raises:
+            ValueError: If a rule is invalid
+        """
+        config = config or {}
+        self.default_rule = RateLimitRule.from_dict(config["agent"]) if config.get("agent") else None
+        self.agent_rules = {
+            agent_id: RateLimitRule.from_dict(rule)
+            for agent_id, rule in config.get("agents", {}).items()
+        }
+        self.topic_rules = {
+            prefix: RateLimitRule.from_dict(rule)
+            for prefix, rule in config.get("topics", {}).items()
+        }
+        self._agent_buckets.clear()
+        self._topic_buckets.clear()
+        _log.info(f"Configured rate limits: default={self.default_rule}, "
+                  f"{len(self.agent_rules)} agent rules, {len(self.topic_rules)} topic rules")
+
+    def check(self, agent_id: str, topic: str) -> Tuple[Optional[str], float]:
+        """
+        Check a publish against the applicable limits.
+
+        If the publish is within every limit a token is taken from each bucket.
+        Otherwise nothing is taken and the strictest over-limit action is
+        returned, in the order reject, drop, delay.
+
+        Args:
+            agent_id: The publishing agent
+            topic: The topic being published to
+
+        Returns:
+            A tuple of (action, wait) where action is None if the publish is allowed,
+            and wait is the time in seconds until all buckets have a token
+        """
+        if not self.enabled:
+            return None, 0.0
+
+        now = time.monotonic()
+        over: List[Tuple[RateLimitRule, float]] = []
+        buckets = self._buckets_for(agent_id, topic)
+        for rule, bucket in buckets:
+            wait = bucket.wait_time(now)
+            if wait:
+                over.append((rule, wait))
+
+        if not over:
+            for _, bucket in buckets:
+                bucket.take()
+            return None, 0.0
+
+        wait = max(w for _, w in over)
+        actions = {rule.action for rule, _ in over}
+        for action in (REJECT, DROP, DELAY):
+            if action in actions:
+                return action, wait
+
+    def record(self, agent_id: str, outcome: str):
+        """
+        Count the outcome of a publish.
+
+        Args:
+            agent_id: The publishing agent
+            outcome: "allowed" or one of the over-limit actions
+        """
+        counts = self.counters.setdefault(agent_id, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    def forget(self, agent_id: str):
+        """Drop the bucket for a disconnected agent; its counters are kept."""
+        self._agent_buckets.pop(agent_id, None)
+
+    def stats(self) -> dict:
+        """Return the configured limits and per-agent counters."""
+        return {
+            "enabled": self.enabled,
+            "agent": vars(self.default_rule) if self.default_rule else None,
+            "agents": {agent_id: vars(rule) for agent_id, rule in self.agent_rules.items()},
+            "topics": {prefix: vars(rule) for prefix, rule in self.topic_rules.items()},
+            "counters": {agent_id: dict(counts) for agent_id, counts in self.counters.items()}
+        }
+
+    def _buckets_for(self, agent_id: str, topic: str) -> List[Tuple[RateLimitRule, TokenBucket]]:
+        """Return the rules and buckets that apply to a publish."""
+        buckets = []
+        rule = self.agent_rules.get(agent_id, self.default_rule)
+        if rule is not None:
+            bucket = self._agent_buckets.get(agent_id)
+            if bucket is None:
+                bucket = self._agent_buckets[agent_id] = TokenBucket(rule.rate, rule.burst)
+            buckets.append((rule, bucket))
+
+        for prefix, rule in self.topic_rules.items():
+            if topic.startswith(prefix):
+                bucket = self._topic_buckets.get(prefix)
+                if bucket is None:
+                    bucket = self._topic_buckets[prefix] = TokenBucket(rule.rate, rule.burst)
+                buckets.append((rule, bucket))
+        return buckets
+
+# Create a global rate limiter instance; no limits until configured
+rate_limiter = RateLimiter()
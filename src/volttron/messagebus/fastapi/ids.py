@@ -0,0 +1,39 @@
+"""
+Cheap correlation IDs for requests and messages.
+
+Generating a uuid4 for every request reads from os.urandom each time. IDs
+only need to be unique among the requests a connection has outstanding, so
+a counter is enough; a random prefix drawn once per generator keeps IDs
+from different processes or connections apart where they can meet.
+"""
+import itertools
+import os
+from typing import Optional
+
+class IdGenerator:
+    """
+    Generates IDs from a fixed prefix and a monotonically increasing counter.
+
+    Advancing the counter is a single C-level operation, so a generator can
+    be shared between threads and greenlets without a lock.
+    """
+
+    def __init__(self, prefix: Optional[str] = None):
+        """
+        Initialize the generator.
+
+        Args:
+            prefix: Prefix for string IDs, or None for a random one
+        """
+        self.prefix = prefix if prefix is not None else os.urandom(4).hex() + "-"
+        self._counter = itertools.count(1)
+
+    def next_int(self) -> int:
+        """Return the next ID as a compact integer, without the prefix."""
+        return next(self._counter)
+
+    def next_id(self) -> str:
+        """Return the next ID as a prefixed string."""
+        return f"{self.prefix}{next(self._counter):x}"
+
+    __call__ = next_id
@@ -0,0 +1,124 @@
+"""
+Message priority classification for the VOLTTRON FastAPI messagebus.
+
+Every frame is assigned to one of three lanes. Lower numbers are served
+first, both when inbound frames are waiting to be processed and when
+outbound frames are waiting to be written.
+"""
+import logging
+from typing import Dict, Optional
+
+_log = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+PRIORITY_LEVELS = {
+    "high": PRIORITY_HIGH,
+    "normal": PRIORITY_NORMAL,
+    "low": PRIORITY_LOW
+}
+
+# Control traffic is high priority unless a rule says otherwise
+DEFAULT_TYPE_PRIORITIES = {
+    "ping": PRIORITY_HIGH,
+    "rpc": PRIORITY_HIGH,
+    "rpc_response": PRIORITY_HIGH,
+    "credit": PRIORITY_HIGH
+}
+
+def parse_priority(value) -> int:
+    """
+    Convert a priority name or number to a priority level.
+
+    Raises:
+        ValueError: If the value is not a known priority
+    """
+    if isinstance(value, str) and value in PRIORITY_LEVELS:
+        return PRIORITY_LEVELS[value]
+    if isinstance(value, int) and value in PRIORITY_LEVELS.values():
+        return value
+    raise ValueError(f"Invalid priority {value!r}, must be one of {list(PRIORITY_LEVELS)}")
+
+class PriorityRules:
+    """
+    Assigns a priority to each frame.
+
+    A frame's own ``priority`` field wins, then the longest matching topic
+    prefix rule, then the rule for the frame type, and finally normal priority.
+    """
+
+    def __init__(self):
+        """Initialize with the default type priorities and no topic rules."""
+        self.type_priorities: Dict[str, int] = dict(DEFAULT_TYPE_PRIORITIES)
+        self.topic_priorities: Dict[str, int] = {}  # topic prefix -> priority
+
+    def configure(self, config: Optional[dict] = None):
+        """
+        Replace the configured rules.
+
+        The configuration has the form::
+
+            {
+                "types": {"rpc": "high"},
+                "topics": {"alerts/": "high", "devices/": "low"}
+            }
+
+        Type rules are merged over the defaults.
+
+        Args:
+            config: The priority configuration, or None to restore the defaults
+
+        Raises:
+            ValueError: If a priority is invalid
+        """
+        config = config or {}
+        type_priorities = dict(DEFAULT_TYPE_PRIORITIES)
+        type_priorities.update({
+            message_type: parse_priority(value)
+            for message_type, value in config.get("types", {}).items()
+        })
+        # Longest prefix first so the most specific rule matches
+        topic_priorities = {
+            prefix: parse_priority(config["topics"][prefix])
+            for prefix in sorted(config.get("topics", {}), key=len, reverse=True)
+        }
+        self.type_priorities = type_priorities
+        self.topic_priorities = topic_priorities
+        _log.info(f"Configured {len(self.topic_priorities)} topic priority rules")
+
+    def classify(self, message: dict) -> int:
+        """
+        Return the priority of a frame.
+
+        An invalid priority field on the frame is ignored.
+
+        Args:
+            message: The decoded frame
+        """
+        requested = message.get("priority")
+        if requested is not None:
+            try:
+                return parse_priority(requested)
+            except ValueError:
+                _log.debug(f"Ignoring invalid priority {requested!r}")
+
+        topic = message.get("topic")
+        # Frames are classified before their handlers validate the topic
+        if isinstance(topic, str) and topic and self.topic_priorities:
+            priority = self.topic_priority(topic)
+            if priority is not None:
+                return priority
+
+        return self.type_priorities.get(message.get("type"), PRIORITY_NORMAL)
+
+    def topic_priority(self, topic: str) -> Optional[int]:
+        """Return the priority of the longest matching topic rule, if any."""
+        for prefix, priority in self.topic_priorities.items():
+            if topic.startswith(prefix):
+                return priority
+        return None
+
+# Create a global rules instance with the default type priorities
+priority_rules = PriorityRules()
@@ -0,0 +1,215 @@
+"""
+Time-synchronized aggregation of publishes into rolled-up messages.
+
+Publishes on a configured topic prefix are still routed as usual, and are
+also collected over a window aligned to the wall clock. At the end of each
+window one rolled-up message is published on the rule's rollup topic, so a
+subscriber that needs the whole building sees one frame per window instead
+of one per device. Rollup topics default to a separate ``rollup/`` tree, so
+subscribing to a rollup does not also subscribe to the raw publishes.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..priority import PRIORITY_NORMAL
+
+_log = logging.getLogger(__name__)
+
+# Sender ID of rolled-up messages
+AGGREGATOR_ID = "volttron.aggregator"
+
+@dataclass
+class AggregationRule:
+    """How publishes on a topic prefix are rolled up."""
+    prefix: str
+    window: float  # seconds
+    topic: str  # topic the rollup is published on
+    stats: bool = True
+
+    def __post_init__(self):
+        if self.window <= 0:
+            raise ValueError("Aggregation window must be positive")
+
+    @classmethod
+    def from_dict(cls, prefix: str, dct: dict) -> "AggregationRule":
+        """Create a rule from a configuration dictionary."""
+        return cls(prefix=prefix,
+                   window=float(dct["window"]),
+                   topic=dct.get("topic", "rollup/" + prefix.rstrip("/")),
+                   stats=bool(dct.get("stats", True)))
+
+def _numeric_fields(data: Any) -> Iterator[Tuple[str, float]]:
+    """Yield the numeric fields of a published value."""
+    # Device publishes use the [values, metadata] form
+    if isinstance(data, (list, tuple)) and data and isinstance(data[0], dict):
+        data = data[0]
+    if isinstance(data, dict):
+        for field, value in data.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield field, value
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        yield "value", data
+
+def summarize(samples: Dict[str, List[Any]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Compute min, max, mean and count of every numeric field per topic.
+
+    Args:
+        samples: Published values per topic
+
+    Returns:
+        Mapping of topic -> field -> statistic -> value
+    """
+    records = [(topic, field, value)
+               for topic, values in samples.items()
+               for data in values
+               for field, value in _numeric_fields(data)]
+    if not records:
+        return {}
+
+    # pandas is only needed once stats are requested
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(records, columns=["topic", "field", "value"])
+    grouped = frame.groupby(["topic", "field"], sort=False)["value"].agg(["min", "max", "mean", "count"])
+    summary: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for (topic, field), minimum, maximum, mean, count in zip(
+            grouped.index, grouped["min"].tolist(), grouped["max"].tolist(),
+            grouped["mean"].tolist(), grouped["count"].tolist()):
+        summary.setdefault(topic, {})[field] = {
+            "min": minimum,
+            "max": maximum,
+            "mean": mean,
+            "count": count
+        }
+    return summary
+
+class PublishAggregator:
+    """
+    Collects publishes on configured prefixes and publishes one rollup per window.
+
+    Windows end on multiples of the window length since the epoch, so
+    brokers and agents with synchronized clocks agree on the boundaries.
+    """
+
+    def __init__(self):
+        """Initialize an aggregator with no rules."""
+        self.rules: List[AggregationRule] = []
+        self._samples: Dict[str, Dict[str, List[Any]]] = {}  # rollup topic -> topic -> values
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._router = None
+
+    @property
+    def enabled(self) -> bool:
+        """True if any aggregation rule is configured."""
+        return bool(self.rules)
+
+    def configure(self, config: Optional[dict] = None):
+        """
+        Replace the aggregation rules.
+
+        The configuration maps topic prefixes to rules::
+
+            {
+                "devices/building1/": {"window": 60, "topic": "rollup/devices/building1", "stats": true}
+            }
+
+        The rollup topic defaults to the prefix under "rollup/", outside the
+        aggregated prefix, so rollup subscribers do not receive the raw
+        publishes as well.
+
+        Args:
+            config: The aggregation configuration, or None to remove all rules
+
+        Raises:
+            ValueError: If a rule is invalid
+        """
+        rules = [AggregationRule.from_dict(prefix, rule) for prefix, rule in (config or {}).items()]
+        self.close()
+        # Longest prefix first so the most specific rule wins
+        self.rules = sorted(rules, key=lambda rule: len(rule.prefix), reverse=True)
+        _log.info(f"Configured {len(self.rules)} aggregation rules")
+
+    def close(self):
+        """Stop the window timers and discard the values collected so far."""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self._samples.clear()
+
+    def match(self, topic: str) -> Optional[AggregationRule]:
+        """Return the rule that applies to a topic, if any."""
+        for rule in self.rules:
+            if topic.startswith(rule.prefix) and topic != rule.topic:
+                return rule
+        return None
+
+    def add(self, topic: str, data: Any, router) -> bool:
+        """
+        Collect a publish if an aggregation rule applies to it.
+
+        Must be called from the event loop, which runs the window timers.
+
+        Args:
+            topic: The topic published to
+            data: The published value
+            router: The router that rollups are published through
+
+        Returns:
+            True if the publish was collected
+        """
+        rule = self.match(topic)
+        if rule is None:
+            return False
+        # Agents publish a {"headers", "message"} envelope; only the message is aggregated
+        if isinstance(data, dict) and "headers" in data and "message" in data:
+            data = data["message"]
+        self._router = router
+        self._samples.setdefault(rule.topic, {}).setdefault(topic, []).append(data)
+        if rule.topic not in self._tasks:
+            self._tasks[rule.topic] = asyncio.ensure_future(self._run(rule))
+        return True
+
+    async def flush(self, rule: AggregationRule, window_end: Optional[float] = None):
+        """
+        Publish the rollup of the values collected for a rule and start a new window.
+
+        Args:
+            rule: The rule to flush
+            window_end: The end of the window, defaults to now
+        """
+        samples = self._samples.pop(rule.topic, None)
+        if not samples or self._router is None:
+            return
+        window_end = window_end if window_end is not None else time.time()
+        rollup = {
+            "window_start": window_end - rule.window,
+            "window_end": window_end,
+            "count": sum(len(values) for values in samples.values()),
+            "topics": {topic: values[-1] for topic, values in samples.items()}
+        }
+        if rule.stats:
+            # pandas would block the event loop
+            rollup["stats"] = await asyncio.to_thread(summarize, samples)
+        await self._router.publish(rule.topic, rollup, AGGREGATOR_ID, PRIORITY_NORMAL)
+
+    @staticmethod
+    def next_boundary(window: float, now: float) -> float:
+        """Return the end of the window containing now."""
+        return (now // window + 1) * window
+
+    async def _run(self, rule: AggregationRule):
+        """Flush a rule at the end of every window."""
+        while True:
+            boundary = self.next_boundary(rule.window, time.time())
+            await asyncio.sleep(max(0.0, boundary - time.time()))
+            try:
+                await self.flush(rule, boundary)
+            except Exception as e:
+                _log.error(f"Failed to publish rollup on {rule.topic}: {e}")
+
+# Create a global aggregator instance; nothing is aggregated until configured
+aggregator = PublishAggregator()
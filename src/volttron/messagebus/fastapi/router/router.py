@@ -2,13 +2,99 @@
 Message router for the VOLTTRON FastAPI messagebus.
 """
 import asyncio
+import json
 import logging
-from typing import Dict, Set, List, Any, Optional
+from typing import TYPE_CHECKING, Any, Collection, Dict, List, Optional, Set
 
-from fastapi import WebSocket
+from ..priority import PRIORITY_HIGH, PRIORITY_NORMAL
+from ..websocket.framing import CONTENT_TYPE_JSON, FRAMING_BINARY, build_frame, payload_to_text
+
+if TYPE_CHECKING:
+    # Only for annotations; the core loop and router do not need FastAPI itself
+    from fastapi import WebSocket
 
 _log = logging.getLogger(__name__)
 
+class _PrefixNode:
+    """A node of the prefix index, reached by a path of whole topic segments."""
+    __slots__ = ("children", "partials", "lengths")
+    
+    def __init__(self):
+        self.children: Dict[str, "_PrefixNode"] = {}
+        # last prefix segment -> subscription prefixes ending with it
+        self.partials: Dict[str, str] = {}
+        # length of a last prefix segment -> number of such segments
+        self.lengths: Dict[int, int] = {}
+        
+class PrefixIndex:
+    """
+    Index of subscription prefixes by topic segment.
+    
+    Subscriptions are topic prefixes, so "devices/a" matches "devices/abc/x".
+    A prefix is stored as the path of its whole segments followed by its
+    last, possibly partial, segment, as the client's topic trie does.
+    Finding the prefixes of a topic walks one node per topic segment and
+    looks up only the leading parts of the segment whose lengths are those of
+    stored last segments, rather than testing every subscription.
+    """
+    
+    def __init__(self):
+        """Initialize an empty index."""
+        self._root = _PrefixNode()
+        
+    def add(self, prefix: str):
+        """Add a prefix to the index."""
+        *path, last = prefix.split("/")
+        node = self._root
+        for segment in path:
+            node = node.children.setdefault(segment, _PrefixNode())
+        if last not in node.partials:
+            node.lengths[len(last)] = node.lengths.get(len(last), 0) + 1
+        node.partials[last] = prefix
+        
+    def remove(self, prefix: str):
+        """Remove a prefix from the index, pruning nodes that lead to no prefix."""
+        *path, last = prefix.split("/")
+        nodes = [self._root]
+        for segment in path:
+            node = nodes[-1].children.get(segment)
+            if node is None:
+                return
+            nodes.append(node)
+        node = nodes[-1]
+        if node.partials.pop(last, None) is None:
+            return
+        node.lengths[len(last)] -= 1
+        if not node.lengths[len(last)]:
+            del node.lengths[len(last)]
+        for segment, parent, node in zip(reversed(path), reversed(nodes[:-1]), reversed(nodes[1:])):
+            if node.children or node.partials:
+                break
+            del parent.children[segment]
+            
+    def match(self, topic: str) -> List[str]:
+        """
+        Find the prefixes matching a topic.
+        
+        Args:
+            topic: The topic of a publish
+            
+        Returns:
+            The matching subscription prefixes
+        """
+        matched = []
+        node = self._root
+        for segment in topic.split("/"):
+            for length in node.lengths:
+                if length <= len(segment):
+                    prefix = node.partials.get(segment[:length])
+                    if prefix is not None:
+                        matched.append(prefix)
+            node = node.children.get(segment)
+            if node is None:
+                break
+        return matched
+        
 class MessageRouter:
     """
     Routes messages between agents in the VOLTTRON messagebus.
@@ -16,10 +102,12 @@ class MessageRouter:
     
     def __init__(self):
         """Initialize the message router."""
-        self.subscriptions: Dict[str, Set[str]] = {}  # topic -> set of subscriber ids
-        self.connections: Dict[str, WebSocket] = {}  # agent_id -> websocket
+        self.subscriptions: Dict[str, Set[str]] = {}  # topic prefix -> set of subscriber ids
+        self.prefixes = PrefixIndex()  # the keys of subscriptions, by segment
+        self.agent_topics: Dict[str, Set[str]] = {}  # agent_id -> set of subscribed topics
+        self.connections: Dict[str, "WebSocket"] = {}  # agent_id -> websocket
         
-    def register_agent(self, agent_id: str, websocket: WebSocket):
+    def register_agent(self, agent_id: str, websocket: "WebSocket"):
         """
         Register an agent connection with the router.
         
@@ -40,12 +128,9 @@ class MessageRouter:
         if agent_id in self.connections:
             del self.connections[agent_id]
             
-        # Remove from subscriptions
-        for topic, subscribers in list(self.subscriptions.items()):
-            if agent_id in subscribers:
-                subscribers.remove(agent_id)
-                if not subscribers:
-                    del self.subscriptions[topic]
+        # Remove from subscriptions using the per-agent index
+        for topic in self.agent_topics.pop(agent_id, set()):
+            self._discard_subscriber(topic, agent_id)
                     
         _log.info(f"Unregistered agent {agent_id} from router")
         
@@ -58,11 +143,125 @@ class MessageRouter:
             agent_id: The ID of the subscribing agent
         """
         if topic not in self.subscriptions:
+            # Index first, so a topic the index refuses leaves no subscription behind
+            self.prefixes.add(topic)
             self.subscriptions[topic] = set()
         self.subscriptions[topic].add(agent_id)
+        self.agent_topics.setdefault(agent_id, set()).add(topic)
         _log.info(f"Agent {agent_id} subscribed to topic {topic}")
         
-    async def publish(self, topic: str, data: Any, sender_id: str):
+    def unsubscribe(self, topic: str, agent_id: str) -> bool:
+        """
+        Unsubscribe an agent from a topic.
+        
+        Args:
+            topic: The topic to unsubscribe from
+            agent_id: The ID of the unsubscribing agent
+            
+        Returns:
+            True if the agent was subscribed to the topic, False otherwise
+        """
+        topics = self.agent_topics.get(agent_id)
+        if not topics or topic not in topics:
+            return False
+            
+        topics.remove(topic)
+        if not topics:
+            del self.agent_topics[agent_id]
+        self._discard_subscriber(topic, agent_id)
+        _log.info(f"Agent {agent_id} unsubscribed from topic {topic}")
+        return True
+        
+    def subscribe_many(self, topics: List[str], agent_id: str):
+        """
+        Subscribe an agent to several topics in one step.
+        
+        Args:
+            topics: The topics to subscribe to
+            agent_id: The ID of the subscribing agent
+        """
+        agent_topics = self.agent_topics.setdefault(agent_id, set())
+        for topic in topics:
+            if topic not in self.subscriptions:
+                # Index first, so a topic the index refuses leaves no subscription behind
+                self.prefixes.add(topic)
+                self.subscriptions[topic] = set()
+            self.subscriptions[topic].add(agent_id)
+            agent_topics.add(topic)
+        _log.info(f"Agent {agent_id} subscribed to {len(topics)} topics")
+        
+    def unsubscribe_many(self, topics: List[str], agent_id: str) -> List[str]:
+        """
+        Unsubscribe an agent from several topics in one step.
+        
+        Args:
+            topics: The topics to unsubscribe from
+            agent_id: The ID of the unsubscribing agent
+            
+        Returns:
+            The topics the agent was actually subscribed to and has been removed from
+        """
+        agent_topics = self.agent_topics.get(agent_id)
+        if not agent_topics:
+            return []
+            
+        removed = []
+        for topic in topics:
+            if topic in agent_topics:
+                agent_topics.remove(topic)
+                self._discard_subscriber(topic, agent_id)
+                removed.append(topic)
+        if not agent_topics:
+            del self.agent_topics[agent_id]
+        _log.info(f"Agent {agent_id} unsubscribed from {len(removed)} topics")
+        return removed
+        
+    def get_subscriptions(self, agent_id: str) -> Set[str]:
+        """
+        Get the topics an agent is subscribed to.
+        
+        Args:
+            agent_id: The ID of the agent
+            
+        Returns:
+            A copy of the set of topics the agent is subscribed to
+        """
+        return set(self.agent_topics.get(agent_id, ()))
+        
+    def _discard_subscriber(self, topic: str, agent_id: str):
+        """Remove an agent from a topic's subscriber set, dropping empty topics."""
+        subscribers = self.subscriptions.get(topic)
+        if subscribers is None:
+            return
+        subscribers.discard(agent_id)
+        if not subscribers:
+            del self.subscriptions[topic]
+            self.prefixes.remove(topic)
+        
+    def match(self, topic: str) -> Set[str]:
+        """
+        Find the agents subscribed to a topic.
+        
+        An agent matches if it subscribed to any prefix of the topic, so a
+        subscription to "devices/" receives publishes on "devices/a/b".
+        
+        Args:
+            topic: The topic of a publish
+            
+        Returns:
+            The IDs of the subscribed agents, a copy that is safe to iterate
+            while agents subscribe and unsubscribe
+        """
+        prefixes = self.prefixes.match(topic)
+        if len(prefixes) == 1:
+            return set(self.subscriptions[prefixes[0]])
+        subscribers = set()
+        for prefix in prefixes:
+            subscribers.update(self.subscriptions[prefix])
+        return subscribers
+        
+    async def publish(self, topic: str, data: Any, sender_id: str, priority: int = PRIORITY_NORMAL,
+                      exclude: Collection[str] = ()):
         """
         Publish a message to a topic.
         
@@ -70,28 +269,79 @@ class MessageRouter:
             topic: The topic to publish to
             data: The data to publish
             sender_id: The ID of the sending agent
+            priority: The priority lane used when sending to subscribers
+            exclude: IDs of agents that already received the message
         """
-        subscribers = self.subscriptions.get(topic, set())
+        subscribers = self.match(topic)
         
-        # Create the message envelope
-        envelope = {
+        # Create the message envelope, encoded once for all subscribers
+        envelope = json.dumps({
             "type": "message",
             "topic": topic,
             "sender": sender_id,
             "data": data
-        }
+        }, separators=(",", ":"), ensure_ascii=False)
         
         # Send to all subscribers except the sender
         for subscriber_id in subscribers:
-            if subscriber_id != sender_id and subscriber_id in self.connections:
+            if subscriber_id != sender_id and subscriber_id not in exclude \
+                    and subscriber_id in self.connections:
                 try:
-                    await self.connections[subscriber_id].send_json(envelope)
+                    await self.connections[subscriber_id].deliver(topic, envelope, priority)
                     _log.debug(f"Sent message from {sender_id} to {subscriber_id} on topic {topic}")
                 except Exception as e:
                     _log.error(f"Failed to send message to {subscriber_id}: {e}")
                     
         _log.info(f"Published message from {sender_id} to {len(subscribers)} subscribers on topic {topic}")
         
+    async def publish_payload(self, topic: str, payload, sender_id: str,
+                              priority: int = PRIORITY_NORMAL,
+                              content_type: str = CONTENT_TYPE_JSON, exclude: Collection[str] = ()):
+        """
+        Publish an opaque payload to a topic without decoding it.
+        
+        Subscribers that negotiated binary framing receive a payload frame;
+        the others receive a JSON text frame with the payload spliced in.
+        Each encoding is built at most once.
+        
+        Args:
+            topic: The topic to publish to
+            payload: The payload bytes, typically a view into the received frame
+            sender_id: The ID of the sending agent
+            priority: The priority lane used when sending to subscribers
+            content_type: The content type of the payload
+            exclude: IDs of agents that already received the message
+        """
+        subscribers = self.match(topic)
+        header = {
+            "type": "message",
+            "topic": topic,
+            "sender": sender_id
+        }
+        binary = text = None
+        
+        for subscriber_id in subscribers:
+            if subscriber_id == sender_id or subscriber_id in exclude \
+                    or subscriber_id not in self.connections:
+                continue
+            connection = self.connections[subscriber_id]
+            try:
+                if getattr(connection, "framing", None) == FRAMING_BINARY:
+                    if binary is None:
+                        frame_header = header if content_type == CONTENT_TYPE_JSON \
+                            else dict(header, content_type=content_type)
+                        binary = build_frame(frame_header, payload)
+                    await connection.deliver(topic, binary, priority)
+                else:
+                    if text is None:
+                        text = payload_to_text(header, payload, content_type)
+                    await connection.deliver(topic, text, priority)
+                _log.debug(f"Sent payload from {sender_id} to {subscriber_id} on topic {topic}")
+            except Exception as e:
+                _log.error(f"Failed to send message to {subscriber_id}: {e}")
+                
+        _log.info(f"Published payload from {sender_id} to {len(subscribers)} subscribers on topic {topic}")
+        
     async def route_rpc(self, target_agent: str, method: str, params: Any, 
                  req_id: str, sender_id: str) -> bool:
         """
@@ -124,7 +374,7 @@ class MessageRouter:
         
         try:
             # Send the RPC request to the target agent
-            await self.connections[target_agent].send_json(message)
+            await self.connections[target_agent].send_json(message, PRIORITY_HIGH)
             _log.debug(f"Routed RPC call from {sender_id} to {target_agent}.{method}")
             return True
         except Exception as e:
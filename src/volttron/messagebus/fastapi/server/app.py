@@ -3,7 +3,11 @@ FastAPI application for VOLTTRON messagebus.
 """
 import logging
 from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI
+from ..core.ratelimit import rate_limiter
+from ..priority import priority_rules
+from ..router.aggregation import aggregator
 from ..websocket.connection import router as websocket_router
 
 _log = logging.getLogger(__name__)
@@ -21,9 +25,25 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown logic
     _log.info("VOLTTRON FastAPI MessageBus shutting down")
+    aggregator.close()
 
-def create_app() -> FastAPI:
-    """Create and configure the FastAPI application."""
+def create_app(rate_limits: Optional[dict] = None, priorities: Optional[dict] = None,
+               aggregation: Optional[dict] = None) -> FastAPI:
+    """
+    Create and configure the FastAPI application.
+    
+    Args:
+        rate_limits: Optional publish rate limit configuration, see RateLimiter.configure
+        priorities: Optional message priority rules, see PriorityRules.configure
+        aggregation: Optional publish aggregation rules, see PublishAggregator.configure
+    """
+    if rate_limits is not None:
+        rate_limiter.configure(rate_limits)
+    if priorities is not None:
+        priority_rules.configure(priorities)
+    if aggregation is not None:
+        aggregator.configure(aggregation)
+        
     app = FastAPI(
         title="VOLTTRON FastAPI MessageBus",
         description="WebSocket-based implementation of VOLTTRON messagebus",
@@ -39,4 +59,9 @@ def create_app() -> FastAPI:
         """Basic health check endpoint."""
         return {"status": "online", "service": "volttron-messagebus"}
     
+    @app.get("/stats/rate_limits")
+    async def rate_limit_stats():
+        """Report the configured publish rate limits and per-agent counters."""
+        return rate_limiter.stats()
+    
     return app
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+Per-connection payload compression for the VOLTTRON FastAPI messagebus.
+
+Agents negotiate compression when they connect by adding query parameters
+to the WebSocket URL, e.g. ``/messagebus/v1/{agent_id}?compression=zlib&threshold=512``.
+Outbound frames whose encoded JSON is at least ``threshold`` bytes are
+compressed and sent as binary frames; smaller frames stay as plain text.
+Each binary frame is compressed independently so it can be decoded on its
+own, which makes a shared preset dictionary important for the small,
+repetitive payloads devices publish.
+"""
+import logging
+import zlib
+from typing import Dict, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 1024
+
+# Named preset dictionaries shared between the broker and agents
+dictionaries: Dict[str, bytes] = {}
+
+def register_dictionary(name: str, data: bytes):
+    """
+    Register a named preset dictionary for compression.
+
+    Args:
+        name: The name agents use to request the dictionary
+        data: The dictionary contents, typically sample device payloads
+    """
+    dictionaries[name] = bytes(data)
+    _log.info(f"Registered compression dictionary {name} ({len(data)} bytes)")
+
+def available_methods() -> list:
+    """Return the compression methods supported in this environment."""
+    methods = ["zlib"]
+    if zstandard is not None:
+        methods.append("zstd")
+    return methods
+
+class FrameCompressor:
+    """
+    Compresses outbound frames for a single connection.
+    """
+
+    def __init__(self, method: str = "zlib", threshold: int = DEFAULT_THRESHOLD,
+                 level: Optional[int] = None, dictionary: Optional[str] = None):
+        """
+        Initialize the compressor.
+
+        Args:
+            method: The compression method, one of available_methods()
+            threshold: Minimum encoded frame size in bytes worth compressing
+            level: Compression level, or None for the method's default
+            dictionary: Name of a registered preset dictionary to use
+
+        Raises:
+            ValueError: If the method or dictionary is not available
+        """
+        if method not in available_methods():
+            raise ValueError(f"Unsupported compression method: {method}")
+        if dictionary is not None and dictionary not in dictionaries:
+            raise ValueError(f"Unknown compression dictionary: {dictionary}")
+
+        self.method = method
+        self.threshold = max(0, threshold)
+        self.level = level
+        self.dictionary = dictionary
+        self._zdict = dictionaries.get(dictionary) if dictionary else None
+
+        if method == "zstd":
+            dict_data = zstandard.ZstdCompressionDict(self._zdict) if self._zdict else None
+            self._zstd = zstandard.ZstdCompressor(level=level if level is not None else 3,
+                                                  dict_data=dict_data)
+
+    @classmethod
+    def from_params(cls, params) -> Optional["FrameCompressor"]:
+        """
+        Build a compressor from WebSocket query parameters.
+
+        Args:
+            params: Mapping of query parameters from the connection request
+
+        Returns:
+            A compressor, or None if compression was not requested
+
+        Raises:
+            ValueError: If the requested settings are invalid
+        """
+        method = params.get("compression")
+        if not method or method == "none":
+            return None
+        try:
+            threshold = int(params.get("threshold", DEFAULT_THRESHOLD))
+            level = int(params["level"]) if "level" in params else None
+        except ValueError:
+            raise ValueError("Compression threshold and level must be integers")
+        return cls(method, threshold=threshold, level=level, dictionary=params.get("dictionary"))
+
+    def describe(self) -> dict:
+        """Return the negotiated settings to report back to the agent."""
+        return {
+            "method": self.method,
+            "threshold": self.threshold,
+            "dictionary": self.dictionary
+        }
+
+    def should_compress(self, payload: bytes) -> bool:
+        """Check whether an encoded frame is large enough to compress."""
+        return len(payload) >= self.threshold
+
+    def compress(self, payload: bytes) -> bytes:
+        """Compress a single encoded frame."""
+        if self.method == "zstd":
+            return self._zstd.compress(payload)
+
+        level = self.level if self.level is not None else zlib.Z_DEFAULT_COMPRESSION
+        if self._zdict:
+            compressor = zlib.compressobj(level, zdict=self._zdict)
+        else:
+            compressor = zlib.compressobj(level)
+        return compressor.compress(payload) + compressor.flush()
+
+class FrameDecompressor:
+    """
+    Decompresses binary frames received from the broker.
+
+    Agents create one with the settings reported in the connection_established
+    message and the same preset dictionary contents the broker uses.
+    """
+
+    def __init__(self, method: str = "zlib", dictionary: Optional[bytes] = None):
+        """
+        Initialize the decompressor.
+
+        Args:
+            method: The negotiated compression method
+            dictionary: The preset dictionary contents, if one was negotiated
+        """
+        if method not in available_methods():
+            raise ValueError(f"Unsupported compression method: {method}")
+        self.method = method
+        self._zdict = dictionary
+
+        if method == "zstd":
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            self._zstd = zstandard.ZstdDecompressor(dict_data=dict_data)
+
+    def decompress(self, frame: bytes) -> bytes:
+        """Decompress a single binary frame."""
+        if self.method == "zstd":
+            return self._zstd.decompress(frame)
+        if self._zdict:
+            return zlib.decompressobj(zdict=self._zdict).decompress(frame)
+        return zlib.decompress(frame)
@@ -1,13 +1,22 @@
 """
 WebSocket connection handler for VOLTTRON messagebus.
 """
+import asyncio
+import functools
+import itertools
 import json
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from fastapi import APIRouter, HTTPException, Response, WebSocket, WebSocketDisconnect, status
 
 from ..core.loop import CoreLoop
+from ..priority import PRIORITY_HIGH
+from .compression import FrameCompressor, dictionaries
+from .flow_control import CreditFlowControl
+from .framing import FRAMING_JSON, FRAMINGS, peek_message_type, split_frame
+from .multiplex import IDENTITY_FIELD, IdentityWriter
+from .writer import BatchSettings, FrameWriter
 
 _log = logging.getLogger(__name__)
 
@@ -17,11 +26,25 @@ router = APIRouter()
 connected_clients: Dict[str, WebSocket] = {}
 core_loops: Dict[str, CoreLoop] = {}
 
+# Maximum number of received frames waiting to be processed per connection
+INBOUND_QUEUE_SIZE = 1000
+
 @router.websocket("/messagebus/v1/{agent_id}")
 async def websocket_endpoint(websocket: WebSocket, agent_id: str):
     """
     WebSocket endpoint for VOLTTRON agents to connect to the messagebus.
     
+    Compression can be negotiated per connection with the query parameters
+    ``compression`` (zlib or zstd), ``threshold``, ``level`` and ``dictionary``.
+    Outbound micro-batching is enabled with ``batch_delay_us`` and optionally
+    ``batch_bytes``; batched frames arrive as a JSON array of messages.
+    Agents that can read binary payload frames request them with
+    ``framing=binary``; see the framing module for the format.
+    Subscribers that must not lose held deliveries under flow control
+    request ``backlog=fifo``, optionally with ``max_backlog``; the default
+    keeps only the latest held delivery per topic.
+    The negotiated settings are reported in the welcome message.
+    
     Args:
         websocket: The WebSocket connection
         agent_id: The ID of the connecting agent
@@ -36,13 +59,23 @@ async def websocket_endpoint(websocket: WebSocket, agent_id: str):
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
             
+        # Negotiate compression and batching before accepting
+        try:
+            compressor, batching, framing, flow_control = _negotiate(websocket.query_params)
+        except ValueError as e:
+            _log.warning(f"Rejecting connection from agent {agent_id}: {e}")
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+            
         # Accept the connection
         _log.debug(f"Accepting WebSocket connection for {agent_id}")
         await websocket.accept()
         _log.info(f"WebSocket connection accepted for {agent_id}")
         
         # Create a core loop for this connection
-        core_loop = CoreLoop(agent_id, websocket)
+        writer = FrameWriter(websocket, compressor=compressor, batching=batching, framing=framing,
+                             flow_control=flow_control)
+        core_loop = CoreLoop(agent_id, writer)
         
         try:
             # Register the client connection
@@ -59,40 +92,35 @@ async def websocket_endpoint(websocket: WebSocket, agent_id: str):
             await websocket.send_json({
                 "type": "connection_established",
                 "agent_id": agent_id,
-                "server_id": "volttron.messagebus.fastapi"
+                "server_id": "volttron.messagebus.fastapi",
+                "compression": compressor.describe() if compressor else None,
+                "batching": batching.describe() if batching else None,
+                "framing": framing,
+                "flow_control": flow_control.describe()
             })
             _log.debug(f"Welcome message sent to {agent_id}")
             
-            # Handle incoming messages
-            while True:
-                _log.debug(f"Waiting for message from {agent_id}")
-                data = await websocket.receive_text()
-                _log.debug(f"Received raw message from {agent_id}: {data}")
-                
-                try:
-                    message = json.loads(data)
-                    _log.debug(f"Parsed message from {agent_id}: {message}")
-                    
-                    # Process message through the core loop
-                    response = await core_loop.handle_message(message)
-                    
-                    # Send response if needed
-                    if response:
-                        _log.debug(f"Sending response to {agent_id}: {response}")
-                        await websocket.send_json(response)
-                        _log.debug(f"Response sent to {agent_id}")
-                        
-                except json.JSONDecodeError:
-                    _log.error(f"Invalid JSON received from {agent_id}: {data}")
-                    await websocket.send_json({
-                        "type": "error",
-                        "error": "Invalid JSON message"
-                    })
+            # Frames are received and processed in separate tasks so that
+            # high priority frames can overtake queued bulk traffic
+            inbound = asyncio.PriorityQueue(maxsize=INBOUND_QUEUE_SIZE)
+            tasks = {
+                asyncio.create_task(_receive_frames(agent_id, websocket, writer, core_loop, inbound)),
+                asyncio.create_task(_process_frames(agent_id, inbound))
+            }
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in tasks:
+                    task.cancel()
+            for task in done:
+                task.result()
         except WebSocketDisconnect:
             _log.info(f"Agent {agent_id} disconnected")
         except Exception as e:
             _log.error(f"Error handling connection for {agent_id}: {e}")
             _log.exception(e)
+        finally:
+            writer.close()
     except Exception as e:
         _log.error(f"Failed to accept WebSocket connection from {agent_id}: {e}")
         _log.exception(e)
@@ -108,4 +136,353 @@ async def websocket_endpoint(websocket: WebSocket, agent_id: str):
         # Remove the client from connected clients
         if agent_id in connected_clients:
             del connected_clients[agent_id]
-            _log.info(f"Agent {agent_id} removed. Total connected: {len(connected_clients)}")
\ No newline at end of file
+            _log.info(f"Agent {agent_id} removed. Total connected: {len(connected_clients)}")
+
+async def _receive_frames(agent_id: str, websocket: WebSocket, writer: FrameWriter,
+                          core_loop: CoreLoop, inbound: asyncio.PriorityQueue):
+    """
+    Receive frames from an agent and queue them by priority.
+    
+    The queue is bounded, so a backlog of unprocessed frames stops the
+    connection from being read until the processor catches up. Frames of a
+    type with a raw handler are queued undecoded and prioritised on their
+    type alone. Binary payload frames are queued with only their header
+    decoded.
+    """
+    sequence = itertools.count()
+    while True:
+        _log.debug(f"Waiting for message from {agent_id}")
+        frame = await websocket.receive()
+        if frame["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(frame.get("code", status.WS_1000_NORMAL_CLOSURE))
+            
+        data = frame.get("text")
+        if data is None:
+            try:
+                header, payload = split_frame(frame["bytes"])
+            except ValueError as e:
+                _log.error(f"Invalid binary frame received from {agent_id}: {e}")
+                await writer.send_json({
+                    "type": "error",
+                    "error": f"Invalid binary frame: {e}"
+                })
+                continue
+            priority = core_loop.priority_rules.classify(header)
+            await inbound.put((priority, next(sequence), header.get("type", ""), (header, payload), core_loop))
+            continue
+            
+        _log.debug(f"Received raw message from {agent_id}: {data}")
+        
+        message_type = peek_message_type(data)
+        if message_type is not None and core_loop.is_raw_type(message_type):
+            priority = core_loop.priority_rules.classify({"type": message_type})
+            await inbound.put((priority, next(sequence), message_type, data, core_loop))
+            continue
+            
+        try:
+            message = json.loads(data)
+        except json.JSONDecodeError:
+            _log.error(f"Invalid JSON received from {agent_id}: {data}")
+            await writer.send_json({
+                "type": "error",
+                "error": "Invalid JSON message"
+            })
+            continue
+            
+        _log.debug(f"Parsed message from {agent_id}: {message}")
+        priority = core_loop.priority_rules.classify(message)
+        await inbound.put((priority, next(sequence), message.get("type", ""), message, core_loop))
+
+async def _process_frames(name: str, inbound: asyncio.PriorityQueue):
+    """
+    Process queued frames, highest priority first, and send any responses.
+    
+    Each frame is queued with the core loop of the agent that sent it. A
+    frame whose handler fails is answered with an error, so one bad frame
+    cannot stop the frames queued behind it from being processed.
+    """
+    while True:
+        priority, _, message_type, message, core_loop = await inbound.get()
+        
+        # Process message through the core loop
+        try:
+            if isinstance(message, str):
+                response = await core_loop.handle_raw(message_type, message)
+            elif isinstance(message, tuple):
+                response = await core_loop.handle_frame(*message)
+            else:
+                response = await core_loop.handle_message(message)
+        except Exception as e:
+            _log.exception(f"Error processing {message_type} frame from {core_loop.agent_id} on {name}: {e}")
+            header = message[0] if isinstance(message, tuple) else message
+            response = {
+                "type": "error",
+                "id": header.get("id") if isinstance(header, dict) else None,
+                "error": f"Error processing {message_type} message: {e}"
+            }
+        
+        # Send response if needed, in the same lane as the request
+        if response:
+            _log.debug(f"Sending response to {core_loop.agent_id} on {name}: {response}")
+            await core_loop.websocket.send_json(response, priority)
+            _log.debug(f"Response sent to {core_loop.agent_id}")
+
+@router.websocket("/messagebus/v1/mux/{connection_id}")
+async def multiplexed_endpoint(websocket: WebSocket, connection_id: str):
+    """
+    WebSocket endpoint carrying the traffic of many agents over one connection.
+    
+    Processes hosting many agents connect here once instead of once per
+    agent. The identities listed in the ``identities`` query parameter
+    (comma separated), and those added later with ``register`` frames, form
+    the connection's authorized set; ``unregister`` frames remove them.
+    Every other frame names the agent it is from in an ``identity`` field
+    and is rejected unless that identity is in the set. Frames sent to the
+    agents carry the identity they are for in the same field. An identity
+    already connected elsewhere is refused.
+    
+    Compression, batching and framing are negotiated as for single agent
+    connections and shared by all the identities. Flow control settings are
+    negotiated the same way, but each identity grants and spends its own
+    credit. Each identity's frames are queued and processed separately, so
+    a publish delayed by a rate limit only holds up its own identity. The
+    welcome message lists the identities registered and those refused.
+    
+    Args:
+        websocket: The WebSocket connection
+        connection_id: The ID of the connection, used in logs
+    """
+    _log.info(f"Multiplexed WebSocket connection attempt {connection_id}")
+    
+    try:
+        compressor, batching, framing, flow_control = _negotiate(websocket.query_params)
+    except ValueError as e:
+        _log.warning(f"Rejecting multiplexed connection {connection_id}: {e}")
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+        
+    await websocket.accept()
+    writer = FrameWriter(websocket, compressor=compressor, batching=batching, framing=framing,
+                         flow_control=flow_control)
+    # identity -> core loop, for the identities registered on this connection
+    loops: Dict[str, CoreLoop] = {}
+    # identity -> inbound queue and the task processing it
+    processors: Dict[str, Tuple[asyncio.PriorityQueue, asyncio.Task]] = {}
+    
+    try:
+        rejected = {}
+        for identity in _split_identities(websocket.query_params.get("identities", "")):
+            error = await _register_identity(identity, websocket, writer, loops, processors)
+            if error:
+                rejected[identity] = error
+                
+        _log.info(f"Connection {connection_id} multiplexes {len(loops)} agents. "
+                  f"Total connected: {len(connected_clients)}")
+        await websocket.send_json({
+            "type": "connection_established",
+            "connection_id": connection_id,
+            "server_id": "volttron.messagebus.fastapi",
+            "multiplexed": True,
+            "identities": list(loops),
+            "rejected": rejected,
+            "compression": compressor.describe() if compressor else None,
+            "batching": batching.describe() if batching else None,
+            "framing": framing,
+            "flow_control": flow_control.describe()
+        })
+        
+        await _receive_multiplexed(connection_id, websocket, writer, loops, processors)
+    except WebSocketDisconnect:
+        _log.info(f"Multiplexed connection {connection_id} disconnected")
+    except Exception as e:
+        _log.error(f"Error handling multiplexed connection {connection_id}: {e}")
+        _log.exception(e)
+    finally:
+        writer.close()
+        for identity in list(loops):
+            await _unregister_identity(identity, loops, processors)
+        _log.info(f"Multiplexed connection {connection_id} closed. Total connected: {len(connected_clients)}")
+
+async def _receive_multiplexed(connection_id: str, websocket: WebSocket, writer: FrameWriter,
+                               loops: Dict[str, CoreLoop],
+                               processors: Dict[str, Tuple[asyncio.PriorityQueue, asyncio.Task]]):
+    """
+    Receive frames from a multiplexed connection and queue them by identity and priority.
+    
+    Every frame is decoded, or has its header decoded, to read its identity,
+    so the raw handler fast path is not taken; raw handlers still receive the
+    frame text, re-encoded without the identity field. Registration frames
+    are handled here, before any later frame of the identity is queued.
+    """
+    sequence = itertools.count()
+    while True:
+        frame = await websocket.receive()
+        if frame["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(frame.get("code", status.WS_1000_NORMAL_CLOSURE))
+            
+        data = frame.get("text")
+        if data is None:
+            try:
+                header, payload = split_frame(frame["bytes"])
+            except ValueError as e:
+                _log.error(f"Invalid binary frame received on {connection_id}: {e}")
+                await writer.send_json({
+                    "type": "error",
+                    "error": f"Invalid binary frame: {e}"
+                })
+                continue
+            message, item = header, (header, payload)
+        else:
+            try:
+                message = json.loads(data)
+            except json.JSONDecodeError:
+                _log.error(f"Invalid JSON received on {connection_id}: {data}")
+                await writer.send_json({
+                    "type": "error",
+                    "error": "Invalid JSON message"
+                })
+                continue
+            if not isinstance(message, dict):
+                await writer.send_json({
+                    "type": "error",
+                    "error": "Messages must be JSON objects"
+                })
+                continue
+            item = message
+            
+        identity = message.pop(IDENTITY_FIELD, None)
+        message_type = message.get("type", "")
+        if message_type in ("register", "unregister"):
+            response = await _handle_registration(message, identity, websocket, writer, loops, processors)
+            await writer.send_json(response, PRIORITY_HIGH)
+            continue
+            
+        core_loop = loops.get(identity)
+        if core_loop is None:
+            _log.warning(f"Rejecting frame for unregistered identity {identity} on {connection_id}")
+            await writer.send_json({
+                "type": "error",
+                "id": message.get("id"),
+                "error": f"Identity {identity} is not registered on this connection"
+            })
+            continue
+            
+        priority = core_loop.priority_rules.classify(message)
+        inbound, _ = processors[identity]
+        await inbound.put((priority, next(sequence), message_type, item, core_loop))
+
+async def _handle_registration(message: dict, identity: Optional[str], websocket: WebSocket,
+                               writer: FrameWriter, loops: Dict[str, CoreLoop],
+                               processors: Dict[str, Tuple[asyncio.PriorityQueue, asyncio.Task]]) -> dict:
+    """Add an identity to, or remove it from, a multiplexed connection."""
+    message_type = message["type"]
+    if message_type == "register":
+        error = await _register_identity(identity, websocket, writer, loops, processors)
+    elif identity in loops:
+        await _unregister_identity(identity, loops, processors)
+        error = None
+    else:
+        error = f"Identity {identity} is not registered on this connection"
+        
+    if error:
+        return {
+            "type": "error",
+            "id": message.get("id"),
+            "error": error
+        }
+    return {
+        "type": f"{message_type}_confirm",
+        "id": message.get("id"),
+        "identity": identity
+    }
+
+async def _register_identity(identity: Optional[str], websocket: WebSocket, writer: FrameWriter,
+                             loops: Dict[str, CoreLoop],
+                             processors: Dict[str, Tuple[asyncio.PriorityQueue, asyncio.Task]]) -> Optional[str]:
+    """
+    Start a core loop, and the task processing its frames, for an identity on a multiplexed connection.
+    
+    Returns:
+        None on success, otherwise the reason the identity was refused
+    """
+    if not isinstance(identity, str) or not identity:
+        return "Identity must be a non-empty string"
+    if identity in connected_clients:
+        _log.warning(f"Rejecting duplicate registration of identity {identity}")
+        return f"Identity {identity} is already connected"
+        
+    core_loop = CoreLoop(identity, IdentityWriter(writer, identity))
+    connected_clients[identity] = websocket
+    core_loops[identity] = core_loop
+    loops[identity] = core_loop
+    await core_loop.start()
+    inbound = asyncio.PriorityQueue(maxsize=INBOUND_QUEUE_SIZE)
+    processor = asyncio.create_task(_process_frames(identity, inbound), name=identity)
+    processor.add_done_callback(functools.partial(_processor_done, identity, loops, processors))
+    processors[identity] = (inbound, processor)
+    return None
+
+def _processor_done(identity: str, loops: Dict[str, CoreLoop],
+                    processors: Dict[str, Tuple[asyncio.PriorityQueue, asyncio.Task]], processor: asyncio.Task):
+    """Unregister an identity whose frame processor stopped on an error."""
+    if processor.cancelled() or processors.get(identity, (None, None))[1] is not processor:
+        return
+    _log.error(f"Frame processing for {identity} failed, unregistering it: {processor.exception()}")
+    asyncio.ensure_future(_unregister_identity(identity, loops, processors))
+
+async def _unregister_identity(identity: str, loops: Dict[str, CoreLoop],
+                               processors: Dict[str, Tuple[asyncio.PriorityQueue, asyncio.Task]]):
+    """Stop the core loop of an identity on a multiplexed connection, dropping its unprocessed frames."""
+    if identity not in loops:
+        return
+    inbound, processor = processors.pop(identity)
+    processor.cancel()
+    # Emptying the queue releases a receiver waiting for room in it
+    while not inbound.empty():
+        inbound.get_nowait()
+    core_loop = loops.pop(identity)
+    try:
+        await core_loop.stop()
+    except Exception as e:
+        _log.error(f"Error stopping core loop for {identity}: {e}")
+    if core_loops.get(identity) is core_loop:
+        del core_loops[identity]
+        connected_clients.pop(identity, None)
+
+def _split_identities(value: str) -> List[str]:
+    """Split a comma separated list of identities, ignoring empty entries."""
+    return [identity.strip() for identity in value.split(",") if identity.strip()]
+
+def _negotiate(params) -> Tuple[Optional[FrameCompressor], Optional[BatchSettings], str, CreditFlowControl]:
+    """
+    Read the connection settings requested in the query parameters.
+    
+    Args:
+        params: Mapping of query parameters from the connection request
+        
+    Returns:
+        A tuple of (compressor, batch settings, framing, flow control)
+        
+    Raises:
+        ValueError: If the requested settings are invalid
+    """
+    compressor = FrameCompressor.from_params(params)
+    batching = BatchSettings.from_params(params)
+    framing = params.get("framing", FRAMING_JSON)
+    if framing not in FRAMINGS:
+        raise ValueError(f"Unsupported framing: {framing}")
+    return compressor, batching, framing, CreditFlowControl.from_params(params)
+
+@router.get("/messagebus/v1/dictionaries/{name}")
+async def get_dictionary(name: str):
+    """
+    Download a registered compression dictionary.
+    
+    Agents fetch the dictionary they negotiate so they can decompress frames.
+    
+    Args:
+        name: The name of the dictionary
+    """
+    if name not in dictionaries:
+        raise HTTPException(status_code=404, detail=f"Unknown compression dictionary: {name}")
+    return Response(content=dictionaries[name], media_type="application/octet-stream")
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+Credit-based flow control for pubsub deliveries.
+
+A subscriber enables flow control by sending a ``credit`` frame granting a
+number of messages and/or bytes. From then on every pubsub delivery to that
+connection consumes credit. When credit runs out, deliveries are held in a
+bounded backlog. By default a newer message on a topic replaces the one
+already waiting, so a slow subscriber sees the latest value per topic rather
+than an ever-growing queue. Subscribers that need every message, such as
+historians, can instead negotiate a FIFO backlog that keeps every held
+delivery in order until it is full.
+"""
+import itertools
+import logging
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Union
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_MAX_BACKLOG = 10000
+
+BACKLOG_COALESCE = "coalesce"
+BACKLOG_FIFO = "fifo"
+BACKLOG_MODES = (BACKLOG_COALESCE, BACKLOG_FIFO)
+
+class CreditFlowControl:
+    """
+    Tracks delivery credits and the held backlog for a single connection.
+
+    Sizes are measured on the encoded frame of each delivery.
+    """
+
+    def __init__(self, max_backlog: int = DEFAULT_MAX_BACKLOG, mode: str = BACKLOG_COALESCE):
+        """
+        Initialize flow control in the disabled state.
+
+        Args:
+            max_backlog: Maximum number of deliveries held while out of credit
+            mode: BACKLOG_COALESCE to hold only the latest delivery per topic,
+                or BACKLOG_FIFO to hold every delivery in order
+        """
+        if mode not in BACKLOG_MODES:
+            raise ValueError(f"Unsupported backlog mode: {mode}")
+        if max_backlog <= 0:
+            raise ValueError("Backlog size must be a positive number of messages")
+        self.mode = mode
+        self.enabled = False
+        self.message_credits: Optional[int] = None  # None means unlimited
+        self.byte_credits: Optional[int] = None  # None means unlimited
+        self.max_backlog = max_backlog
+        self.coalesced = 0
+        self.dropped = 0
+        # topic, or sequence number in FIFO mode -> encoded delivery
+        self._backlog: "OrderedDict[Hashable, Union[str, bytes]]" = OrderedDict()
+        self._sequence = itertools.count()
+
+    @classmethod
+    def from_params(cls, params) -> "CreditFlowControl":
+        """
+        Build flow control from WebSocket query parameters.
+
+        The backlog is chosen with ``backlog`` (coalesce or fifo) and sized
+        with ``max_backlog``.
+
+        Args:
+            params: Mapping of query parameters from the connection request
+
+        Returns:
+            The flow control, disabled until the first credit grant
+
+        Raises:
+            ValueError: If the requested settings are invalid
+        """
+        try:
+            max_backlog = int(params.get("max_backlog", DEFAULT_MAX_BACKLOG))
+        except ValueError:
+            raise ValueError("Backlog size must be an integer")
+        return cls(max_backlog=max_backlog, mode=params.get("backlog", BACKLOG_COALESCE))
+
+    def describe(self) -> dict:
+        """Return the negotiated settings to report back to the agent."""
+        return {
+            "backlog": self.mode,
+            "max_backlog": self.max_backlog
+        }
+
+    @property
+    def backlog_size(self) -> int:
+        """Number of deliveries currently held."""
+        return len(self._backlog)
+
+    def grant(self, messages: Optional[int] = None, nbytes: Optional[int] = None):
+        """
+        Add credit granted by the subscriber.
+
+        Args:
+            messages: Number of additional messages the subscriber can absorb
+            nbytes: Number of additional bytes the subscriber can absorb
+        """
+        self.enabled = True
+        if messages is not None:
+            self.message_credits = (self.message_credits or 0) + messages
+        if nbytes is not None:
+            self.byte_credits = (self.byte_credits or 0) + nbytes
+
+    def admit(self, topic: str, text: Union[str, bytes], urgent: bool = False) -> bool:
+        """
+        Decide whether a delivery can be sent now.
+
+        Deliveries that cannot be sent are held in the backlog. Urgent
+        deliveries are always sent and may overdraw the credit.
+
+        Args:
+            topic: The topic of the delivery
+            text: The encoded delivery
+            urgent: True to bypass the backlog
+
+        Returns:
+            True if the caller should send the delivery now
+        """
+        if not self.enabled:
+            return True
+        if urgent or (not self._backlog and self._has_credit()):
+            self._consume(len(text))
+            return True
+        self._hold(topic, text)
+        return False
+
+    def release(self) -> List[Union[str, bytes]]:
+        """
+        Take as many held deliveries as the current credit allows.
+
+        Returns:
+            The encoded deliveries to send, oldest first
+        """
+        released = []
+        while self._backlog and self._has_credit():
+            _, text = self._backlog.popitem(last=False)
+            self._consume(len(text))
+            released.append(text)
+        return released
+
+    def stats(self) -> dict:
+        """Return the flow control counters."""
+        return {
+            "enabled": self.enabled,
+            "mode": self.mode,
+            "message_credits": self.message_credits,
+            "byte_credits": self.byte_credits,
+            "backlog": len(self._backlog),
+            "coalesced": self.coalesced,
+            "dropped": self.dropped
+        }
+
+    def _has_credit(self) -> bool:
+        """Check whether at least one more delivery may be sent."""
+        if self.message_credits is not None and self.message_credits <= 0:
+            return False
+        # A single delivery may overdraw the byte credit so large messages cannot stall forever
+        if self.byte_credits is not None and self.byte_credits <= 0:
+            return False
+        return True
+
+    def _consume(self, size: int):
+        """Charge one delivery of the given size against the credit."""
+        if self.message_credits is not None:
+            self.message_credits -= 1
+        if self.byte_credits is not None:
+            self.byte_credits -= size
+
+    def _hold(self, topic: str, text: Union[str, bytes]):
+        """
+        Hold a delivery.
+
+        In coalesce mode an older delivery on the same topic is replaced. When
+        the backlog is full the oldest held delivery is dropped.
+        """
+        if self.mode == BACKLOG_COALESCE:
+            key = topic
+            if key in self._backlog:
+                self._backlog[key] = text
+                self.coalesced += 1
+                return
+        else:
+            key = next(self._sequence)
+        if len(self._backlog) >= self.max_backlog:
+            self._backlog.popitem(last=False)
+            self.dropped += 1
+            _log.warning("Flow control backlog full, dropped the oldest held message")
+        self._backlog[key] = text
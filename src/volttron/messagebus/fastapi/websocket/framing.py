@@ -0,0 +1,181 @@
+"""
+Frame formats and helpers for inspecting inbound frames cheaply.
+
+Besides plain JSON text frames, agents can publish with binary payload
+frames, which keep the routing metadata apart from the payload::
+
+    +----------------------+---------------------+------------------+
+    | header length (4 B,  | JSON header         | payload bytes    |
+    | big-endian)          | {"type", "topic"..} | (opaque)         |
+    +----------------------+---------------------+------------------+
+
+The broker only decodes the small header; the payload is passed to
+subscribers as a slice of the received frame without being parsed or
+re-encoded. Headers are limited to 16 MiB so the first byte of a payload
+frame is always zero, which tells it apart from JSON text and from
+compressed frames.
+"""
+import base64
+import json
+import re
+import struct
+from typing import Any, Optional, Tuple
+
+# Matches frames that start with the "type" key, as every VOLTTRON client sends them
+_TYPE_PREFIX = re.compile(r'\s*\{\s*"type"\s*:\s*"([A-Za-z0-9_.\-]*)"')
+
+_HEADER_LENGTH = struct.Struct(">I")
+MAX_HEADER_SIZE = 0xFFFFFF
+
+CONTENT_TYPE_JSON = "application/json"
+
+FRAMING_JSON = "json"
+FRAMING_BINARY = "binary"
+FRAMINGS = (FRAMING_JSON, FRAMING_BINARY)
+
+def peek_message_type(data: str) -> Optional[str]:
+    """
+    Read the message type of a JSON frame without decoding the rest of it.
+
+    Only a leading ``"type"`` key is recognised, so the result can be
+    trusted without parsing the frame; frames with the type elsewhere
+    return None and must be decoded in full.
+
+    Args:
+        data: The raw JSON text of the frame
+
+    Returns:
+        The message type, or None if it could not be read cheaply
+    """
+    match = _TYPE_PREFIX.match(data)
+    return match.group(1) if match else None
+
+def build_frame(header: dict, payload) -> bytes:
+    """
+    Build a binary payload frame.
+
+    Args:
+        header: The routing metadata
+        payload: The payload bytes, or any bytes-like object
+
+    Returns:
+        The encoded frame
+    """
+    encoded = json.dumps(header, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(encoded) > MAX_HEADER_SIZE:
+        raise ValueError("Frame header is too large")
+    return b"".join((_HEADER_LENGTH.pack(len(encoded)), encoded, payload))
+
+def split_frame(frame: bytes) -> Tuple[dict, memoryview]:
+    """
+    Split a binary payload frame into its header and payload.
+
+    The payload is returned as a view into the frame, so no bytes are copied.
+
+    Args:
+        frame: The received frame
+
+    Returns:
+        A tuple of (header, payload)
+
+    Raises:
+        ValueError: If the frame is malformed
+    """
+    view = memoryview(frame)
+    if len(view) < _HEADER_LENGTH.size:
+        raise ValueError("Truncated frame header")
+    (size, ) = _HEADER_LENGTH.unpack_from(view)
+    end = _HEADER_LENGTH.size + size
+    if size > MAX_HEADER_SIZE or end > len(view):
+        raise ValueError("Invalid frame header length")
+    header = json.loads(bytes(view[_HEADER_LENGTH.size:end]))
+    if not isinstance(header, dict):
+        raise ValueError("Frame header must be a JSON object")
+    return header, view[end:]
+
+def payload_to_text(header: dict, payload, content_type: str = CONTENT_TYPE_JSON) -> str:
+    """
+    Encode a payload delivery as a JSON text frame.
+
+    JSON payloads are spliced in as the ``data`` field without being parsed.
+    Other payloads are base64 encoded, with ``encoding`` and ``content_type``
+    fields added so the receiver can restore them.
+
+    Args:
+        header: The fields of the delivery other than the payload
+        payload: The payload bytes
+        content_type: The content type of the payload
+
+    Returns:
+        The encoded JSON frame
+    """
+    if content_type == CONTENT_TYPE_JSON:
+        prefix = json.dumps(header, separators=(",", ":"), ensure_ascii=False)
+        return prefix[:-1] + ',"data":' + str(payload, "utf-8") + "}"
+    return json.dumps(dict(header,
+                           data=base64.b64encode(payload).decode("ascii"),
+                           encoding="base64",
+                           content_type=content_type),
+                      separators=(",", ":"), ensure_ascii=False)
+
+def encode_field(name: str, value: Any) -> str:
+    """
+    Encode a JSON object member for insert_field() and insert_header_field().
+
+    Args:
+        name: The name of the member
+        value: The JSON-serializable value of the member
+
+    Returns:
+        The encoded member, e.g. ``"identity":"agent1"``
+    """
+    return json.dumps(name) + ":" + json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+def insert_field(text: str, field: str) -> str:
+    """
+    Add an encoded member to a JSON object frame without decoding the frame.
+
+    Args:
+        text: The encoded JSON object
+        field: The member, encoded with encode_field()
+
+    Returns:
+        The JSON object with the member added first
+
+    Raises:
+        ValueError: If the frame is not a JSON object
+    """
+    body = text.lstrip()
+    if not body.startswith("{"):
+        raise ValueError("Frame is not a JSON object")
+    rest = body[1:]
+    separator = "" if rest.lstrip().startswith("}") else ","
+    return "{" + field + separator + rest
+
+def insert_header_field(frame: bytes, field: str) -> bytes:
+    """
+    Add an encoded member to the header of a binary payload frame.
+
+    Only the header is rebuilt; the payload is copied unchanged.
+
+    Args:
+        frame: The encoded payload frame
+        field: The member, encoded with encode_field()
+
+    Returns:
+        The frame with the member added to its header
+
+    Raises:
+        ValueError: If the frame is malformed
+    """
+    view = memoryview(frame)
+    if len(view) < _HEADER_LENGTH.size:
+        raise ValueError("Truncated frame header")
+    (size, ) = _HEADER_LENGTH.unpack_from(view)
+    end = _HEADER_LENGTH.size + size
+    if size > MAX_HEADER_SIZE or end > len(view):
+        raise ValueError("Invalid frame header length")
+    header = insert_field(str(view[_HEADER_LENGTH.size:end], "utf-8"), field).encode("utf-8")
+    if len(header) > MAX_HEADER_SIZE:
+        raise ValueError("Frame header is too large")
+    return b"".join((_HEADER_LENGTH.pack(len(header)), header, view[end:]))
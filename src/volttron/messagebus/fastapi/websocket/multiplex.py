@@ -0,0 +1,122 @@
+"""
+Per-identity writers for multiplexed connections.
+
+A multiplexed connection carries the traffic of many agent identities over
+one WebSocket. Each identity has its own core loop, which writes through an
+IdentityWriter. The writer adds an ``identity`` field to every frame so the
+client can hand it to the right agent, and otherwise passes the frame to the
+connection's shared FrameWriter, which batches and compresses the traffic of
+all the identities together. Each identity grants its own delivery credit,
+so deliveries held for one identity neither replace nor wait on another's.
+"""
+from typing import Any, Optional, Union
+
+from ..priority import PRIORITY_HIGH, PRIORITY_NORMAL
+from .flow_control import CreditFlowControl
+from .framing import encode_field, insert_field, insert_header_field
+from .writer import FrameWriter
+
+IDENTITY_FIELD = "identity"
+
+class IdentityWriter:
+    """
+    Outbound side of one identity on a multiplexed connection.
+
+    Has the interface of FrameWriter, so the router and core loop can send to
+    the identity as they would to an agent with a connection of its own.
+    Frames that are already encoded are stamped with the identity without
+    being decoded; binary payload frames only have their header rebuilt.
+    """
+
+    def __init__(self, writer: FrameWriter, identity: str, flow_control: Optional[CreditFlowControl] = None):
+        """
+        Initialize the writer.
+
+        Args:
+            writer: The writer of the multiplexed connection
+            identity: The identity whose frames this writer sends
+            flow_control: The identity's flow control, defaults to the
+                settings negotiated for the connection
+        """
+        self.writer = writer
+        self.identity = identity
+        self.flow_control = flow_control or CreditFlowControl(max_backlog=writer.flow_control.max_backlog,
+                                                              mode=writer.flow_control.mode)
+        self._field = encode_field(IDENTITY_FIELD, identity)
+
+    @property
+    def framing(self) -> str:
+        """The framing negotiated for the multiplexed connection."""
+        return self.writer.framing
+
+    async def send_json(self, message: Any, priority: int = PRIORITY_NORMAL):
+        """
+        Encode and send a message to the identity.
+
+        Args:
+            message: The JSON object to send
+            priority: The priority lane of the message
+        """
+        await self.writer.send_json(dict(message, **{IDENTITY_FIELD: self.identity}), priority)
+
+    async def send_text(self, text: str, priority: int = PRIORITY_NORMAL):
+        """
+        Send an already encoded JSON object to the identity.
+
+        Args:
+            text: The encoded JSON object
+            priority: The priority lane of the frame
+        """
+        await self.writer.send_text(insert_field(text, self._field), priority)
+
+    async def send_frame(self, frame: bytes, priority: int = PRIORITY_NORMAL):
+        """
+        Send a binary payload frame to the identity.
+
+        Args:
+            frame: The encoded payload frame
+            priority: The priority lane of the frame
+        """
+        await self.writer.send_frame(insert_header_field(frame, self._field), priority)
+
+    async def deliver(self, topic: str, frame: Union[str, bytes], priority: int = PRIORITY_NORMAL):
+        """
+        Send an encoded pubsub delivery to the identity, subject to flow control.
+
+        Args:
+            topic: The topic of the delivery
+            frame: The encoded delivery, JSON text or a binary payload frame
+            priority: The priority lane of the delivery
+        """
+        if isinstance(frame, str):
+            frame = insert_field(frame, self._field)
+        else:
+            frame = insert_header_field(frame, self._field)
+        if self.flow_control.admit(topic, frame, urgent=priority == PRIORITY_HIGH):
+            await self._send(frame, priority)
+
+    async def grant_credits(self, messages: Optional[int] = None, nbytes: Optional[int] = None):
+        """
+        Add delivery credit for the identity and send any held deliveries it covers.
+
+        Args:
+            messages: Number of additional messages the agent can absorb
+            nbytes: Number of additional bytes the agent can absorb
+        """
+        self.flow_control.grant(messages, nbytes)
+        for frame in self.flow_control.release():
+            await self._send(frame)
+
+    async def flush(self):
+        """Send the pending frames of the connection."""
+        await self.writer.flush()
+
+    def close(self):
+        """Do nothing; the shared writer is closed with the connection."""
+
+    async def _send(self, frame: Union[str, bytes], priority: int = PRIORITY_NORMAL):
+        """Send a delivery that is already stamped with the identity."""
+        if isinstance(frame, str):
+            await self.writer.send_text(frame, priority)
+        else:
+            await self.writer.send_frame(frame, priority)
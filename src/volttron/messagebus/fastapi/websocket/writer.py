@@ -0,0 +1,285 @@
+"""
+Outbound frame writer for agent WebSocket connections.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+from typing import Any, List, Optional, Tuple, Union
+
+from ..priority import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL
+from .compression import FrameCompressor
+from .flow_control import CreditFlowControl
+from .framing import FRAMING_JSON
+
+_log = logging.getLogger(__name__)
+
+class BatchSettings:
+    """
+    Micro-batching settings for a single connection.
+
+    Outbound frames are held for up to ``delay_us`` microseconds, or until
+    ``max_bytes`` of encoded JSON are pending, and then sent together as a
+    single JSON array frame.
+    """
+
+    def __init__(self, delay_us: int, max_bytes: int = 65536):
+        """
+        Initialize the batch settings.
+
+        Args:
+            delay_us: Maximum time in microseconds a frame waits before being flushed
+            max_bytes: Pending size in bytes that triggers an immediate flush
+        """
+        if delay_us <= 0:
+            raise ValueError("Batch delay must be a positive number of microseconds")
+        if max_bytes <= 0:
+            raise ValueError("Batch size must be a positive number of bytes")
+        self.delay_us = delay_us
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_params(cls, params) -> Optional["BatchSettings"]:
+        """
+        Build batch settings from WebSocket query parameters.
+
+        Args:
+            params: Mapping of query parameters from the connection request
+
+        Returns:
+            The batch settings, or None if batching was not requested
+
+        Raises:
+            ValueError: If the requested settings are invalid
+        """
+        if "batch_delay_us" not in params:
+            return None
+        try:
+            delay_us = int(params["batch_delay_us"])
+            max_bytes = int(params.get("batch_bytes", 65536))
+        except ValueError:
+            raise ValueError("Batch delay and size must be integers")
+        return cls(delay_us, max_bytes=max_bytes)
+
+    def describe(self) -> dict:
+        """Return the negotiated settings to report back to the agent."""
+        return {
+            "delay_us": self.delay_us,
+            "max_bytes": self.max_bytes
+        }
+
+class FrameWriter:
+    """
+    Outbound side of an agent's WebSocket connection.
+
+    The router and core loop send through this object instead of the raw
+    WebSocket so that frames can be encoded according to the settings the
+    agent negotiated when it connected.
+
+    Frames carry a priority. When several coroutines are waiting to write to
+    the connection, or frames are waiting in a batch, higher priority frames
+    are written first.
+
+    Pubsub deliveries of binary payloads are sent as payload frames to
+    agents that negotiated binary framing; see ``framing``.
+    """
+
+    def __init__(self, websocket, compressor: Optional[FrameCompressor] = None,
+                 batching: Optional[BatchSettings] = None, framing: str = FRAMING_JSON,
+                 flow_control: Optional[CreditFlowControl] = None):
+        """
+        Initialize the writer.
+
+        Args:
+            websocket: The WebSocket connection to write to
+            compressor: Optional compressor for large frames
+            batching: Optional micro-batching settings
+            framing: The negotiated framing for payload deliveries
+            flow_control: The negotiated flow control, defaults to coalescing
+        """
+        self.websocket = websocket
+        self.compressor = compressor
+        self.batching = batching
+        self.framing = framing
+        self.flow_control = flow_control or CreditFlowControl()
+        self._pending: Tuple[List[str], ...] = tuple([] for _ in range(PRIORITY_LOW + 1))
+        self._pending_bytes = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._sending = False
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._waiter_seq = itertools.count()
+
+    async def send_json(self, message: Any, priority: int = PRIORITY_NORMAL):
+        """
+        Encode and send a message.
+
+        Args:
+            message: The JSON-serializable message to send
+            priority: The priority lane of the message
+        """
+        await self.send_text(json.dumps(message, separators=(",", ":"), ensure_ascii=False), priority)
+
+    async def deliver(self, topic: str, frame: Union[str, bytes], priority: int = PRIORITY_NORMAL):
+        """
+        Send an encoded pubsub delivery, subject to flow control.
+
+        High priority deliveries are never held back by flow control.
+
+        Args:
+            topic: The topic of the delivery
+            frame: The encoded delivery, JSON text or a binary payload frame
+            priority: The priority lane of the delivery
+        """
+        if self.flow_control.admit(topic, frame, urgent=priority == PRIORITY_HIGH):
+            await self._send(frame, priority)
+
+    async def grant_credits(self, messages: Optional[int] = None, nbytes: Optional[int] = None):
+        """
+        Add delivery credit and send any held deliveries it covers.
+
+        Args:
+            messages: Number of additional messages the agent can absorb
+            nbytes: Number of additional bytes the agent can absorb
+        """
+        self.flow_control.grant(messages, nbytes)
+        for frame in self.flow_control.release():
+            await self._send(frame)
+
+    async def send_text(self, text: str, priority: int = PRIORITY_NORMAL):
+        """
+        Send an already encoded JSON frame.
+
+        With batching enabled the frame is queued and sent with the next
+        flush, except that a high priority frame flushes the batch at once;
+        otherwise it is written immediately.
+
+        Args:
+            text: The encoded JSON frame
+            priority: The priority lane of the frame
+        """
+        if self.batching is None:
+            await self._acquire(priority)
+            try:
+                await self._write(text)
+            finally:
+                self._release()
+            return
+
+        self._pending[priority].append(text)
+        self._pending_bytes += len(text)
+        if priority == PRIORITY_HIGH or self._pending_bytes >= self.batching.max_bytes:
+            await self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self.batching.delay_us / 1_000_000, self._start_flush
+            )
+
+    async def send_frame(self, frame: bytes, priority: int = PRIORITY_NORMAL):
+        """
+        Send a binary payload frame.
+
+        Payload frames cannot join a JSON array batch, so any pending batch
+        is flushed first to keep frames in order.
+
+        Args:
+            frame: The encoded payload frame
+            priority: The priority lane of the frame
+        """
+        if self.batching is not None:
+            await self.flush()
+        await self._acquire(priority)
+        try:
+            await self._write_bytes(frame)
+        finally:
+            self._release()
+
+    async def flush(self):
+        """Send all pending frames, highest priority first, as a single array frame."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending_bytes:
+            return
+
+        pending = [text for lane in self._pending for text in lane]
+        for lane in self._pending:
+            lane.clear()
+        self._pending_bytes = 0
+        text = pending[0] if len(pending) == 1 else "[" + ",".join(pending) + "]"
+        await self._acquire(PRIORITY_HIGH)
+        try:
+            await self._write(text)
+        finally:
+            self._release()
+
+    def close(self):
+        """Discard pending frames and cancel any scheduled flush."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        for lane in self._pending:
+            lane.clear()
+        self._pending_bytes = 0
+
+    def _start_flush(self):
+        """Timer callback that flushes pending frames once the batch delay expires."""
+        self._flush_handle = None
+        self._flush_task = asyncio.ensure_future(self._timed_flush())
+
+    async def _timed_flush(self):
+        """Flush from the batch timer, logging failures instead of raising them."""
+        try:
+            await self.flush()
+        except Exception as e:
+            _log.error(f"Failed to flush batched frames: {e}")
+
+    async def _acquire(self, priority: int):
+        """Wait for exclusive use of the connection, serving waiters by priority."""
+        if not self._sending:
+            self._sending = True
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._waiter_seq), waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # The connection may have been handed over just before cancellation
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        """Hand the connection to the highest priority waiter, if any."""
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._sending = False
+
+    async def _send(self, frame: Union[str, bytes], priority: int = PRIORITY_NORMAL):
+        """Send a delivery of either encoding."""
+        if isinstance(frame, str):
+            await self.send_text(frame, priority)
+        else:
+            await self.send_frame(frame, priority)
+
+    async def _write(self, text: str):
+        """Write a single frame, compressing it if it is large enough."""
+        if self.compressor is not None:
+            payload = text.encode("utf-8")
+            if self.compressor.should_compress(payload):
+                await self.websocket.send_bytes(self.compressor.compress(payload))
+                return
+        await self.websocket.send_text(text)
+
+    async def _write_bytes(self, frame: bytes):
+        """Write a single payload frame, compressing it if it is large enough."""
+        if self.compressor is not None and self.compressor.should_compress(frame):
+            frame = self.compressor.compress(frame)
+        await self.websocket.send_bytes(frame)
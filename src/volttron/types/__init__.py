@@ -0,0 +1,16 @@
+# src/volttron/types/__init__.py
+"""Types shared by agents and the message bus."""
+from abc import ABC, abstractmethod
+
+class AbstractAgent(ABC):
+    """Interface of agents that run on the message bus."""
+
+    @abstractmethod
+    def start(self):
+        """Connect to the message bus and start the agent."""
+
+    @abstractmethod
+    def stop(self):
+        """Stop the agent and disconnect from the message bus."""
+
+__all__ = ['AbstractAgent']
@@ -16,6 +16,8 @@ class AgentOptions:
     message_bus: str = "fastapi"
     tag_vip_id: Optional[str] = None
     tag_refresh_interval: int = 300
+    flow_control_window: int = 0  # pubsub messages in flight; 0 disables flow control
+    local_delivery: bool = True  # deliver publishes to agents in the same process directly
 
 @dataclass
 class AgentContext:
@@ -1,4 +1,66 @@
+import inspect
+import logging
+import pickle
 from copy import deepcopy
+from pathlib import Path
+
+from volttron.utils.jsonapi import parse_json_config
+
+_log = logging.getLogger(__name__)
+
+# path -> ((mtime_ns, size), pickled configuration)
+_config_cache: dict[Path, tuple[tuple[int, int], bytes]] = {}
+
+
+def get_logger(name: str | None = None) -> logging.Logger:
+    """
+    Return a logger, named after the calling module unless a name is given.
+
+    :param name: An explicit logger name
+    :type name: str | None
+    :return: The logger
+    :rtype: logging.Logger
+    """
+    if name is None:
+        frame = inspect.currentframe().f_back
+        name = frame.f_globals.get("__name__", "volttron") if frame else "volttron"
+    return logging.getLogger(name)
+
+
+def _parse_config(path: Path) -> dict:
+    """
+    Parse a JSON or YAML configuration file, reading it only once.
+
+    JSON is detected by the extension or, failing that, by a leading brace
+    or bracket, and parsed with the comment tolerant JSON parser first.
+    Anything else is parsed as YAML first. Either falls back to the other
+    parser, since JSON files with comments are not YAML and YAML files can
+    start with a flow mapping.
+
+    :param path: The file to parse
+    :type path: Path
+    :return: The parsed configuration
+    :rtype: dict
+    """
+    # yaml is only imported once a configuration file is loaded. The libyaml
+    # based loader is many times faster where PyYAML was built with it.
+    import yaml
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+    text = path.read_text()
+    if path.suffix.lower() == ".json" or text.lstrip()[:1] in ("{", "["):
+        parsers = (parse_json_config, lambda text: yaml.load(text, Loader=loader))
+    else:
+        parsers = (lambda text: yaml.load(text, Loader=loader), parse_json_config)
+
+    try:
+        return parsers[0](text)
+    except (ValueError, yaml.YAMLError):
+        try:
+            return parsers[1](text)
+        except Exception:
+            _log.error("Problem parsing agent configuration")
+            raise
 
 
 def load_config(default_configuration: str | Path | dict | None) -> dict:
@@ -11,8 +73,9 @@ def load_config(default_configuration: str | Path | dict | None) -> dict:
     without any changes to it.
 
     If default_configuration is a string or Path object, they must resolve to a file that
-    is readable by the current process.  The file referenced will be parsed and loaded
-    using yaml.safe_load.  Doing so will load both json or yaml based files.
+    is readable by the current process.  The file referenced will be parsed as JSON or
+    YAML, see _parse_config.  Parsed files are cached until their modification time or
+    size changes; every call returns a new copy of the configuration.
 
     :param default_configuration: An agent configuration that is passed to __init__
     :type default_configuration: str | Path | dict
@@ -32,17 +95,16 @@ def load_config(default_configuration: str | Path | dict | None) -> dict:
     elif isinstance(default_configuration, Path):
         default_configuration = default_configuration.expanduser().absolute()
     else:
-        ValueError(
+        raise ValueError(
             f"Invalid type passed as default_configuration {type(default_configuration)} MUST be str | Path | dict | None"
         )
 
-    # First attempt parsing the file with a yaml parser (allows comments natively)
-    # Then if that fails we fallback to our modified json parser.
-    try:
-        return yaml.safe_load(default_configuration.read_text())
-    except yaml.YAMLError as e:
-        try:
-            return parse_json_config(default_configuration.read_text())
-        except Exception as e:
-            _log.error("Problem parsing agent configuration")
-            raise
\ No newline at end of file
+    stat = default_configuration.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _config_cache.get(default_configuration)
+    if cached is None or cached[0] != version:
+        config = _parse_config(default_configuration)
+        # Unpickling copies the configuration in C, far faster than deepcopy
+        _config_cache[default_configuration] = (version, pickle.dumps(config, pickle.HIGHEST_PROTOCOL))
+        return config
+    return pickle.loads(cached[1])
@@ -24,7 +24,7 @@
 
 __all__ = [
     "execute_command", "vip_main", "is_volttron_running", "wait_for_volttron_startup",
-    "wait_for_volttron_shutdown", "start_agent_thread", "isapipe"
+    "wait_for_volttron_shutdown", "start_agent_thread", "isapipe", "host_main"
 ]
 
 import logging
@@ -214,7 +214,7 @@ def wait_for_volttron_shutdown(vhome, timeout):
 
 __all__ = [
     "execute_command", "vip_main", "is_volttron_running", "wait_for_volttron_startup",
-    "wait_for_volttron_shutdown", "start_agent_thread", "isapipe"
+    "wait_for_volttron_shutdown", "start_agent_thread", "isapipe", "host_main"
 ]
 
 import logging
@@ -341,6 +341,38 @@ def vip_main(agent_class, version: str = "0.1", **kwargs):
         pass
 
 
+def host_main(host_config, address=None):
+    """Run many agents in this process, sharing one interpreter.
+
+    The host configuration, a file or dictionary, maps each agent's
+    identity to its class and agent configuration::
+
+        {
+            "listener-1": {"class": "listener.agent:ListenerAgent", "config": "listener.json"},
+            "listener-2": {"class": "listener.agent:ListenerAgent", "config": {"message": "hi"}}
+        }
+
+    Agents yield to each other through gevent, so the process must be
+    monkey patched before the agent modules are imported.
+
+    :param host_config: path to, or contents of, the host configuration
+    :param address: server address, defaults to $VOLTTRON_SERVER
+    """
+    import importlib
+    from volttron.client.vip.agent.host import AgentHost
+    from volttron.utils import load_config
+
+    host = AgentHost(address=address)
+    for identity, spec in load_config(host_config).items():
+        module_name, _, class_name = spec["class"].partition(":")
+        agent_class = getattr(importlib.import_module(module_name), class_name)
+        host.add(agent_class, identity, config_path=spec.get("config", {}), **spec.get("kwargs", {}))
+    try:
+        host.run()
+    except KeyboardInterrupt:
+        pass
+
+
 def is_volttron_running(volttron_home):
     """
     Checks if volttron is running for the given volttron home. Checks if a VOLTTRON_PID file exist and if it does
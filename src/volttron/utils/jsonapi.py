@@ -24,16 +24,16 @@
 
 from json import dump, load, loads, dumps as json_dumps
 import re
-import attr
-from attr import asdict
 from typing import Any
 
 __all__ = ("dump", "dumpb", "dumps", "load", "loadb", "loads", "strip_comments",
            "parse_json_config")
 
 def attr_default(o: Any) -> Any:
+    # attr is only needed once an object json cannot serialize turns up
+    import attr
     if attr.has(o.__class__):
-        return asdict(o)
+        return attr.asdict(o)
     raise TypeError(f"Object of type {o.__class__.__name__} is not JSON serializable")
 
 def dumps(object, **kwargs):
@@ -51,26 +51,77 @@ def loadb(s, **kwargs):
     return loads(s.decode("utf-8"), **kwargs)
 
 
-_comment_re = re.compile(
-    r'((["\'])(?:\\?.)*?\2)|(/\*.*?\*/)|((?:#|//).*?(?=\n|$))',
-    re.MULTILINE | re.DOTALL,
-)
+# Text that needs no attention: anything but quotes and comment markers,
+# strings without escapes, and slashes that do not start a comment. Nothing
+# follows the outer star, so matching never backtracks out of it, and a
+# string that is not matched only backtracks to its next quote or backslash.
+_plain_re = re.compile(r"""(?:[^"'/#]+|"[^"\\]*"|'[^'\\]*'|/(?![/*]))*""")
+# Characters that can end a string or start an escape within it
+_string_special_re = {'"': re.compile(r'[\\"]'), "'": re.compile(r"[\\']")}
 
 
-def _repl(match):
-    """Replace the matched group with an appropriate string."""
-    # If the first group matched, a quoted string was matched and should
-    # be returned unchanged.  Otherwise a comment was matched and the
-    # empty string should be returned.
-    return match.group(1) or ""
+def _string_end(string, pos, quote, last):
+    """Return the index of the quote closing the string opened at pos.
+
+    A backslash escapes the next character, except that a string whose
+    only remaining quote is escaped is closed by that quote. The caller
+    guarantees that last, the index of the last quote in the text, is
+    after pos.
+    """
+    pattern = _string_special_re[quote]
+    pos += 1
+    while True:
+        pos = pattern.search(string, pos).start()
+        if string[pos] == quote:
+            return pos
+        # A backslash, which cannot escape the last quote
+        if pos + 1 == last:
+            return last
+        pos += 2
 
 
 def strip_comments(string):
     """Return string with all comments stripped.
     Both JavaScript-style comments (//... and /*...*/) and hash (#...)
     comments are removed.
+
+    The text is scanned once, matching runs of plain text and simple
+    strings in C and only stepping through comments and strings with
+    escapes in Python, so the time taken grows linearly with its length. Quoted
+    strings are kept as is; an unterminated quote or /* is kept as text.
     """
-    return _comment_re.sub(_repl, string)
+    last_quote = {'"': string.rfind('"'), "'": string.rfind("'")}
+    pieces = []
+    start = pos = 0
+    length = len(string)
+    while True:
+        pos = _plain_re.match(string, pos).end()
+        if pos == length:
+            break
+        char = string[pos]
+        if char in "\"'":
+            if last_quote[char] > pos:
+                pos = _string_end(string, pos, char, last_quote[char])
+            pos += 1
+            continue
+        if char == "/":
+            following = string[pos + 1:pos + 2]
+            if following == "*":
+                end = string.find("*/", pos + 2)
+                if end == -1:
+                    pos += 1
+                    continue
+                end += 2
+            else:
+                end = string.find("\n", pos)
+        else:
+            end = string.find("\n", pos)
+        if end == -1:
+            end = length
+        pieces.append(string[start:pos])
+        start = pos = end
+    pieces.append(string[start:])
+    return "".join(pieces)
 
 
 def parse_json_config(config_str):
@@ -0,0 +1,241 @@
+"""
+Scheduling of one-shot, periodic and cron-like jobs.
+
+Every job of an agent is kept in one min-heap ordered by deadline and run
+from a single greenlet, so scheduling hundreds of timers does not cost a
+greenlet each. Repeating jobs take their deadlines from an iterator such as
+periodic() or cron(). Deadlines are absolute, so a slow callback does not
+push later runs back; runs missed while the agent was busy are skipped.
+"""
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, List, Optional, Set, Tuple, Union
+
+import gevent
+from gevent.event import Event
+
+_log = logging.getLogger(__name__)
+
+Deadline = Union[datetime, timedelta, float, int]
+
+
+def to_timestamp(deadline: Deadline) -> float:
+    """
+    Convert a deadline to seconds since the epoch.
+
+    :param deadline: A datetime (naive datetimes are local time), a delay as a
+        timedelta, or seconds since the epoch
+    :return: The deadline in seconds since the epoch
+    """
+    if isinstance(deadline, datetime):
+        return deadline.timestamp()
+    if isinstance(deadline, timedelta):
+        return time.time() + deadline.total_seconds()
+    return float(deadline)
+
+
+def periodic(period: Union[timedelta, float], start: Optional[Deadline] = None) -> Iterator[float]:
+    """
+    Generate deadlines a fixed period apart.
+
+    :param period: Seconds, or a timedelta, between runs
+    :param start: The first deadline; defaults to one period from now
+    :return: An iterator of deadlines in seconds since the epoch
+    """
+    if isinstance(period, timedelta):
+        period = period.total_seconds()
+    if period <= 0:
+        raise ValueError("Period must be positive")
+    deadline = to_timestamp(start) if start is not None else time.time() + period
+    while True:
+        yield deadline
+        deadline += period
+
+
+_CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),    # 0 and 7 are Sunday
+)
+
+# Give up on expressions that match no date, such as February 30th
+_CRON_SEARCH_YEARS = 8
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> Set[int]:
+    """Parse one cron field of *, values, ranges, lists and steps."""
+    values = set()
+    for part in field.split(","):
+        term, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if term == "*":
+            first, last = low, high
+        elif "-" in term:
+            first, last = (int(v) for v in term.split("-", 1))
+        else:
+            first = last = int(term)
+            if step != 1:
+                last = high
+        if step < 1 or first < low or last > high or first > last:
+            raise ValueError(f"Invalid cron field {field!r}")
+        values.update(range(first, last + 1, step))
+    return values
+
+
+def cron(expression: str, start: Optional[Deadline] = None) -> Iterator[float]:
+    """
+    Generate deadlines from a five-field cron expression.
+
+    The fields are minute, hour, day of month, month and day of week
+    (0 or 7 is Sunday), in local time. As in cron, when both day fields are
+    restricted a day matching either one is used.
+
+    :param expression: The cron expression, e.g. "*/15 8-17 * * 1-5"
+    :param start: Deadlines are generated after this time; defaults to now
+    :return: An iterator of deadlines in seconds since the epoch
+    """
+    fields = expression.split()
+    if len(fields) != 5:
+        raise ValueError(f"Cron expression must have 5 fields: {expression!r}")
+    minutes, hours, days, months, weekdays = (
+        _parse_cron_field(field, low, high) for field, (_, low, high) in zip(fields, _CRON_FIELDS))
+    weekdays = {weekday % 7 for weekday in weekdays}
+    any_day, any_weekday = fields[2] == "*", fields[4] == "*"
+
+    def day_matches(moment: datetime) -> bool:
+        day_ok = moment.day in days
+        weekday_ok = (moment.isoweekday() % 7) in weekdays
+        if any_day or any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    begin = datetime.fromtimestamp(to_timestamp(start)) if start is not None else datetime.now()
+    return _cron_deadlines(begin, minutes, hours, months, day_matches)
+
+
+def _cron_deadlines(begin: datetime, minutes: Set[int], hours: Set[int], months: Set[int],
+                    day_matches: Callable[[datetime], bool]) -> Iterator[float]:
+    """Generate the deadlines of a parsed cron expression after begin."""
+    moment = begin.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    while moment.year <= begin.year + _CRON_SEARCH_YEARS:
+        if moment.month not in months:
+            year, month = divmod(moment.month, 12)
+            moment = moment.replace(year=moment.year + year, month=month + 1, day=1, hour=0, minute=0)
+        elif not day_matches(moment):
+            moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+        elif moment.hour not in hours:
+            moment = (moment + timedelta(hours=1)).replace(minute=0)
+        elif moment.minute not in minutes:
+            moment += timedelta(minutes=1)
+        else:
+            yield moment.timestamp()
+            moment += timedelta(minutes=1)
+
+
+class ScheduledEvent:
+    """A scheduled job; cancel() stops it from running again."""
+    __slots__ = ("deadline", "callback", "args", "kwargs", "schedule", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callable, args: tuple, kwargs: dict,
+                 schedule: Optional[Iterator[float]] = None):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        self.schedule = schedule
+        self.cancelled = False
+
+    def cancel(self):
+        """Cancel the job; a run already in progress completes."""
+        self.cancelled = True
+
+
+class Scheduler:
+    """
+    Runs scheduled jobs from a single greenlet.
+
+    Callbacks run in the scheduler's greenlet, so a callback that blocks for
+    long should spawn its own greenlet for the slow work.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, ScheduledEvent]] = []
+        self._sequence = itertools.count()
+        self._wakeup = Event()
+        self._greenlet: Optional[gevent.Greenlet] = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, deadline: Union[Deadline, Iterator[float]], callback: Callable,
+                 *args, **kwargs) -> ScheduledEvent:
+        """
+        Schedule a callback.
+
+        :param deadline: When to run, or an iterator of deadlines such as
+            periodic() or cron() for a repeating job
+        :param callback: The callback to run
+        :return: The scheduled event, which can be cancelled
+        :raises ValueError: If a repeating schedule has no deadlines
+        """
+        schedule = None
+        if not isinstance(deadline, (datetime, timedelta, float, int)):
+            schedule = iter(deadline)
+            deadline = next(schedule, None)
+            if deadline is None:
+                raise ValueError("Schedule has no deadlines")
+        event = ScheduledEvent(to_timestamp(deadline), callback, args, kwargs, schedule)
+        self._push(event)
+        return event
+
+    def start(self):
+        """Start running jobs."""
+        if self._greenlet is None:
+            self._greenlet = gevent.spawn(self._run)
+
+    def stop(self):
+        """Stop running jobs; scheduled jobs are kept."""
+        if self._greenlet is not None:
+            self._greenlet.kill(block=False)
+            self._greenlet = None
+
+    def _push(self, event: ScheduledEvent):
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (event.deadline, next(self._sequence), event))
+        if earliest is None or event.deadline < earliest:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                self._wakeup.wait(delay)
+                continue
+
+            _, _, event = heapq.heappop(self._heap)
+            if event.cancelled:
+                continue
+            try:
+                event.callback(*event.args, **event.kwargs)
+            except Exception as e:
+                _log.exception(f"Error in scheduled callback {event.callback}: {e}")
+            if event.schedule is not None and not event.cancelled:
+                self._reschedule(event)
+
+    def _reschedule(self, event: ScheduledEvent):
+        """Queue the next run of a repeating job, skipping runs already missed."""
+        now = time.time()
+        for deadline in event.schedule:
+            if deadline > now:
+                event.deadline = deadline
+                self._push(event)
+                return
@@ -28,16 +28,21 @@ __all__ = [
     "get_aware_utc_now",
     "get_utc_seconds_from_epoch",
     "process_timestamp",
+    "parse_timestamp_strings",
+    "process_timestamps",
     "fix_sqlite3_datetime",
+    "CoarseClock",
+    "utc_clock",
 ]
 
 import calendar
-from datetime import datetime
-from dateutil.parser import parse
+import functools
+import itertools
+import time
+from datetime import date, datetime
 from dateutil.tz import tzutc, tzoffset
 import logging
 import pytz
-from tzlocal import get_localzone
 
 _log = logging.getLogger(__name__)
 
@@ -54,22 +59,9 @@ def format_timestamp(time_stamp):
     :returns: datetime in string format
     :rtype: str
     """
-
-    time_str = time_stamp.strftime("%Y-%m-%dT%H:%M:%S.%f")
-
-    if time_stamp.tzinfo is not None:
-        sign = "+"
-        td = time_stamp.tzinfo.utcoffset(time_stamp)
-        if td.days < 0:
-            sign = "-"
-            td = -td
-
-        seconds = td.seconds
-        minutes, seconds = divmod(seconds, 60)
-        hours, minutes = divmod(minutes, 60)
-        time_str += "{sign}{HH:02}:{MM:02}".format(sign=sign, HH=hours, MM=minutes)
-
-    return time_str
+    # isoformat formats the date and the UTC offset in C; seconds of an
+    # offset, which isoformat appends, were never part of the format.
+    return time_stamp.isoformat(timespec="microseconds")[:32]
 
 
 def parse_timestamp_string(time_stamp_str):
@@ -82,6 +74,8 @@ def parse_timestamp_string(time_stamp_str):
     or
     YYYY-MM-DDTHH:MM:SS.mmmmmm+HH:MM
     based on the string length before falling back to dateutil.parse.
+    The fallback learns the format of each new shape of string, see
+    _parse_fallback.
 
     @param time_stamp_str:
     @return: value to convert
@@ -114,7 +108,84 @@ def parse_timestamp_string(time_stamp_str):
         except ValueError:
             pass
 
-    return parse(time_stamp_str)
+    return _parse_fallback(time_stamp_str)
+
+
+# strptime formats tried when learning the format of a new shape of string.
+# Two digit years and month names are left out: strptime and dateutil
+# disagree on the century of the former and strptime's reading of the
+# latter depends on the locale.
+_CANDIDATE_FORMATS = tuple(
+    date + sep + clock + zone
+    for date, sep, clock, zone in itertools.product(
+        ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%Y%m%d"),
+        (" ", "T"),
+        ("%H:%M:%S.%f", "%H:%M:%S", "%H:%M"),
+        ("", "%z", " %z"),
+    )
+) + ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y")
+
+# String shape (every digit replaced by 0) -> learned format, or None if no
+# candidate format parses that shape like dateutil does
+_learned_formats = {}
+_MAX_LEARNED_FORMATS = 256
+_DIGITS_TO_ZERO = str.maketrans("123456789", "000000000")
+
+
+def _infer_format(time_stamp_str, time_stamp):
+    """Find a strptime format that parses the string the way dateutil did."""
+    for candidate in _CANDIDATE_FORMATS:
+        try:
+            learned = datetime.strptime(time_stamp_str, candidate)
+        except ValueError:
+            continue
+        # Comparing naive and aware datetimes is never equal
+        if learned == time_stamp and learned.utcoffset() == time_stamp.utcoffset():
+            return candidate
+    return None
+
+
+def _parse_fallback(time_stamp_str):
+    """
+    Parse a string that is not in one of the fast path formats.
+
+    The first string of each shape is parsed with dateutil.parse and the
+    strptime format giving the same result is remembered for that shape,
+    so later strings of the same shape are parsed with strptime instead.
+    Shapes no format matches, such as times that dateutil completes with
+    today's date, are left to dateutil, whose results are cached as well.
+    """
+    shape = time_stamp_str.translate(_DIGITS_TO_ZERO)
+    learned = _learned_formats.get(shape, "")
+    if learned:
+        return _parse_learned(time_stamp_str, learned)
+
+    time_stamp = _parse_dateutil(time_stamp_str, date.today())
+    if learned == "" and len(_learned_formats) < _MAX_LEARNED_FORMATS:
+        _learned_formats[shape] = _infer_format(time_stamp_str, time_stamp)
+    return time_stamp
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_learned(time_stamp_str, learned):
+    """Parse a string with its learned format; identical strings hit the LRU cache."""
+    try:
+        return datetime.strptime(time_stamp_str, learned)
+    except ValueError:
+        # e.g. a day first date, which dateutil reads differently
+        return _parse_dateutil(time_stamp_str, date.today())
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_dateutil(time_stamp_str, today):
+    """
+    Parse a string with dateutil.parse; identical strings hit the LRU cache.
+
+    dateutil completes missing date fields from today's date, so the date is
+    part of the cache key and results cached before midnight are not reused.
+    """
+    from dateutil.parser import parse
+    return parse(time_stamp_str, default=datetime.combine(today, datetime.min.time()))
 
 
 def get_aware_utc_now():
@@ -123,9 +194,56 @@ def get_aware_utc_now():
     :returns: an aware UTC datetime object
     :rtype: datetime
     """
-    utcnow = datetime.utcnow()
-    utcnow = pytz.UTC.localize(utcnow)
-    return utcnow
+    return datetime.now(pytz.UTC)
+
+
+class CoarseClock:
+    """A clock that reads the system time at most once per resolution.
+
+    High rate callers, such as those stamping a header on every publish,
+    share one aware UTC datetime and its formatted string until the clock
+    ticks instead of creating and formatting a datetime on every call.
+    """
+
+    def __init__(self, resolution=0.001):
+        """
+        :param resolution: seconds between readings of the system time
+        :type resolution: float
+        """
+        self.resolution = resolution
+        # (time of the last reading, datetime, formatted datetime or None)
+        self._state = (float("-inf"), None, None)
+
+    def _tick(self):
+        state = self._state
+        now = time.time()
+        # Also read the time again if the system clock went backwards
+        if not state[0] <= now < state[0] + self.resolution:
+            state = (now, datetime.fromtimestamp(now, pytz.UTC), None)
+            self._state = state
+        return state
+
+    def now(self):
+        """Return the current time as an aware UTC datetime.
+
+        :rtype: datetime
+        """
+        return self._tick()[1]
+
+    def format(self):
+        """Return the current time formatted by format_timestamp.
+
+        :rtype: str
+        """
+        state = self._tick()
+        if state[2] is None:
+            state = (state[0], state[1], format_timestamp(state[1]))
+            self._state = state
+        return state[2]
+
+
+# Shared clock for stamping messages with the current time
+utc_clock = CoarseClock()
 
 
 def get_utc_seconds_from_epoch(timestamp=None):
@@ -141,6 +259,7 @@ def get_utc_seconds_from_epoch(timestamp=None):
         timestamp = datetime.now(tz=tzutc())
 
     if timestamp.tzinfo is None:
+        from tzlocal import get_localzone
         local_tz = get_localzone()
 
         # Note:
@@ -188,6 +307,159 @@ def process_timestamp(timestamp_string, topic=""):
     return timestamp, original_tz
 
 
+# Shapes of the fast path formats; "0" is any digit and "+" is either sign
+_ISO_TEMPLATE = "0000-00-00T00:00:00.000000"
+_ISO_TZ_TEMPLATE = _ISO_TEMPLATE + "+00:00"
+
+
+def _fixed_width_codes(values, template):
+    """
+    View fixed width strings as a matrix of character codes and find the
+    rows shaped like the template.
+
+    :param values: numpy object array of strings as long as the template
+    :param template: the expected shape of the strings
+    :returns: the matrix of character codes and the mask of matching rows
+    """
+    import numpy as np
+
+    width = len(template)
+    codes = values.astype(f"U{width}").view(np.uint32).reshape(-1, width)
+    expected = np.array([ord(c) for c in template], dtype=np.uint32)
+    digits = expected == ord("0")
+    signs = expected == ord("+")
+    separators = ~(digits | signs)
+    # Codes below "0" wrap around, so one comparison checks both bounds
+    matches = ((codes[:, digits] - ord("0")) < 10).all(axis=1)
+    matches &= (codes[:, separators] == expected[separators]).all(axis=1)
+    if signs.any():
+        sign = codes[:, signs]
+        matches &= ((sign == ord("+")) | (sign == ord("-"))).all(axis=1)
+    return codes, matches
+
+
+def _parse_batch(time_stamp_strs):
+    """
+    Parse timestamp strings into UTC offsets and wall times.
+
+    :param time_stamp_strs: sequence of timestamp strings
+    :returns: wall times as datetime64[us], offsets from UTC in seconds,
+        mask of timezone aware entries, and mask of parsed entries
+    """
+    import numpy as np
+
+    values = np.asarray(list(time_stamp_strs), dtype=object)
+    count = len(values)
+    wall = np.full(count, np.datetime64("NaT"), dtype="datetime64[us]")
+    offsets = np.zeros(count, dtype=np.int64)
+    aware = np.zeros(count, dtype=bool)
+    parsed = np.zeros(count, dtype=bool)
+    lengths = np.fromiter((len(v) if isinstance(v, str) else -1 for v in values), dtype=np.int64, count=count)
+    slow = np.flatnonzero((lengths != 26) & (lengths != 32))
+
+    # YYYY-MM-DDTHH:MM:SS.mmmmmm
+    rows = np.flatnonzero(lengths == 26)
+    if len(rows):
+        codes, matches = _fixed_width_codes(values[rows], _ISO_TEMPLATE)
+        slow = np.concatenate((slow, rows[~matches]))
+        rows = rows[matches]
+        try:
+            wall[rows] = values[rows].astype("U26").astype("datetime64[us]")
+            parsed[rows] = True
+        except ValueError:
+            # Out of range fields such as month 13; let the slow path report them
+            slow = np.concatenate((slow, rows))
+
+    # YYYY-MM-DDTHH:MM:SS.mmmmmm+HH:MM
+    rows = np.flatnonzero(lengths == 32)
+    if len(rows):
+        codes, matches = _fixed_width_codes(values[rows], _ISO_TZ_TEMPLATE)
+        slow = np.concatenate((slow, rows[~matches]))
+        rows, codes = rows[matches], codes[matches]
+        try:
+            base = np.ascontiguousarray(codes[:, :26]).view("U26").ravel()
+            wall[rows] = base.astype("datetime64[us]")
+            digits = codes[:, 27:].astype(np.int64) - ord("0")
+            seconds = (digits[:, 0] * 10 + digits[:, 1]) * 3600 + (digits[:, 3] * 10 + digits[:, 4]) * 60
+            offsets[rows] = np.where(codes[:, 26] == ord("-"), -seconds, seconds)
+            aware[rows] = True
+            parsed[rows] = True
+        except ValueError:
+            slow = np.concatenate((slow, rows))
+
+    for index in slow:
+        try:
+            time_stamp = parse_timestamp_string(values[index])
+        except (ValueError, TypeError, OverflowError):
+            continue
+        if time_stamp.tzinfo is not None:
+            offsets[index] = int(time_stamp.utcoffset().total_seconds())
+            aware[index] = True
+        wall[index] = np.datetime64(time_stamp.replace(tzinfo=None), "us")
+        parsed[index] = True
+
+    return wall, offsets, aware, parsed
+
+
+def parse_timestamp_strings(time_stamp_strs):
+    """
+    Create an array of datetimes from a sequence of date/time strings.
+
+    The batch counterpart of parse_timestamp_string. Strings in the
+    YYYY-MM-DDTHH:MM:SS.mmmmmm and YYYY-MM-DDTHH:MM:SS.mmmmmm+HH:MM formats
+    are parsed a whole array at a time; any other string falls back to
+    parse_timestamp_string. As with numpy datetimes, timezone aware
+    strings are converted to UTC and naive strings are kept as written.
+
+    :param time_stamp_strs: sequence of timestamp strings
+    :type time_stamp_strs: Iterable[str]
+    :returns: the timestamps
+    :rtype: numpy.ndarray of datetime64[us]
+    :raises ValueError: if a string cannot be parsed
+    """
+    import numpy as np
+
+    wall, offsets, aware, parsed = _parse_batch(time_stamp_strs)
+    if not parsed.all():
+        raise ValueError(f"Unable to parse {np.count_nonzero(~parsed)} timestamp strings")
+    return wall - offsets.astype("timedelta64[s]")
+
+
+def process_timestamps(timestamp_strings, topic=""):
+    """
+    Convert a batch of timestamp strings to timezone aware UTC timestamps.
+
+    The batch counterpart of process_timestamp. Naive timestamps are taken
+    to be UTC. Missing or unparseable timestamps are logged and become NaT.
+
+    The original timezone is resolved once for the batch: it is the
+    timezone shared by every timestamp in the batch, or None if the
+    timestamps are naive or have different UTC offsets.
+
+    :param timestamp_strings: sequence of datetime strings to parse
+    :param topic: topic to which parse errors are published
+    :returns: UTC timestamps and the original timezone of the batch
+    :rtype: tuple(pandas.DatetimeIndex, tzinfo)
+    """
+    import numpy as np
+    import pandas as pd
+
+    wall, offsets, aware, parsed = _parse_batch(timestamp_strings)
+    failed = np.count_nonzero(~parsed)
+    if failed:
+        _log.error("{count} messages for {topic} have missing or bad timestamp strings".format(
+            count=failed, topic=topic))
+
+    timestamps = pd.DatetimeIndex(wall - offsets.astype("timedelta64[s]")).tz_localize(pytz.UTC)
+
+    original_tz = None
+    batch_aware, batch_offsets = aware[parsed], offsets[parsed]
+    if len(batch_aware) and batch_aware.all() and (batch_offsets == batch_offsets[0]).all():
+        seconds = int(batch_offsets[0])
+        original_tz = pytz.UTC if seconds == 0 else tzoffset("", seconds)
+    return timestamps, original_tz
+
+
 def fix_sqlite3_datetime(sql=None):
     """Primarily for fixing the base historian cache on certain versions
     of python.
@@ -0,0 +1,132 @@
+"""
+Tests for hosting many agents in one process.
+
+The agents share one gevent hub, so this module monkey patches the process
+and is run in a subprocess by test_agent_host.py.
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import json
+
+import gevent
+import pytest
+import websocket
+
+from volttron.client.vip.agent import RPC, Agent
+from volttron.client.vip.agent.host import AgentHost
+from volttron.utils import commands
+
+from tests.utils import ServerProcess
+
+class EchoAgent(Agent):
+    """Agent that answers echo calls and records the publishes it receives."""
+
+    def __init__(self, config_path=None, **kwargs):
+        super().__init__(**kwargs)
+        self.config = config_path
+        self.received = []
+
+    @RPC.export
+    def echo(self, text):
+        return text
+
+    def on_publish(self, peer, sender, bus, topic, headers, message):
+        self.received.append((sender, topic, message))
+
+@pytest.fixture(scope="module")
+def server():
+    """Run the message bus server for the module's tests."""
+    process = ServerProcess()
+    if not process.start():
+        pytest.fail("Failed to start the test server")
+    yield process
+    process.stop()
+
+def wait_for(condition, timeout=5):
+    """Wait for a condition to become true, yielding to other greenlets."""
+    with gevent.Timeout(timeout):
+        while not condition():
+            gevent.sleep(0.01)
+
+@pytest.mark.parametrize("multiplex", [True, False])
+def test_hosted_agents_start_talk_and_stop(server, multiplex):
+    """Test that hosted agents start together, reach each other and stop together."""
+    host = AgentHost(address=server.server_url, multiplex=multiplex)
+    first = host.add(EchoAgent, f"first-{multiplex}", config_path={"n": 1})
+    second = host.add(EchoAgent, f"second-{multiplex}")
+    assert len(host) == 2 and first.config == {"n": 1}
+    with pytest.raises(ValueError):
+        host.add(EchoAgent, f"first-{multiplex}")
+
+    host.start()
+    try:
+        assert first.core.connected and second.core.connected
+        assert first.vip.rpc.call(second.core.identity, "echo", "hi").get(timeout=5) == "hi"
+
+        first.vip.pubsub.subscribe("pubsub", "devices/", first.on_publish)
+        gevent.sleep(0.2)
+        second.vip.pubsub.publish("pubsub", "devices/a", {}, 72)
+        wait_for(lambda: first.received)
+        assert first.received == [(second.core.identity, "devices/a", 72)]
+    finally:
+        host.stop()
+    assert not first.core.connected and not second.core.connected
+    if multiplex:
+        assert not host.connection.connected
+
+def test_agent_failing_to_start_is_isolated(server):
+    """Test that an agent the server refuses is left stopped while the others run."""
+    # Another connection already holds the identity
+    taken = websocket.create_connection(f"{server.server_url}/messagebus/v1/taken")
+    try:
+        json.loads(taken.recv())
+        host = AgentHost(address=server.server_url)
+        for identity in ("taken", "free-1", "free-2"):
+            host.add(EchoAgent, identity)
+        host.start()
+        try:
+            assert host.agents["free-1"].core.connected and host.agents["free-2"].core.connected
+            assert not host.agents["taken"].core.connected
+            assert host.agents["free-1"].vip.rpc.call("free-2", "echo", "ok").get(timeout=5) == "ok"
+
+            host.remove("free-2")
+            assert "free-2" not in host
+            assert not host.agents.get("free-2")
+        finally:
+            host.stop()
+    finally:
+        taken.close()
+
+def test_run_until_stopped(server):
+    """Test that run() serves the agents until stop() is called."""
+    host = AgentHost(address=server.server_url)
+    agent = host.add(EchoAgent, "runner")
+    runner = gevent.spawn(host.run)
+    wait_for(lambda: agent.core.connected)
+    host.stop()
+    runner.join(5)
+    assert runner.dead and not agent.core.connected
+
+def test_host_main(server, tmp_path, monkeypatch):
+    """Test that host_main hosts the agents listed in its configuration."""
+    config = tmp_path / "host.json"
+    config.write_text(json.dumps({
+        "main-1": {"class": f"{__name__}:EchoAgent", "config": {"setting": 1}},
+        "main-2": {"class": f"{__name__}:EchoAgent"}
+    }))
+    hosts = []
+
+    def run(host):
+        hosts.append(host)
+        host.start()
+        assert all(agent.core.connected for agent in host.agents.values())
+        host.stop()
+
+    monkeypatch.setattr(AgentHost, "run", run)
+    commands.host_main(str(config), address=server.server_url)
+
+    (host, ) = hosts
+    assert sorted(host.agents) == ["main-1", "main-2"]
+    assert host.agents["main-1"].config == {"setting": 1}
+    assert host.agents["main-2"].config == {}
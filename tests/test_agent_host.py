@@ -0,0 +1,19 @@
+# tests/test_agent_host.py
+import os
+import subprocess
+import sys
+
+import pytest
+
+@pytest.mark.timeout(60)
+def test_run_agent_host_tests():
+    """Run the agent host tests in a separate, gevent patched process."""
+    agent_host_test_file = os.path.join(os.path.dirname(__file__), "_test_agent_host.py")
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", agent_host_test_file, "-v", "-p", "no:cacheprovider"],
+        capture_output=True,
+        text=True,
+        timeout=50,
+        env=os.environ
+    )
+    assert result.returncode == 0, f"Agent host tests failed:\n{result.stdout}\n{result.stderr}"
@@ -0,0 +1,96 @@
+"""
+Tests for time-synchronized publish aggregation.
+"""
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock
+
+from volttron.messagebus.fastapi.core.loop import CoreLoop
+from volttron.messagebus.fastapi.router.aggregation import AGGREGATOR_ID, PublishAggregator, summarize
+from volttron.messagebus.fastapi.router.router import MessageRouter
+
+@pytest.fixture
+def aggregating_loop():
+    """Create a core loop with its own router and aggregator."""
+    loop = CoreLoop("driver", AsyncMock())
+    loop.router = MessageRouter()
+    loop.aggregator = PublishAggregator()
+    loop.aggregator.configure({"devices/building1/": {"window": 3600}})
+    yield loop
+    loop.aggregator.configure(None)
+
+def test_rules():
+    """Test rule matching, defaults and validation."""
+    aggregator = PublishAggregator()
+    aggregator.configure({
+        "devices/": {"window": 60, "stats": False},
+        "devices/building1/": {"window": 10, "topic": "rollups/building1"}
+    })
+    assert aggregator.match("devices/building1/ahu1").topic == "rollups/building1"
+    assert aggregator.match("devices/building2/ahu1").topic == "rollup/devices"
+    assert aggregator.match("rollup/devices") is None
+    assert aggregator.match("analysis/x") is None
+
+    with pytest.raises(ValueError):
+        aggregator.configure({"devices/": {"window": 0}})
+
+def test_window_boundaries():
+    """Test that windows end on multiples of the window length."""
+    assert PublishAggregator.next_boundary(60, 125.0) == 180
+    assert PublishAggregator.next_boundary(60, 120.0) == 180
+    assert PublishAggregator.next_boundary(0.5, 1.2) == 1.5
+
+def test_summarize():
+    """Test per-topic statistics over dict, device and scalar values."""
+    summary = summarize({
+        "devices/a": [{"temp": 70, "mode": "cool"}, {"temp": 74}],
+        "devices/b": [[{"temp": 60.5}, {"temp": {"units": "F"}}]],
+        "devices/c": [3, True, "x"]
+    })
+    assert summary["devices/a"] == {"temp": {"min": 70, "max": 74, "mean": 72.0, "count": 2}}
+    assert summary["devices/b"]["temp"]["mean"] == 60.5
+    assert summary["devices/c"] == {"value": {"min": 3, "max": 3, "mean": 3.0, "count": 1}}
+    assert summarize({"devices/a": ["text"]}) == {}
+
+@pytest.mark.asyncio
+async def test_rollup_delivered_once_per_window(aggregating_loop):
+    """Test that a subscriber to the rollup gets one message per window."""
+    loop = aggregating_loop
+    subscriber = AsyncMock()
+    loop.router.register_agent("dashboard", subscriber)
+    loop.router.subscribe("rollup/devices/building1", "dashboard")
+
+    for i, topic in enumerate(["devices/building1/ahu1", "devices/building1/ahu2", "devices/building1/ahu1"]):
+        response = await loop.handle_message({"type": "publish", "id": str(i), "topic": topic,
+                                              "data": {"headers": {}, "message": {"temp": 70 + i}}})
+        assert response["type"] == "publish_confirm"
+    subscriber.deliver.assert_not_called()
+
+    rule = loop.aggregator.match("devices/building1/ahu1")
+    await loop.aggregator.flush(rule, 7200.0)
+    subscriber.deliver.assert_called_once()
+    message = json.loads(subscriber.deliver.call_args.args[1])
+    assert message["sender"] == AGGREGATOR_ID
+    assert message["topic"] == "rollup/devices/building1"
+    rollup = message["data"]
+    assert (rollup["window_start"], rollup["window_end"], rollup["count"]) == (3600.0, 7200.0, 3)
+    assert rollup["topics"] == {"devices/building1/ahu1": {"temp": 72}, "devices/building1/ahu2": {"temp": 71}}
+    assert rollup["stats"]["devices/building1/ahu1"]["temp"] == {"min": 70, "max": 72, "mean": 71.0, "count": 2}
+
+    # Nothing is published for an empty window
+    await loop.aggregator.flush(rule, 10800.0)
+    subscriber.deliver.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_close_cancels_window_timers(aggregating_loop):
+    """Test that closing the aggregator stops its timers and drops collected values."""
+    aggregator = aggregating_loop.aggregator
+    assert aggregator.add("devices/building1/ahu1", {"temp": 70}, aggregating_loop.router)
+    (task, ) = aggregator._tasks.values()
+
+    aggregator.close()
+    await asyncio.sleep(0)
+    assert task.cancelled()
+    assert not aggregator._tasks and not aggregator._samples
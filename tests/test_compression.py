@@ -0,0 +1,72 @@
+"""
+Tests for negotiated frame compression.
+"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from fastapi.websockets import WebSocketDisconnect
+
+from volttron.messagebus.fastapi.server.app import create_app
+from volttron.messagebus.fastapi.websocket.compression import (FrameCompressor, FrameDecompressor,
+                                                               dictionaries, register_dictionary)
+
+@pytest.fixture
+def client():
+    """Create a test client for the FastAPI application."""
+    return TestClient(create_app())
+
+@pytest.fixture
+def device_dictionary():
+    """Register a preset dictionary of typical device payload fragments."""
+    register_dictionary("devices", b'{"type":"message","topic":"devices/","data":{"value":')
+    yield dictionaries["devices"]
+    dictionaries.pop("devices", None)
+
+def test_compress_round_trip(device_dictionary):
+    """Test that frames compressed with a dictionary decompress with the same dictionary."""
+    compressor = FrameCompressor("zlib", threshold=0, dictionary="devices")
+    decompressor = FrameDecompressor("zlib", dictionary=device_dictionary)
+    payload = json.dumps({"type": "message", "topic": "devices/a", "data": {"value": 1}}).encode()
+
+    frame = compressor.compress(payload)
+    assert decompressor.decompress(frame) == payload
+    assert len(frame) < len(FrameCompressor("zlib", threshold=0).compress(payload))
+
+def test_invalid_settings_rejected():
+    """Test that unknown methods and dictionaries are rejected."""
+    with pytest.raises(ValueError):
+        FrameCompressor("brotli")
+    with pytest.raises(ValueError):
+        FrameCompressor("zlib", dictionary="missing")
+    assert FrameCompressor.from_params({}) is None
+
+def test_negotiated_compression(client):
+    """Test that frames above the threshold arrive compressed as binary frames."""
+    with client.websocket_connect("/messagebus/v1/zlib-agent?compression=zlib&threshold=64") as websocket:
+        welcome = websocket.receive_json()
+        assert welcome["compression"] == {"method": "zlib", "threshold": 64, "dictionary": None}
+
+        # Small frames are still sent as text
+        websocket.send_json({"type": "ping", "id": "1"})
+        assert websocket.receive_json()["type"] == "pong"
+
+        topics = [f"devices/building1/point{i}" for i in range(20)]
+        websocket.send_json({"type": "subscribe_many", "id": "2", "topics": topics})
+        frame = websocket.receive_bytes()
+        response = json.loads(FrameDecompressor("zlib").decompress(frame))
+        assert response["type"] == "subscribe_many_confirm"
+        assert response["topics"] == topics
+
+def test_unknown_compression_rejected(client):
+    """Test that connections requesting unsupported compression are rejected."""
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/messagebus/v1/bad-agent?compression=brotli") as websocket:
+            websocket.receive_json()
+
+def test_dictionary_download(client, device_dictionary):
+    """Test that agents can download registered dictionaries."""
+    response = client.get("/messagebus/v1/dictionaries/devices")
+    assert response.status_code == 200
+    assert response.content == device_dictionary
+    assert client.get("/messagebus/v1/dictionaries/missing").status_code == 404
@@ -0,0 +1,42 @@
+"""
+Tests for loading agent configurations.
+"""
+import os
+
+import pytest
+
+from volttron.utils import load_config
+
+def test_load_json_and_yaml(tmp_path):
+    """Test that JSON with comments and YAML files are both parsed."""
+    json_file = tmp_path / "config.json"
+    json_file.write_text('{\n  // driver settings\n  "interval": 60, /* seconds */\n  "url": "http://host#x"\n}\n')
+    assert load_config(str(json_file)) == {"interval": 60, "url": "http://host#x"}
+
+    yaml_file = tmp_path / "config"
+    yaml_file.write_text("# settings\ninterval: 60\npoints: [a, b]\n")
+    assert load_config(yaml_file) == {"interval": 60, "points": ["a", "b"]}
+
+    # A YAML flow mapping is sniffed as JSON but still parses
+    flow_file = tmp_path / "flow.yml"
+    flow_file.write_text("{interval: 60}\n")
+    assert load_config(flow_file) == {"interval": 60}
+
+    assert load_config(None) == {}
+    with pytest.raises(ValueError):
+        load_config(42)
+
+def test_cached_config_copies_and_invalidation(tmp_path):
+    """Test that cached configurations are copied and reloaded when the file changes."""
+    config_file = tmp_path / "config.json"
+    config_file.write_text('{"registry": [{"point": "temp"}]}')
+    first = load_config(config_file)
+    first["registry"].append({"point": "humidity"})
+    second = load_config(config_file)
+    assert second == {"registry": [{"point": "temp"}]}
+    assert load_config(config_file) is not second
+
+    config_file.write_text('{"registry": []}')
+    stat = config_file.stat()
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_config(config_file) == {"registry": []}
@@ -7,6 +7,7 @@ import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from volttron.messagebus.fastapi.core.loop import CoreLoop
+from volttron.messagebus.fastapi.router.router import MessageRouter
 
 @pytest.mark.asyncio
 async def test_core_loop_init():
@@ -51,4 +52,142 @@ async def test_handle_subscribe():
     assert response["id"] == "456"
     assert response["topic"] == "test/topic"
     assert "test/topic" in loop.subscriptions
-    assert "test-agent" in loop.subscriptions["test/topic"]
\ No newline at end of file
+    assert "test-agent" in loop.subscriptions["test/topic"]
+
+@pytest.mark.asyncio
+async def test_handle_unsubscribe():
+    """Test handling unsubscription messages."""
+    mock_websocket = AsyncMock()
+    loop = CoreLoop("unsub-agent", mock_websocket)
+    await loop.handle_message({"type": "subscribe", "id": "1", "topic": "test/topic"})
+    response = await loop.handle_message({
+        "type": "unsubscribe",
+        "id": "2",
+        "topic": "test/topic"
+    })
+    assert response["type"] == "unsubscribe_confirm"
+    assert response["id"] == "2"
+    assert "test/topic" not in loop.subscriptions
+
+@pytest.mark.asyncio
+async def test_handle_subscribe_many():
+    """Test bulk subscribe and unsubscribe with a single confirm each."""
+    mock_websocket = AsyncMock()
+    loop = CoreLoop("bulk-agent", mock_websocket)
+    topics = [f"devices/point{i}" for i in range(100)]
+    response = await loop.handle_message({
+        "type": "subscribe_many",
+        "id": "1",
+        "topics": topics
+    })
+    assert response["type"] == "subscribe_many_confirm"
+    assert response["topics"] == topics
+    assert set(loop.subscriptions) == set(topics)
+
+    response = await loop.handle_message({
+        "type": "unsubscribe_many",
+        "id": "2",
+        "topics": topics[:50] + ["devices/unknown"]
+    })
+    assert response["type"] == "unsubscribe_many_confirm"
+    assert response["topics"] == topics[:50]
+    assert set(loop.subscriptions) == set(topics[50:])
+
+@pytest.mark.asyncio
+async def test_handle_subscribe_many_is_atomic():
+    """Test that an invalid topic rejects the whole bulk request."""
+    mock_websocket = AsyncMock()
+    loop = CoreLoop("atomic-agent", mock_websocket)
+    response = await loop.handle_message({
+        "type": "subscribe_many",
+        "id": "1",
+        "topics": ["devices/a", ""]
+    })
+    assert response["type"] == "error"
+    assert loop.subscriptions == {}
+
+@pytest.mark.asyncio
+async def test_non_string_topics_rejected():
+    """Test that topics that are not strings are answered with an error."""
+    mock_websocket = AsyncMock()
+    loop = CoreLoop("numeric-agent", mock_websocket)
+    loop.router = MessageRouter()
+    for message_type in ("subscribe", "unsubscribe", "publish"):
+        response = await loop.handle_message({"type": message_type, "id": "1", "topic": 123, "data": 1})
+        assert response["type"] == "error"
+        assert response["error"].startswith("Invalid topic")
+    assert loop.router.subscriptions == {}
+    
+    # A topic the router cannot index leaves no subscription behind
+    with pytest.raises(AttributeError):
+        loop.router.subscribe(123, "numeric-agent")
+    assert loop.router.subscriptions == {}
+    
+@pytest.mark.asyncio
+async def test_registered_handler():
+    """Test that a subclass can add message types without affecting CoreLoop."""
+    class EchoLoop(CoreLoop):
+        pass
+
+    @EchoLoop.register_handler("echo")
+    async def handle_echo(core_loop, message):
+        return {"type": "echo_reply", "id": message.get("id"), "agent": core_loop.agent_id}
+
+    loop = EchoLoop("echo-agent", AsyncMock())
+    response = await loop.handle_message({"type": "echo", "id": "7"})
+    assert response == {"type": "echo_reply", "id": "7", "agent": "echo-agent"}
+
+    # Built-in types are inherited, and the base class is untouched
+    assert (await loop.handle_message({"type": "ping", "id": "1"}))["type"] == "pong"
+    base = CoreLoop("base-agent", AsyncMock())
+    response = await base.handle_message({"type": "echo", "id": "8"})
+    assert response["type"] == "error"
+    assert "Unsupported message type" in response["error"]
+
+@pytest.mark.asyncio
+async def test_raw_handler():
+    """Test that raw handlers receive the undecoded frame."""
+    class RawLoop(CoreLoop):
+        pass
+
+    received = []
+
+    async def handle_blob(core_loop, data):
+        received.append(data)
+
+    RawLoop.register_handler("blob", handle_blob, raw=True)
+    loop = RawLoop("raw-agent", AsyncMock())
+    assert loop.is_raw_type("blob")
+    assert not loop.is_raw_type("ping")
+
+    frame = '{"type":"blob","payload":[1,2,3]}'
+    assert await loop.handle_raw("blob", frame) is None
+    # Decoded messages are re-encoded for raw handlers
+    await loop.handle_message(json.loads(frame))
+    assert received == [frame, frame]
+
+    # Non-raw types reached through the raw path are decoded first
+    response = await loop.handle_raw("ping", '{"type":"ping","id":"9"}')
+    assert response == {"type": "pong", "id": "9"}
+
+@pytest.mark.asyncio
+async def test_call_rpc_uses_integer_ids():
+    """Test that broker RPC calls are correlated with compact integer IDs."""
+    mock_websocket = AsyncMock()
+    loop = CoreLoop("rpc-agent", mock_websocket)
+    call = asyncio.ensure_future(loop.call_rpc("rpc-agent", "get_status"))
+    await asyncio.sleep(0)
+
+    request = mock_websocket.send_json.call_args.args[0]
+    assert isinstance(request["id"], int)
+    assert list(loop.pending_requests) == [request["id"]]
+
+    # A response the agent routes to someone else does not resolve our call
+    await loop.handle_message({"type": "rpc_response", "id": request["id"],
+                               "target": "other-agent", "result": "wrong"})
+    assert not call.done()
+
+    await loop.handle_message({"type": "rpc_response", "id": request["id"],
+                               "target": "rpc-agent", "result": "ok"})
+    assert await call == "ok"
+    assert not loop.pending_requests
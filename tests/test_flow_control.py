@@ -0,0 +1,121 @@
+"""
+Tests for credit-based flow control of pubsub deliveries.
+"""
+import json
+
+import pytest
+from unittest.mock import AsyncMock
+
+from volttron.messagebus.fastapi.core.loop import CoreLoop
+from volttron.messagebus.fastapi.router.router import MessageRouter
+from volttron.messagebus.fastapi.websocket.flow_control import CreditFlowControl
+from volttron.messagebus.fastapi.websocket.writer import FrameWriter
+
+def sent_data(mock_websocket):
+    """Return the data field of each delivery sent over a mock websocket."""
+    return [json.loads(call.args[0])["data"] for call in mock_websocket.send_text.call_args_list]
+
+async def connect(router, agent_id):
+    """Start a core loop with a frame writer over a mock websocket."""
+    mock_websocket = AsyncMock()
+    loop = CoreLoop(agent_id, FrameWriter(mock_websocket))
+    loop.router = router
+    await loop.start()
+    return loop, mock_websocket
+
+def test_disabled_until_first_grant():
+    """Test that deliveries are unrestricted until credit is granted."""
+    flow = CreditFlowControl()
+    assert all(flow.admit("a", "x") for _ in range(100))
+
+    flow.grant(messages=1)
+    assert flow.admit("a", "x")
+    assert not flow.admit("a", "x")
+
+def test_backlog_bounded():
+    """Test that the oldest held topic is dropped when the backlog is full."""
+    flow = CreditFlowControl(max_backlog=2)
+    flow.grant(messages=0)
+    for topic in ("a", "b", "c"):
+        assert not flow.admit(topic, topic)
+
+    flow.grant(messages=10)
+    assert flow.release() == ["b", "c"]
+    assert flow.stats()["dropped"] == 1
+
+def test_fifo_backlog_keeps_every_delivery():
+    """Test that a FIFO backlog holds every delivery in order."""
+    flow = CreditFlowControl(mode="fifo")
+    flow.grant(messages=0)
+    for text in ("a1", "a2", "b1", "a3"):
+        assert not flow.admit(text[0], text)
+
+    flow.grant(messages=10)
+    assert flow.release() == ["a1", "a2", "b1", "a3"]
+    assert flow.stats()["coalesced"] == 0
+
+def test_fifo_backlog_bounded():
+    """Test that a full FIFO backlog drops its oldest delivery."""
+    flow = CreditFlowControl(max_backlog=2, mode="fifo")
+    flow.grant(messages=0)
+    for text in ("a1", "a2", "a3"):
+        flow.admit("a", text)
+
+    flow.grant(messages=10)
+    assert flow.release() == ["a2", "a3"]
+    assert flow.stats()["dropped"] == 1
+
+def test_backlog_from_params():
+    """Test that the backlog is negotiated from query parameters."""
+    assert CreditFlowControl.from_params({}).describe() == {"backlog": "coalesce", "max_backlog": 10000}
+    flow = CreditFlowControl.from_params({"backlog": "fifo", "max_backlog": "50"})
+    assert flow.describe() == {"backlog": "fifo", "max_backlog": 50}
+    for params in ({"backlog": "lifo"}, {"max_backlog": "many"}, {"max_backlog": "0"}):
+        with pytest.raises(ValueError):
+            CreditFlowControl.from_params(params)
+
+@pytest.mark.asyncio
+async def test_deliveries_held_and_coalesced():
+    """Test that deliveries beyond the granted credit are held, coalesced and released."""
+    router = MessageRouter()
+    subscriber, subscriber_ws = await connect(router, "slow-historian")
+    await connect(router, "driver")
+
+    await subscriber.handle_message({"type": "subscribe_many", "topics": ["devices/a", "devices/b"]})
+    assert await subscriber.handle_message({"type": "credit", "messages": 1}) is None
+
+    await router.publish("devices/a", 1, "driver")
+    await router.publish("devices/a", 2, "driver")
+    await router.publish("devices/a", 3, "driver")
+    await router.publish("devices/b", 4, "driver")
+    assert sent_data(subscriber_ws) == [1]
+
+    await subscriber.handle_message({"type": "credit", "messages": 10})
+    assert sent_data(subscriber_ws) == [1, 3, 4]
+
+@pytest.mark.asyncio
+async def test_invalid_credit_rejected():
+    """Test that malformed credit grants return an error."""
+    loop, _ = await connect(MessageRouter(), "credit-agent")
+    response = await loop.handle_message({"type": "credit", "id": "1", "messages": -1})
+    assert response["type"] == "error"
+    response = await loop.handle_message({"type": "credit", "id": "2"})
+    assert response["type"] == "error"
+
+@pytest.mark.asyncio
+async def test_fifo_deliveries_not_lost():
+    """Test that a subscriber with a FIFO backlog receives every held delivery."""
+    router = MessageRouter()
+    mock_websocket = AsyncMock()
+    subscriber = CoreLoop("historian", FrameWriter(mock_websocket, flow_control=CreditFlowControl(mode="fifo")))
+    subscriber.router = router
+    await subscriber.start()
+
+    await subscriber.handle_message({"type": "subscribe", "topic": "devices/a"})
+    await subscriber.handle_message({"type": "credit", "messages": 1})
+    for value in range(1, 5):
+        await router.publish("devices/a", value, "driver")
+    assert sent_data(mock_websocket) == [1]
+
+    await subscriber.handle_message({"type": "credit", "messages": 10})
+    assert sent_data(mock_websocket) == [1, 2, 3, 4]
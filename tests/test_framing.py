@@ -0,0 +1,54 @@
+"""
+Tests for inbound frame inspection.
+"""
+import json
+
+import pytest
+
+from volttron.messagebus.fastapi.websocket.framing import (build_frame, payload_to_text,
+                                                           peek_message_type, split_frame)
+
+def test_peek_leading_type():
+    """Test that a leading type key is read without decoding the payload."""
+    assert peek_message_type('{"type":"publish","data":{"type":"nested"}}') == "publish"
+    assert peek_message_type(' { "type" : "rpc_response", "id": "1"}') == "rpc_response"
+    # The rest of the frame is not examined, even if it is not valid JSON
+    assert peek_message_type('{"type":"publish","data":') == "publish"
+
+def test_peek_falls_back():
+    """Test frames whose type cannot be read cheaply."""
+    assert peek_message_type('{"data":{"type":"nested"},"type":"publish"}') is None
+    assert peek_message_type('{"type":"pub\\u006cish"}') is None
+    assert peek_message_type('[{"type":"ping"}]') is None
+    assert peek_message_type('not json') is None
+
+def test_frame_round_trip():
+    """Test that a payload frame splits back into its header and payload."""
+    payload = json.dumps({"temperature": 72.5}).encode("utf-8")
+    frame = build_frame({"type": "publish", "topic": "devices/a"}, payload)
+    assert frame[0] == 0
+
+    header, view = split_frame(frame)
+    assert header == {"type": "publish", "topic": "devices/a"}
+    assert isinstance(view, memoryview)
+    assert view.obj is frame
+    assert bytes(view) == payload
+
+def test_split_malformed_frames():
+    """Test that malformed payload frames are rejected."""
+    with pytest.raises(ValueError):
+        split_frame(b"\x00\x00")
+    with pytest.raises(ValueError):
+        split_frame(b"\x00\x00\x00\x10{}")
+    with pytest.raises(ValueError):
+        split_frame(build_frame([], b"")[:4] + b"[]")
+
+def test_payload_to_text():
+    """Test splicing payloads into JSON text deliveries."""
+    header = {"type": "message", "topic": "devices/a", "sender": "agent-1"}
+    text = payload_to_text(header, memoryview(b'{"temperature":72.5}'))
+    assert json.loads(text) == dict(header, data={"temperature": 72.5})
+
+    text = payload_to_text(header, b"\x01\x02", "application/octet-stream")
+    assert json.loads(text) == dict(header, data="AQI=", encoding="base64",
+                                    content_type="application/octet-stream")
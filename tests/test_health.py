@@ -0,0 +1,54 @@
+"""
+Tests for the health Status object.
+"""
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from volttron.client.messaging.health import STATUS_BAD, STATUS_GOOD, Status
+
+def test_as_json_matches_as_dict():
+    """Test that the cached serialization matches the status."""
+    status = Status.build(STATUS_GOOD, {"points": [1, 2]})
+    assert json.loads(status.as_json()) == status.as_dict()
+    assert status.as_json() is status.as_json()
+
+    status.update_status(STATUS_BAD, "offline")
+    assert json.loads(status.as_json()) == status.as_dict()
+
+    restored = Status.from_json(status.as_json())
+    assert restored.as_json() == status.as_json()
+
+def test_equal_context_is_serialized_again():
+    """Test that a context equal to the previous one is not given its stale serialization."""
+    context = {"a": 1}
+    status = Status.build(STATUS_GOOD, context)
+    context["a"] = 2
+    status.update_status(STATUS_GOOD, dict(context))
+    assert json.loads(status.as_json())["context"] == status.as_dict()["context"] == {"a": 2}
+
+    status.update_status(STATUS_GOOD, {"a": True})
+    assert json.loads(status.as_json())["context"] == {"a": True}
+
+def test_context_modified_in_place_is_serialized():
+    """Test that passing the same, modified context object is not missed."""
+    context = {"points": [1]}
+    status = Status.build(STATUS_GOOD, context)
+    context["points"].append(2)
+    status.update_status(STATUS_GOOD, context)
+    assert json.loads(status.as_json())["context"] == {"points": [1, 2]}
+
+def test_invalid_updates_are_rejected():
+    """Test validation of the status value and context."""
+    callback = MagicMock()
+    status = Status.build(STATUS_GOOD, status_changed_callback=callback)
+    with pytest.raises(ValueError):
+        status.update_status("SIDEWAYS")
+    with pytest.raises(ValueError):
+        status.update_status(STATUS_BAD, {"bad": object()})
+    assert status.status == STATUS_GOOD
+    callback.assert_not_called()
+
+    status.update_status(STATUS_BAD)
+    callback.assert_called_once()
@@ -0,0 +1,55 @@
+"""
+Tests for the grouped heartbeat publishing of co-located agents.
+"""
+import threading
+
+import gevent
+
+from volttron.client.vip.agent.subsystems import heartbeat as heartbeat_module
+from volttron.client.vip.agent.subsystems.heartbeat import Heartbeat
+
+class FakeCore:
+    """Core stand-in for an agent that is not connected."""
+
+    def __init__(self, identity):
+        self.identity = identity
+        self.connected = False
+
+    def onstartup(self, callback):
+        pass
+
+    def onstop(self, callback):
+        pass
+
+def test_agents_share_a_group_per_period():
+    """Test that heartbeats with the same period share one group that is discarded when empty."""
+    first = Heartbeat(None, FakeCore("first"), heartbeat_period=30)
+    second = Heartbeat(None, FakeCore("second"), heartbeat_period=30)
+    first.start()
+    second.start()
+    assert first._group is second._group
+    group = first._group
+    assert heartbeat_module._groups[(threading.get_ident(), 30)] is group
+
+    first.stop()
+    assert group.members == {second}
+    second.stop()
+    assert not group.members and group._greenlet is None
+    assert (threading.get_ident(), 30) not in heartbeat_module._groups
+
+def test_stop_from_another_thread():
+    """Test that a heartbeat stopped from another thread leaves the group it started in."""
+    heartbeat = Heartbeat(None, FakeCore("threaded"), heartbeat_period=45)
+    heartbeat.start()
+    group = heartbeat._group
+    greenlet = group._greenlet
+
+    stopper = threading.Thread(target=heartbeat.stop)
+    stopper.start()
+    stopper.join()
+    assert not group.members
+    assert (threading.get_ident(), 45) not in heartbeat_module._groups
+
+    # The greenlet is killed on the hub of the thread that started it
+    gevent.sleep(0.01)
+    assert greenlet.dead
@@ -0,0 +1,17 @@
+"""
+Tests for correlation ID generation.
+"""
+from volttron.messagebus.fastapi.ids import IdGenerator
+
+def test_prefixed_ids():
+    """Test that string IDs combine the prefix with an increasing counter."""
+    ids = IdGenerator("agent-1-")
+    assert [ids.next_id() for _ in range(3)] == ["agent-1-1", "agent-1-2", "agent-1-3"]
+    assert ids() == "agent-1-4"
+    assert ids.next_int() == 5
+
+def test_random_prefixes_differ():
+    """Test that generators without a prefix get distinct random ones."""
+    first, second = IdGenerator(), IdGenerator()
+    assert first.prefix != second.prefix
+    assert first.next_id() != second.next_id()
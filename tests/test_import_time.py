@@ -0,0 +1,39 @@
+"""
+Tests that importing the packages does not load heavy dependencies.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``
+and the modules it loaded are read from the report, so a heavy import that
+creeps back in fails here instead of slowing every agent's cold start.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+def import_report(module):
+    """Import a module in a new interpreter and return the cumulative import time of each module loaded."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, env=env, check=True)
+    report = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:"):
+            _, cumulative, name = line[len("import time:"):].split("|")
+            # Skips the header line
+            if cumulative.strip().isdigit():
+                report[name.strip()] = int(cumulative)
+    return report
+
+@pytest.mark.parametrize("module, deferred", [
+    ("volttron.messagebus.fastapi.core.loop", {"fastapi", "gevent", "pandas", "numpy", "yaml"}),
+    ("volttron.messagebus.fastapi.server.app", {"gevent", "pandas", "numpy"}),
+    ("volttron.utils.time", {"dateutil.parser", "tzlocal", "yaml", "attr", "pandas", "numpy"}),
+    ("volttron.client.messaging.health", {"dateutil.parser", "yaml", "attr", "gevent", "pandas", "numpy"}),
+    ("volttron.client.vip.agent", {"dateutil.parser", "tzlocal", "yaml", "attr", "fastapi", "pandas", "numpy"}),
+])
+def test_heavy_modules_load_lazily(module, deferred):
+    """Test that importing a module leaves its heavy dependencies for first use."""
+    report = import_report(module)
+    assert module in report
+    assert not deferred & report.keys()
@@ -0,0 +1,46 @@
+"""
+Tests for the JSON helpers.
+"""
+import random
+import re
+
+from volttron.utils.jsonapi import parse_json_config, strip_comments
+
+# The backtracking regex strip_comments used to be built on
+_REGEX = re.compile(r'((["\'])(?:\\?.)*?\2)|(/\*.*?\*/)|((?:#|//).*?(?=\n|$))', re.MULTILINE | re.DOTALL)
+
+def _regex_strip_comments(string):
+    return _REGEX.sub(lambda match: match.group(1) or "", string)
+
+def test_strip_comments():
+    """Test that comments are removed and strings are kept."""
+    config = '''{
+        # devices
+        "url": "http://host/a#b", // the server
+        /* multi
+           line */ "name": "it's \\"quoted\\" // not a comment",
+        'single': '/* kept */'
+    }'''
+    assert parse_json_config(config.replace("'single': '/* kept */'", '"x": 1')) == {
+        "url": "http://host/a#b",
+        "name": 'it\'s "quoted" // not a comment',
+        "x": 1
+    }
+    assert strip_comments(config) == _regex_strip_comments(config)
+
+def test_strip_comments_matches_regex():
+    """Test that the linear scanner agrees with the regex on random and edge case input."""
+    cases = ['"a\\"', '"a\\"b"', "'unterminated # x", "/* open", "a/b/*/c*/d", '"\\\\"#x', "x//y\nz#w", ""]
+    rng = random.Random(42)
+    alphabet = ['"', "'", "\\", "/", "*", "#", "\n", "a", " "]
+    cases += ["".join(rng.choice(alphabet) for _ in range(rng.randrange(40))) for _ in range(20000)]
+    for case in cases:
+        assert strip_comments(case) == _regex_strip_comments(case), repr(case)
+
+def test_strip_comments_large_input():
+    """Test that long strings and many comments are handled in linear time."""
+    registry = "[\n" + ",\n".join(f'  // point {i}\n  {{"point": "p{i}", "note": "{"x" * 200}"}}' for i in range(20000))
+    registry += "\n]"
+    assert len(parse_json_config(registry)) == 20000
+    # An unterminated quote followed by a long text made the regex backtrack quadratically
+    assert strip_comments('"' + "\\a" * 50000) == '"' + "\\a" * 50000
@@ -0,0 +1,129 @@
+"""
+Tests for in-process delivery of publishes between co-located agents.
+"""
+import threading
+
+import gevent
+
+from volttron.client.vip.agent.local_bus import LocalBus, get_local_bus
+from volttron.client.vip.agent.subsystems.pubsub import PubSub
+from volttron.messagebus.fastapi.ids import IdGenerator
+
+class Member:
+    """PubSub stand-in that records deliveries."""
+
+    def __init__(self):
+        self.delivered = []
+        self.threads = set()
+
+    def deliver(self, sender, topic, headers, message):
+        self.delivered.append((sender, topic, message))
+        self.threads.add(threading.get_ident())
+
+class FakeCore:
+    """Core stand-in for a connected agent that records sent frames."""
+
+    def __init__(self, identity, address):
+        self.identity = identity
+        self.address = address
+        self.context = None
+        self.connected = True
+        self.ids = IdGenerator(f"{identity}-")
+        self.sent = []
+        self.startup = []
+
+    def register_handler(self, message_type, handler):
+        pass
+
+    def onstartup(self, callback):
+        self.startup.append(callback)
+
+    def onstop(self, callback):
+        pass
+
+    def send(self, message):
+        self.sent.append(message)
+
+def test_publish_reaches_only_matching_subscribers():
+    """Test that only members subscribed to a prefix of the topic are served and excluded."""
+    bus = LocalBus()
+    devices, building, other, sender = Member(), Member(), Member(), Member()
+    bus.join("devices", devices, ["devices/"])
+    bus.join("building", building)
+    bus.subscribe("building", "devices/building1")
+    bus.join("other", other, ["analysis"])
+    bus.join("sender", sender, ["devices/"])
+
+    assert sorted(bus.publish("sender", "devices/building1/temp", {}, 72)) == ["building", "devices"]
+    # Deliveries run once the publisher yields
+    assert not devices.delivered
+    gevent.sleep(0)
+    assert devices.delivered == [("sender", "devices/building1/temp", 72)]
+    assert building.delivered == devices.delivered
+    assert not other.delivered and not sender.delivered
+
+    assert bus.publish("sender", "campus/x", {}, 1) == []
+
+def test_unsubscribe_and_leave():
+    """Test that members stop receiving once unsubscribed or gone."""
+    bus = LocalBus()
+    first, second = Member(), Member()
+    bus.join("first", first, ["devices/"])
+    bus.join("second", second, ["devices/", "analysis"])
+
+    bus.unsubscribe("first", "devices/")
+    assert bus.publish("x", "devices/a", {}, 1) == ["second"]
+    bus.leave("second")
+    assert bus.publish("x", "devices/a", {}, 1) == []
+    assert bus.publish("x", "analysis", {}, 1) == []
+
+    # Subscriptions of agents not on the bus are ignored
+    bus.subscribe("stranger", "devices/")
+    assert bus.publish("x", "devices/a", {}, 1) == []
+
+def test_delivery_runs_on_the_subscriber_thread():
+    """Test that a member that joined from another thread is served on that thread."""
+    bus = LocalBus()
+    member = Member()
+    joined = threading.Event()
+
+    def run_agent():
+        bus.join("threaded", member, ["devices/"])
+        joined.set()
+        with gevent.Timeout(5, False):
+            while not member.delivered:
+                gevent.sleep(0.01)
+
+    agent_thread = threading.Thread(target=run_agent)
+    agent_thread.start()
+    joined.wait(5)
+    assert bus.publish("publisher", "devices/a", {}, 1) == ["threaded"]
+    agent_thread.join(5)
+    assert member.delivered == [("publisher", "devices/a", 1)]
+    assert member.threads == {agent_thread.ident}
+
+def test_pubsub_excludes_local_subscribers():
+    """Test that publish frames exclude only the co-located agents that were served."""
+    address = "ws://local-bus-test"
+    publisher = PubSub(core=FakeCore("publisher", address))
+    subscriber = PubSub(core=FakeCore("subscriber", address))
+    bystander = PubSub(core=FakeCore("bystander", address))
+    received = []
+    subscriber.subscribe("pubsub", "devices/", lambda *args: received.append(args[3:]))
+    for pubsub in (publisher, subscriber, bystander):
+        for callback in pubsub.core.startup:
+            callback()
+
+    publisher.publish("pubsub", "devices/a", {"h": 1}, 5)
+    gevent.sleep(0)
+    assert received == [("devices/a", {"h": 1}, 5)]
+    assert publisher.core.sent[-1]["exclude"] == ["subscriber"]
+
+    publisher.publish("pubsub", "analysis/a", {}, 6)
+    assert "exclude" not in publisher.core.sent[-1]
+
+    subscriber.unsubscribe("pubsub", "devices/")
+    publisher.publish("pubsub", "devices/a", {}, 7)
+    gevent.sleep(0)
+    assert len(received) == 1
+    assert get_local_bus(address) is get_local_bus(address)
@@ -0,0 +1,42 @@
+"""
+Tests for the VIP Message class.
+"""
+import json
+
+import pytest
+
+from volttron.client.vip.message import Message
+
+def test_message_is_slotted():
+    """Test that messages carry no per-instance dictionary."""
+    message = Message(peer="agent-1", subsystem="pubsub")
+    assert not hasattr(message, "__dict__")
+    with pytest.raises(AttributeError):
+        message.extra = True
+
+def test_ids_are_lazy_and_increasing():
+    """Test that IDs are assigned on first use from a counter."""
+    first = Message()
+    second = Message()
+    assert first._id is None
+
+    # IDs share a prefix and follow the order in which they are first needed
+    second_prefix, second_count = second.id.rsplit("-", 1)
+    first_prefix, first_count = first.id.rsplit("-", 1)
+    assert first_prefix == second_prefix
+    assert int(first_count, 16) == int(second_count, 16) + 1
+    assert first.id == f"{first_prefix}-{first_count}"
+
+    assert Message(msg_id="abc").id == "abc"
+
+def test_dict_and_json_round_trip():
+    """Test converting messages to and from dictionaries and JSON."""
+    message = Message(peer="agent-1", subsystem="pubsub", args=["devices/a", 1], user="admin")
+    dct = message.to_dict()
+    assert dct == {"peer": "agent-1", "subsystem": "pubsub", "args": ["devices/a", 1],
+                   "id": message.id, "user": "admin"}
+
+    text = message.to_json()
+    assert " " not in text
+    assert json.loads(text) == dct
+    assert Message.from_json(text).to_dict() == dct
@@ -0,0 +1,173 @@
+"""
+Tests for multiplexed multi-identity connections.
+"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from volttron.messagebus.fastapi.core.loop import CoreLoop
+from volttron.messagebus.fastapi.core.ratelimit import rate_limiter
+from volttron.messagebus.fastapi.server.app import create_app
+from volttron.messagebus.fastapi.websocket.framing import (build_frame, encode_field, insert_field,
+                                                           insert_header_field, split_frame)
+
+@pytest.fixture
+def client():
+    """Create a test client for the FastAPI application."""
+    return TestClient(create_app())
+
+def test_insert_field():
+    """Test that fields are added to encoded frames without decoding them."""
+    field = encode_field("identity", "agent-1")
+    assert json.loads(insert_field('{"type":"pong","id":"1"}', field)) == \
+        {"identity": "agent-1", "type": "pong", "id": "1"}
+    assert json.loads(insert_field("{}", field)) == {"identity": "agent-1"}
+    with pytest.raises(ValueError):
+        insert_field("[1]", field)
+
+    frame = insert_header_field(build_frame({"type": "publish"}, b"\x01\x02"), field)
+    header, payload = split_frame(frame)
+    assert header == {"identity": "agent-1", "type": "publish"}
+    assert bytes(payload) == b"\x01\x02"
+
+def test_identities_share_connection(client):
+    """Test that frames are routed by identity in both directions."""
+    with client.websocket_connect("/messagebus/v1/mux/host-1?identities=agent-a,agent-b") as websocket:
+        welcome = websocket.receive_json()
+        assert welcome["multiplexed"] is True
+        assert welcome["identities"] == ["agent-a", "agent-b"]
+        assert welcome["rejected"] == {}
+
+        websocket.send_json({"identity": "agent-b", "type": "ping", "id": "1"})
+        assert websocket.receive_json() == {"type": "pong", "id": "1", "identity": "agent-b"}
+
+        websocket.send_json({"identity": "agent-a", "type": "subscribe", "id": "2", "topic": "devices/a"})
+        assert websocket.receive_json()["identity"] == "agent-a"
+        websocket.send_json({"identity": "agent-b", "type": "publish", "id": "3", "topic": "devices/a",
+                             "data": {"temperature": 72.5}})
+        received = [websocket.receive_json() for _ in range(2)]
+        delivery = next(message for message in received if message["type"] == "message")
+        confirm = next(message for message in received if message["type"] == "publish_confirm")
+        assert delivery["identity"] == "agent-a"
+        assert delivery["sender"] == "agent-b"
+        assert delivery["data"] == {"temperature": 72.5}
+        assert confirm["identity"] == "agent-b"
+
+def test_unregistered_identity_rejected(client):
+    """Test that frames must name an identity registered on the connection."""
+    with client.websocket_connect("/messagebus/v1/mux/host-2?identities=agent-c") as websocket:
+        websocket.receive_json()
+        for frame in ({"identity": "other", "type": "ping", "id": "1"}, {"type": "ping", "id": "2"}):
+            websocket.send_json(frame)
+            response = websocket.receive_json()
+            assert response["type"] == "error"
+            assert response["id"] == frame["id"]
+            assert "not registered" in response["error"]
+
+        websocket.send_bytes(build_frame({"identity": "other", "type": "publish", "topic": "t"}, b"{}"))
+        assert "not registered" in websocket.receive_json()["error"]
+
+def test_register_and_unregister(client):
+    """Test that identities can join and leave a connection."""
+    with client.websocket_connect("/messagebus/v1/single-agent") as single, \
+            client.websocket_connect("/messagebus/v1/mux/host-3") as websocket:
+        single.receive_json()
+        assert websocket.receive_json()["identities"] == []
+
+        websocket.send_json({"identity": "agent-d", "type": "register", "id": "1"})
+        assert websocket.receive_json() == {"type": "register_confirm", "id": "1", "identity": "agent-d"}
+        websocket.send_json({"identity": "agent-d", "type": "ping", "id": "2"})
+        assert websocket.receive_json()["type"] == "pong"
+
+        # An identity connected elsewhere cannot be registered again
+        websocket.send_json({"identity": "single-agent", "type": "register", "id": "3"})
+        response = websocket.receive_json()
+        assert response["type"] == "error"
+        assert "already connected" in response["error"]
+
+        websocket.send_json({"identity": "agent-d", "type": "unregister", "id": "4"})
+        assert websocket.receive_json()["type"] == "unregister_confirm"
+        websocket.send_json({"identity": "agent-d", "type": "ping", "id": "5"})
+        assert websocket.receive_json()["type"] == "error"
+
+    # Identities are released when the connection closes
+    with client.websocket_connect("/messagebus/v1/mux/host-4?identities=agent-d,single-agent") as websocket:
+        assert websocket.receive_json()["identities"] == ["agent-d", "single-agent"]
+
+def test_binary_delivery_is_stamped(client):
+    """Test that binary payload frames carry the identity in their header."""
+    with client.websocket_connect("/messagebus/v1/mux/host-5?identities=sub,pub&framing=binary") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"identity": "sub", "type": "subscribe", "id": "1", "topic": "devices/b"})
+        websocket.receive_json()
+
+        payload = b'{"value":1}'
+        websocket.send_bytes(build_frame({"identity": "pub", "type": "publish", "id": "2",
+                                          "topic": "devices/b"}, payload))
+        header, delivered = split_frame(websocket.receive_bytes())
+        assert header["identity"] == "sub"
+        assert header["sender"] == "pub"
+        assert bytes(delivered) == payload
+        assert websocket.receive_json() == {"type": "publish_confirm", "id": "2", "topic": "devices/b",
+                                            "identity": "pub"}
+
+def test_flow_control_per_identity(client):
+    """Test that deliveries held for one identity are not replaced by another's."""
+    with client.websocket_connect("/messagebus/v1/mux/host-6?identities=sub-a,sub-b,pub") as websocket:
+        websocket.receive_json()
+        for number, identity in enumerate(("sub-a", "sub-b")):
+            websocket.send_json({"identity": identity, "type": "subscribe", "id": f"s{number}", "topic": "devices/c"})
+            websocket.receive_json()
+            websocket.send_json({"identity": identity, "type": "credit", "messages": 0})
+
+        websocket.send_json({"identity": "pub", "type": "publish", "id": "1", "topic": "devices/c", "data": 1})
+        assert websocket.receive_json()["type"] == "publish_confirm"
+
+        # Credit for one identity releases only its own delivery
+        websocket.send_json({"identity": "sub-b", "type": "credit", "messages": 1})
+        delivery = websocket.receive_json()
+        assert (delivery["identity"], delivery["data"]) == ("sub-b", 1)
+        websocket.send_json({"identity": "sub-a", "type": "credit", "messages": 1})
+        delivery = websocket.receive_json()
+        assert (delivery["identity"], delivery["data"]) == ("sub-a", 1)
+
+def test_delayed_identity_does_not_stall_others():
+    """Test that a publish delayed by a rate limit holds up only its own identity."""
+    try:
+        client = TestClient(create_app(rate_limits={"agents": {"flood": {"rate": 1, "burst": 1, "action": "delay"}}}))
+        with client.websocket_connect("/messagebus/v1/mux/host-7?identities=flood,quick") as websocket:
+            websocket.receive_json()
+            for number in range(2):
+                websocket.send_json({"identity": "flood", "type": "publish", "id": f"p{number}",
+                                     "topic": "devices/d", "data": number})
+            assert websocket.receive_json()["id"] == "p0"
+
+            # The second publish waits about a second for a token
+            websocket.send_json({"identity": "quick", "type": "ping", "id": "1"})
+            assert websocket.receive_json() == {"type": "pong", "id": "1", "identity": "quick"}
+            response = websocket.receive_json()
+            assert (response["type"], response["id"]) == ("publish_confirm", "p1")
+    finally:
+        rate_limiter.configure(None)
+
+def test_failing_frame_does_not_stall_identities(client):
+    """Test that a frame whose handler fails is answered with an error and processing goes on."""
+
+    async def explode(core_loop, message):
+        raise ValueError("bad frame")
+
+    CoreLoop.register_handler("explode", explode)
+    try:
+        with client.websocket_connect("/messagebus/v1/mux/host-8?identities=bad,good") as websocket:
+            websocket.receive_json()
+            websocket.send_json({"identity": "bad", "type": "explode", "id": "1"})
+            response = websocket.receive_json()
+            assert (response["type"], response["id"], response["identity"]) == ("error", "1", "bad")
+            assert "bad frame" in response["error"]
+
+            for number, identity in enumerate(("bad", "good"), 2):
+                websocket.send_json({"identity": identity, "type": "ping", "id": str(number)})
+                assert websocket.receive_json() == {"type": "pong", "id": str(number), "identity": identity}
+    finally:
+        CoreLoop.unregister_handler("explode")
@@ -0,0 +1,72 @@
+"""
+Tests for message priority classification and priority lanes.
+"""
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock
+
+from volttron.messagebus.fastapi.priority import (PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL,
+                                                  PriorityRules)
+from volttron.messagebus.fastapi.websocket.writer import BatchSettings, FrameWriter
+
+def test_classify_defaults():
+    """Test that control frames are high priority and publishes normal by default."""
+    rules = PriorityRules()
+    assert rules.classify({"type": "rpc"}) == PRIORITY_HIGH
+    assert rules.classify({"type": "publish", "topic": "devices/a"}) == PRIORITY_NORMAL
+
+def test_classify_rules():
+    """Test that the frame field beats topic rules, and the longest prefix wins."""
+    rules = PriorityRules()
+    rules.configure({"topics": {"devices/": "low", "devices/alarms/": "high"}})
+    assert rules.classify({"type": "publish", "topic": "devices/a"}) == PRIORITY_LOW
+    assert rules.classify({"type": "publish", "topic": "devices/alarms/fire"}) == PRIORITY_HIGH
+    assert rules.classify({"type": "publish", "topic": "devices/a", "priority": "high"}) == PRIORITY_HIGH
+    assert rules.classify({"type": "publish", "topic": "devices/a", "priority": "urgent"}) == PRIORITY_LOW
+    # Topics are classified before they are validated
+    assert rules.classify({"type": "publish", "topic": 123}) == PRIORITY_NORMAL
+
+    with pytest.raises(ValueError):
+        rules.configure({"topics": {"devices/": "urgent"}})
+
+@pytest.mark.asyncio
+async def test_waiting_writes_served_by_priority():
+    """Test that queued writes are sent highest priority first."""
+    mock_websocket = AsyncMock()
+    release = asyncio.Event()
+    sent = []
+
+    async def send_text(text):
+        sent.append(json.loads(text)["id"])
+        if len(sent) == 1:
+            await release.wait()
+
+    mock_websocket.send_text.side_effect = send_text
+    writer = FrameWriter(mock_websocket)
+
+    first = asyncio.create_task(writer.send_json({"id": "telemetry-1"}, PRIORITY_LOW))
+    await asyncio.sleep(0)
+    waiting = [
+        asyncio.create_task(writer.send_json({"id": "telemetry-2"}, PRIORITY_LOW)),
+        asyncio.create_task(writer.send_json({"id": "setpoint"}, PRIORITY_HIGH))
+    ]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, *waiting)
+
+    assert sent == ["telemetry-1", "setpoint", "telemetry-2"]
+
+@pytest.mark.asyncio
+async def test_high_priority_flushes_batch():
+    """Test that a high priority frame flushes the batch ahead of queued frames."""
+    mock_websocket = AsyncMock()
+    writer = FrameWriter(mock_websocket, batching=BatchSettings(delay_us=10_000_000))
+
+    await writer.send_json({"id": "telemetry"}, PRIORITY_LOW)
+    mock_websocket.send_text.assert_not_called()
+
+    await writer.send_json({"id": "setpoint"}, PRIORITY_HIGH)
+    batch = json.loads(mock_websocket.send_text.call_args.args[0])
+    assert [msg["id"] for msg in batch] == ["setpoint", "telemetry"]
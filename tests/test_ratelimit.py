@@ -0,0 +1,74 @@
+"""
+Tests for publish rate limiting in the core loop.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock
+
+from volttron.messagebus.fastapi.core.loop import CoreLoop
+from volttron.messagebus.fastapi.core.ratelimit import RateLimiter, RateLimitRule, rate_limiter
+from volttron.messagebus.fastapi.router.router import MessageRouter
+from volttron.messagebus.fastapi.server.app import create_app
+
+@pytest.fixture
+def limited_loop():
+    """Create a core loop with its own router and rate limiter."""
+    loop = CoreLoop("flooding-driver", AsyncMock())
+    loop.router = MessageRouter()
+    loop.rate_limiter = RateLimiter()
+    return loop
+
+async def publish(loop, topic="devices/a"):
+    """Publish a message through the core loop."""
+    return await loop.handle_message({"type": "publish", "id": "1", "topic": topic, "data": 1})
+
+def test_invalid_rule():
+    """Test that invalid rules are rejected."""
+    with pytest.raises(ValueError):
+        RateLimitRule(rate=0, burst=1)
+    with pytest.raises(ValueError):
+        RateLimitRule(rate=1, burst=1, action="ignore")
+
+def test_unconfigured_limiter_allows_everything():
+    """Test that no limits are applied until configured."""
+    limiter = RateLimiter()
+    assert not limiter.enabled
+    assert limiter.check("agent", "devices/a") == (None, 0.0)
+
+@pytest.mark.asyncio
+async def test_reject_over_limit(limited_loop):
+    """Test that publishes beyond the burst are rejected and counted."""
+    limited_loop.rate_limiter.configure({"agent": {"rate": 0.01, "burst": 2}})
+    assert (await publish(limited_loop))["type"] == "publish_confirm"
+    assert (await publish(limited_loop))["type"] == "publish_confirm"
+    response = await publish(limited_loop)
+    assert response["type"] == "error"
+    assert "Rate limit" in response["error"]
+    assert limited_loop.rate_limiter.counters["flooding-driver"] == {"allowed": 2, "rejected": 1}
+
+@pytest.mark.asyncio
+async def test_drop_topic_limit(limited_loop):
+    """Test that topic limits only apply to matching topics and can drop publishes."""
+    limited_loop.rate_limiter.configure({"topics": {"devices/": {"rate": 0.01, "burst": 1, "action": "drop"}}})
+    assert "dropped" not in await publish(limited_loop)
+    assert (await publish(limited_loop))["dropped"] is True
+    assert "dropped" not in await publish(limited_loop, topic="alerts/a")
+
+@pytest.mark.asyncio
+async def test_delay_over_limit(limited_loop):
+    """Test that delayed publishes wait for a token and are then published."""
+    limited_loop.rate_limiter.configure({"agents": {"flooding-driver": {"rate": 50, "burst": 1, "action": "delay"}}})
+    await publish(limited_loop)
+    response = await publish(limited_loop)
+    assert response["type"] == "publish_confirm"
+    assert limited_loop.rate_limiter.counters["flooding-driver"] == {"allowed": 1, "delayed": 1}
+
+def test_rate_limit_stats_endpoint():
+    """Test that limits and counters are exposed over HTTP."""
+    try:
+        client = TestClient(create_app(rate_limits={"agent": {"rate": 100, "burst": 10}}))
+        stats = client.get("/stats/rate_limits").json()
+        assert stats["enabled"]
+        assert stats["agent"] == {"rate": 100.0, "burst": 10.0, "action": "reject"}
+    finally:
+        rate_limiter.configure(None)
@@ -0,0 +1,157 @@
+"""
+Tests for the MessageRouter subscription store.
+"""
+import json
+
+import pytest
+from unittest.mock import AsyncMock
+
+from volttron.messagebus.fastapi.router.router import MessageRouter
+from volttron.messagebus.fastapi.core.loop import CoreLoop
+from volttron.messagebus.fastapi.websocket.framing import build_frame, split_frame
+
+def test_subscribe_indexes_both_directions():
+    """Test that subscribing updates the topic and per-agent indexes."""
+    router = MessageRouter()
+    router.subscribe("devices/a", "agent-1")
+    router.subscribe("devices/b", "agent-1")
+    router.subscribe("devices/a", "agent-2")
+
+    assert router.subscriptions["devices/a"] == {"agent-1", "agent-2"}
+    assert router.get_subscriptions("agent-1") == {"devices/a", "devices/b"}
+    assert router.get_subscriptions("agent-2") == {"devices/a"}
+
+def test_unsubscribe():
+    """Test unsubscribing removes empty topics and agent entries."""
+    router = MessageRouter()
+    router.subscribe("devices/a", "agent-1")
+
+    assert router.unsubscribe("devices/a", "agent-1")
+    assert "devices/a" not in router.subscriptions
+    assert "agent-1" not in router.agent_topics
+
+    # Unsubscribing again is a no-op
+    assert not router.unsubscribe("devices/a", "agent-1")
+
+def test_unregister_agent_clears_subscriptions():
+    """Test that unregistering an agent drops all of its subscriptions."""
+    router = MessageRouter()
+    router.register_agent("agent-1", AsyncMock())
+    router.subscribe("devices/a", "agent-1")
+    router.subscribe("devices/b", "agent-1")
+    router.subscribe("devices/b", "agent-2")
+
+    router.unregister_agent("agent-1")
+
+    assert "agent-1" not in router.connections
+    assert "agent-1" not in router.agent_topics
+    assert "devices/a" not in router.subscriptions
+    assert router.subscriptions["devices/b"] == {"agent-2"}
+
+@pytest.mark.asyncio
+async def test_core_loop_uses_router_store():
+    """Test that the core loop keeps no subscription state of its own."""
+    loop = CoreLoop("view-agent", AsyncMock())
+    loop.router = MessageRouter()
+    await loop.start()
+    await loop.handle_message({"type": "subscribe", "id": "1", "topic": "devices/a"})
+
+    assert loop.subscriptions == {"devices/a": {"view-agent"}}
+
+    await loop.stop()
+    assert loop.subscriptions == {}
+    assert not loop.router.subscriptions
+
+@pytest.mark.asyncio
+async def test_publish_payload_per_framing():
+    """Test that payloads are delivered in each subscriber's framing, encoded once."""
+    router = MessageRouter()
+    text_subscribers = [AsyncMock(framing="json") for _ in range(2)]
+    binary_subscribers = [AsyncMock(framing="binary") for _ in range(2)]
+    for i, connection in enumerate(text_subscribers + binary_subscribers):
+        router.register_agent(f"agent-{i}", connection)
+        router.subscribe("devices/a", f"agent-{i}")
+
+    frame = build_frame({"type": "publish", "topic": "devices/a"}, b'{"temperature":72.5}')
+    _, payload = split_frame(frame)
+    await router.publish_payload("devices/a", payload, "publisher")
+
+    texts = [c.deliver.call_args.args[1] for c in text_subscribers]
+    assert texts[0] is texts[1]
+    assert json.loads(texts[0])["data"] == {"temperature": 72.5}
+
+    frames = [c.deliver.call_args.args[1] for c in binary_subscribers]
+    assert frames[0] is frames[1]
+    header, delivered = split_frame(frames[0])
+    assert header == {"type": "message", "topic": "devices/a", "sender": "publisher"}
+    assert bytes(delivered) == b'{"temperature":72.5}'
+
+@pytest.mark.asyncio
+async def test_publish_skips_excluded_agents():
+    """Test that agents already served in-process are not sent the publish again."""
+    loop = CoreLoop("local-publisher", AsyncMock())
+    loop.router = MessageRouter()
+    connections = {agent_id: AsyncMock() for agent_id in ("co-located", "remote")}
+    for agent_id, connection in connections.items():
+        loop.router.register_agent(agent_id, connection)
+        loop.router.subscribe("devices/a", agent_id)
+
+    response = await loop.handle_message({"type": "publish", "id": "1", "topic": "devices/a",
+                                          "data": 1, "exclude": ["co-located"]})
+    assert response["type"] == "publish_confirm"
+    connections["co-located"].deliver.assert_not_called()
+    connections["remote"].deliver.assert_called_once()
+
+    response = await loop.handle_message({"type": "publish", "id": "2", "topic": "devices/a",
+                                          "data": 1, "exclude": "co-located"})
+    assert response["type"] == "error"
+
+def test_prefix_subscriptions_match_nested_topics():
+    """Test that a subscription matches every topic it is a prefix of."""
+    router = MessageRouter()
+    router.subscribe("devices/", "agent-1")
+    router.subscribe("devices/a", "agent-2")
+    router.subscribe_many(["devices/a/temp", "analysis"], "agent-3")
+
+    assert router.match("devices/y") == {"agent-1"}
+    assert router.match("devices/abc/x") == {"agent-1", "agent-2"}
+    assert router.match("devices/a/temperature") == {"agent-1", "agent-2", "agent-3"}
+    assert router.match("device") == set()
+    assert router.match("analysis/x") == {"agent-3"}
+
+    router.unregister_agent("agent-1")
+    router.unsubscribe_many(["devices/a/temp"], "agent-3")
+    assert router.match("devices/y") == set()
+    assert router.match("devices/a/temperature") == {"agent-2"}
+
+@pytest.mark.asyncio
+async def test_subscribers_change_during_publish():
+    """Test that subscribing while a publish is being delivered does not disturb it."""
+    router = MessageRouter()
+    first, late = AsyncMock(), AsyncMock()
+
+    async def subscribe_late(*args):
+        router.register_agent("late", late)
+        router.subscribe("devices/a", "late")
+
+    first.deliver.side_effect = subscribe_late
+    router.register_agent("first", first)
+    router.subscribe("devices/a", "first")
+
+    await router.publish("devices/a", 1, "publisher")
+    first.deliver.assert_called_once()
+    late.deliver.assert_not_called()
+    assert router.match("devices/a") == {"first", "late"}
+
+def test_prefix_index_looks_up_stored_lengths():
+    """Test that the index only tracks the lengths of stored last segments."""
+    router = MessageRouter()
+    for number in range(100):
+        router.subscribe(f"devices/device{number}", f"agent-{number}")
+    router.subscribe("devices/", "all")
+
+    # String prefix semantics: "devices/device4" is a prefix of "devices/device42"
+    assert router.match("devices/device42/temp") == {"agent-4", "agent-42", "all"}
+    assert router.prefixes._root.children["devices"].lengths == {0: 1, 7: 10, 8: 90}
+    router.unregister_agent("all")
+    assert router.prefixes._root.children["devices"].lengths == {7: 10, 8: 90}
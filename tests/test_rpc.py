@@ -0,0 +1,128 @@
+"""
+Tests for the agent RPC subsystem.
+"""
+import gevent
+import pytest
+
+from volttron.client.vip.agent import RPC
+from volttron.client.vip.agent.errors import RemoteError, VIPError
+from volttron.messagebus.fastapi.ids import IdGenerator
+
+class FakeCore:
+    """Core stand-in that records sent frames and registered callbacks."""
+
+    def __init__(self, identity="caller"):
+        self.identity = identity
+        self.ids = IdGenerator("test-")
+        self.sent = []
+        self.handlers = {}
+        self.setup_callbacks = []
+        self.stop_callbacks = []
+
+    def register_handler(self, message_type, handler):
+        self.handlers[message_type] = handler
+
+    def onsetup(self, callback):
+        self.setup_callbacks.append(callback)
+
+    def onstop(self, callback):
+        self.stop_callbacks.append(callback)
+
+    def send(self, message):
+        self.sent.append(message)
+
+def test_call_resolved_by_response():
+    """Test that a call is sent at once and resolved by its response."""
+    core = FakeCore()
+    rpc = RPC(core=core)
+    first = rpc.call("peer", "add", 1, 2)
+    second = rpc.call("peer", "echo", text="hi")
+
+    assert [frame["params"] for frame in core.sent] == [[1, 2], {"text": "hi"}]
+    assert core.sent[0]["target"] == "peer" and core.sent[0]["sender"] == "caller"
+
+    # Responses may arrive out of order
+    core.handlers["rpc_response"]({"type": "rpc_response", "id": core.sent[1]["id"], "result": "hi"})
+    core.handlers["rpc_response"]({"type": "rpc_response", "id": core.sent[0]["id"], "result": 3})
+    assert first.get(timeout=1) == 3
+    assert second.get(timeout=1) == "hi"
+
+def test_mixed_arguments_rejected():
+    """Test that positional and keyword arguments cannot be combined."""
+    rpc = RPC(core=FakeCore())
+    with pytest.raises(ValueError):
+        rpc.call("peer", "method", 1, key=2)
+
+def test_remote_errors():
+    """Test that errors from the peer and from the server fail the call."""
+    core = FakeCore()
+    rpc = RPC(core=core)
+    remote = rpc.call("peer", "fail")
+    undeliverable = rpc.call("missing", "method")
+
+    core.handlers["rpc_response"]({"type": "rpc_response", "id": core.sent[0]["id"],
+                                   "error": {"message": "boom", "type": "ValueError"}})
+    core.handlers["error"]({"type": "error", "id": core.sent[1]["id"], "error": "Unknown agent missing"})
+
+    with pytest.raises(RemoteError) as info:
+        remote.get(timeout=1)
+    assert info.value.exc_type == "ValueError"
+    assert str(info.value) == "ValueError: boom"
+    with pytest.raises(VIPError):
+        undeliverable.get(timeout=1)
+
+def test_call_timeout():
+    """Test that calls without a response fail once their deadline passes."""
+    core = FakeCore()
+    rpc = RPC(core=core)
+    slow = rpc.call_with_timeout(0.05, "peer", "slow")
+    slower = rpc.call_with_timeout(0.2, "peer", "slower")
+
+    with pytest.raises(TimeoutError):
+        slow.get(timeout=1)
+    assert not slower.ready()
+    # A late response is discarded
+    core.handlers["rpc_response"]({"type": "rpc_response", "id": core.sent[0]["id"], "result": 1})
+    with pytest.raises(TimeoutError):
+        slower.get(timeout=1)
+
+def test_stop_fails_pending_calls():
+    """Test that calls still in flight fail when the agent stops."""
+    core = FakeCore()
+    rpc = RPC(core=core)
+    pending = rpc.call("peer", "method")
+    for callback in core.stop_callbacks:
+        callback()
+    with pytest.raises(ConnectionError):
+        pending.get(timeout=1)
+
+def test_exported_methods_served():
+    """Test that exported methods answer calls from peers."""
+
+    class Owner:
+        @RPC.export
+        def add(self, a, b):
+            return a + b
+
+        @RPC.export("renamed")
+        def echo(self, text):
+            return text
+
+    core = FakeCore("callee")
+    rpc = RPC(core=core, owner=Owner())
+    for callback in core.setup_callbacks:
+        callback(core)
+    rpc.export(lambda: "direct", "direct")
+
+    requests = [("add", [1, 2]), ("renamed", {"text": "hi"}), ("direct", []), ("missing", [])]
+    for number, (method, params) in enumerate(requests):
+        core.handlers["rpc"]({"type": "rpc", "id": str(number), "method": method,
+                              "params": params, "sender": "caller"})
+    gevent.sleep(0)
+
+    responses = {frame["id"]: frame for frame in core.sent}
+    assert responses["0"]["result"] == 3
+    assert responses["1"]["result"] == "hi"
+    assert responses["2"]["result"] == "direct"
+    assert responses["3"]["error"]["type"] == "NameError"
+    assert all(frame["target"] == "caller" and frame["sender"] == "callee" for frame in core.sent)
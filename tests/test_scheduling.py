@@ -0,0 +1,74 @@
+"""
+Tests for the job scheduler.
+"""
+import time
+from datetime import datetime, timedelta
+
+import gevent
+import pytest
+
+from volttron.utils.scheduling import Scheduler, cron, periodic
+
+def test_periodic_deadlines_do_not_drift():
+    """Test that periodic deadlines are fixed multiples of the period."""
+    deadlines = periodic(timedelta(seconds=5), start=100.0)
+    assert [next(deadlines) for _ in range(3)] == [100.0, 105.0, 110.0]
+    with pytest.raises(ValueError):
+        next(periodic(0))
+
+def test_cron_deadlines():
+    """Test cron expressions against known dates."""
+    start = datetime(2024, 1, 1, 12, 7)  # a Monday
+    deadlines = cron("*/15 12-13 * * 1-5", start)
+    assert [datetime.fromtimestamp(next(deadlines)) for _ in range(3)] == [
+        datetime(2024, 1, 1, 12, 15), datetime(2024, 1, 1, 12, 30), datetime(2024, 1, 1, 12, 45)]
+
+    # Weekends are skipped, and 7 is Sunday
+    deadlines = cron("0 9 * * 6,7", start)
+    assert [datetime.fromtimestamp(next(deadlines)) for _ in range(2)] == [
+        datetime(2024, 1, 6, 9, 0), datetime(2024, 1, 7, 9, 0)]
+
+    # When both day fields are restricted, either may match
+    deadlines = cron("0 0 15 * 3", start)
+    assert [datetime.fromtimestamp(next(deadlines)) for _ in range(2)] == [
+        datetime(2024, 1, 3), datetime(2024, 1, 10)]
+
+    assert datetime.fromtimestamp(next(cron("30 6 29 2 *", start))) == datetime(2024, 2, 29, 6, 30)
+    assert list(cron("0 0 30 2 *", start)) == []
+    with pytest.raises(ValueError):
+        cron("61 * * * *")
+
+def test_scheduler_runs_jobs_in_deadline_order():
+    """Test one-shot jobs, cancellation and ordering."""
+    scheduler = Scheduler()
+    ran = []
+    now = time.time()
+    scheduler.schedule(now + 0.06, ran.append, "late")
+    scheduler.schedule(now + 0.02, ran.append, "early")
+    scheduler.schedule(timedelta(seconds=0.04), ran.append, "cancelled").cancel()
+    scheduler.start()
+    gevent.sleep(0.1)
+    # A job earlier than all others wakes the scheduler up
+    scheduler.schedule(time.time() + 0.01, ran.append, "added")
+    gevent.sleep(0.05)
+    scheduler.stop()
+    assert ran == ["early", "late", "added"]
+
+def test_periodic_job_skips_missed_runs():
+    """Test that a slow periodic job keeps its schedule instead of piling up."""
+    scheduler = Scheduler()
+    runs = []
+
+    def slow():
+        runs.append(time.time())
+        time.sleep(0.05)  # blocks the scheduler for more than one period
+
+    job = scheduler.schedule(periodic(0.02, start=time.time()), slow)
+    scheduler.start()
+    gevent.sleep(0.2)
+    job.cancel()
+    gevent.sleep(0.05)
+    scheduler.stop()
+
+    assert 2 <= len(runs) <= 5
+    assert len(scheduler) == 0
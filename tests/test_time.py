@@ -0,0 +1,133 @@
+"""
+Tests for the timestamp utilities.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+import pytz
+from dateutil.parser import parse
+from dateutil.tz import tzoffset
+
+from volttron.utils import time as time_utils
+from volttron.utils.time import (CoarseClock, format_timestamp, parse_timestamp_string, parse_timestamp_strings,
+                                 process_timestamp, process_timestamps)
+
+MIXED = [
+    "2024-01-01T12:00:00.000001",
+    "2024-01-01T12:00:00.000000-05:30",
+    "2024-01-01T12:00:00.000000+00:00",
+    "2024-01-01 12:00:00Z",
+    "Jan 2 2024 08:15",
+]
+
+def test_parse_timestamp_strings_matches_single_parse():
+    """Test that batch parsing agrees with parsing one string at a time."""
+    parsed = parse_timestamp_strings(MIXED)
+    assert parsed.dtype == np.dtype("datetime64[us]")
+    for value, time_stamp_str in zip(parsed, MIXED):
+        expected = parse_timestamp_string(time_stamp_str)
+        if expected.tzinfo is not None:
+            expected = expected.astimezone(pytz.UTC).replace(tzinfo=None)
+        assert value == np.datetime64(expected, "us")
+
+    with pytest.raises(ValueError):
+        parse_timestamp_strings(["2024-13-01T12:00:00.000000", "not a timestamp"])
+
+def test_process_timestamps():
+    """Test batch conversion to UTC, bad entries and the batch timezone."""
+    timestamps, original_tz = process_timestamps(MIXED + [None, "2024-13-01T12:00:00.000000"])
+    assert str(timestamps.tz) == "UTC"
+    assert timestamps[:5].tolist() == [process_timestamp(s)[0] for s in MIXED]
+    assert timestamps[5:].isna().all()
+    assert original_tz is None
+
+    timestamps, original_tz = process_timestamps(["2024-06-01T00:00:00.000000+02:00"] * 3)
+    assert original_tz == tzoffset("", 7200)
+    assert timestamps[0] == pytz.UTC.localize(parse_timestamp_string("2024-05-31T22:00:00.000000"))
+    assert process_timestamps(["2024-06-01T00:00:00.000000+00:00"])[1] is pytz.UTC
+    assert len(process_timestamps([])[0]) == 0
+
+def test_parse_fallback_learns_formats():
+    """Test that learned formats parse every string of a shape like dateutil."""
+    batches = [
+        ["2023-04-05 06:07:08Z", "2023-04-05 06:07:09Z", "2023-12-31 23:59:59Z"],
+        ["2023-04-05 06:07:08.250-07:00", "2023-04-05 06:07:09.125+01:30"],
+        ["04/05/2023 06:07", "12/31/2023 23:59", "13/01/2023 10:00"],
+    ]
+    for batch in batches:
+        for time_stamp_str in batch:
+            for _ in range(2):
+                time_stamp = parse_timestamp_string(time_stamp_str)
+                expected = parse(time_stamp_str)
+                assert time_stamp == expected
+                assert time_stamp.utcoffset() == expected.utcoffset()
+        assert time_utils._learned_formats[batch[0].translate(time_utils._DIGITS_TO_ZERO)]
+
+    # Times without a date are completed with today's date, so no format is learned
+    parse_timestamp_string("06:07:08")
+    assert time_utils._learned_formats["00:00:00"] is None
+
+def test_parse_fallback_caches_unlearned_shapes(monkeypatch):
+    """Test that strings whose shape has no learned format are not parsed by dateutil twice."""
+    import dateutil.parser
+
+    calls = []
+    def counting_parse(time_stamp_str, **kwargs):
+        calls.append(time_stamp_str)
+        return parse(time_stamp_str, **kwargs)
+
+    monkeypatch.setattr(dateutil.parser, "parse", counting_parse)
+    time_utils._parse_dateutil.cache_clear()
+    first = parse_timestamp_string("07:08:09")
+    assert parse_timestamp_string("07:08:09") == first == parse("07:08:09")
+    assert calls == ["07:08:09"]
+
+    # The date dateutil completes the time with is part of the cache key
+    assert time_utils._parse_dateutil("07:08:09", date(2020, 1, 2)) == datetime(2020, 1, 2, 7, 8, 9)
+
+def _strftime_format(time_stamp):
+    """The strftime based format_timestamp the fast formatter replaced."""
+    time_str = time_stamp.strftime("%Y-%m-%dT%H:%M:%S.%f")
+    if time_stamp.tzinfo is not None:
+        sign = "+"
+        td = time_stamp.tzinfo.utcoffset(time_stamp)
+        if td.days < 0:
+            sign = "-"
+            td = -td
+        minutes, seconds = divmod(td.seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        time_str += "{sign}{HH:02}:{MM:02}".format(sign=sign, HH=hours, MM=minutes)
+    return time_str
+
+@pytest.mark.parametrize("tzinfo", [
+    None,
+    pytz.UTC,
+    timezone.utc,
+    tzoffset("", -19800),
+    timezone(timedelta(hours=5, minutes=30, seconds=15)),
+    timezone(-timedelta(hours=3, seconds=1)),
+])
+def test_format_timestamp_matches_strftime(tzinfo):
+    """Test that the fast formatter produces the same strings as strftime."""
+    for time_stamp in (datetime(2024, 1, 2, 3, 4, 5, 6789), datetime(2024, 7, 1, 23, 59, 59)):
+        time_stamp = time_stamp.replace(tzinfo=tzinfo)
+        assert format_timestamp(time_stamp) == _strftime_format(time_stamp)
+
+    eastern = pytz.timezone("US/Eastern")
+    for month in (1, 7):
+        time_stamp = eastern.localize(datetime(2024, month, 1, 12))
+        assert format_timestamp(time_stamp) == _strftime_format(time_stamp)
+
+def test_coarse_clock():
+    """Test that the clock is shared within a tick and advances after it."""
+    clock = CoarseClock(resolution=3600)
+    now = clock.now()
+    assert now.tzinfo is pytz.UTC
+    assert abs(now - datetime.now(timezone.utc)) < timedelta(seconds=5)
+    assert clock.now() is now
+    assert clock.format() == format_timestamp(now)
+    assert clock.format() is clock.format()
+
+    clock.resolution = 0
+    assert clock.now() is not now
@@ -0,0 +1,67 @@
+"""
+Tests for the prefix trie behind agent pubsub subscriptions.
+"""
+from volttron.client.vip.agent.topics import TopicTrie
+
+def first():
+    pass
+
+def second():
+    pass
+
+def test_add_and_match():
+    """Test that prefixes match exact and nested topics with string prefix semantics."""
+    trie = TopicTrie()
+    assert trie.add("devices/a", first)
+    assert trie.add("devices/", second)
+    assert trie.add("", second)
+
+    assert set(trie.match("devices/a")) == {first, second}
+    assert set(trie.match("devices/abc/x")) == {first, second}
+    assert set(trie.match("devices/b")) == {second}
+    assert set(trie.match("analysis")) == {second}
+    assert "devices/a" in trie
+    assert sorted(trie.prefixes()) == ["", "devices/", "devices/a"]
+
+def test_multiple_callbacks_on_one_prefix():
+    """Test that every callback of a prefix is matched and removed separately."""
+    trie = TopicTrie()
+    assert trie.add("devices/a", first)
+    assert not trie.add("devices/a", second)
+    assert set(trie.match("devices/a/temp")) == {first, second}
+
+    assert not trie.remove("devices/a", first)
+    assert set(trie.match("devices/a/temp")) == {second}
+    assert trie.remove("devices/a", second)
+    assert trie.match("devices/a/temp") == []
+
+def test_remove_prunes_empty_nodes():
+    """Test that removing the last prefix below a node prunes the node."""
+    trie = TopicTrie()
+    trie.add("devices/building/floor/a", first)
+    trie.add("devices/other", second)
+
+    assert trie.remove("devices/building/floor/a")
+    assert "devices/building/floor/a" not in trie
+    assert "building" not in trie._root.children["devices"].children
+    assert set(trie.match("devices/other")) == {second}
+
+    assert trie.remove("devices/other", second)
+    assert not trie._root.children
+    assert not trie.remove("devices/missing")
+
+def test_overlapping_prefixes_match_per_subscription():
+    """Test that a callback is matched once for each matching prefix it is subscribed under."""
+    trie = TopicTrie()
+    trie.add("devices/", first)
+    trie.add("devices/building", first)
+    trie.add("devices/b", second)
+    trie.add("devices/building/x", second)
+
+    assert sorted(trie.match("devices/building/temp"), key=id) == sorted([first, first, second], key=id)
+    assert trie.match("devices/c") == [first]
+
+    # Only the stored lengths of last segments are looked up
+    assert trie._root.children["devices"].lengths == {0: 1, 8: 1, 1: 1}
+    trie.remove("devices/b")
+    assert trie._root.children["devices"].lengths == {0: 1, 8: 1}
@@ -7,7 +7,9 @@ from fastapi.websockets import WebSocketDisconnect
 import json
 import asyncio
 
+from volttron.messagebus.fastapi.core.loop import CoreLoop
 from volttron.messagebus.fastapi.server.app import create_app
+from volttron.messagebus.fastapi.websocket.framing import build_frame, split_frame
 
 @pytest.fixture
 def app():
@@ -76,6 +78,71 @@ def test_invalid_message_handling(client):
         assert response["type"] == "error"
         assert "Unsupported message type" in response["error"]
 
+def test_raw_handler_receives_frame_text(client):
+    """Test that frames for a raw handler reach it undecoded."""
+    async def handle_blob(core_loop, data):
+        return {"type": "blob_size", "size": len(data)}
+
+    CoreLoop.register_handler("blob", handle_blob, raw=True)
+    try:
+        with client.websocket_connect("/messagebus/v1/raw-agent") as websocket:
+            websocket.receive_json()
+            frame = '{"type":"blob","payload":"' + "x" * 100 + '"}'
+            websocket.send_text(frame)
+            assert websocket.receive_json() == {"type": "blob_size", "size": len(frame)}
+    finally:
+        CoreLoop.unregister_handler("blob")
+
+def test_binary_payload_publish(client):
+    """Test that binary payload frames reach text and binary subscribers."""
+    with client.websocket_connect("/messagebus/v1/text-sub") as text_sub, \
+            client.websocket_connect("/messagebus/v1/binary-sub?framing=binary") as binary_sub, \
+            client.websocket_connect("/messagebus/v1/frame-pub") as publisher:
+        text_sub.receive_json()
+        assert binary_sub.receive_json()["framing"] == "binary"
+        publisher.receive_json()
+        for subscriber in (text_sub, binary_sub):
+            subscriber.send_json({"type": "subscribe", "id": "1", "topic": "devices/a"})
+            subscriber.receive_json()
+
+        payload = json.dumps({"temperature": 72.5}).encode("utf-8")
+        publisher.send_bytes(build_frame({"type": "publish", "id": "2", "topic": "devices/a"}, payload))
+        assert publisher.receive_json() == {"type": "publish_confirm", "id": "2", "topic": "devices/a"}
+
+        message = text_sub.receive_json()
+        assert message["sender"] == "frame-pub"
+        assert message["data"] == {"temperature": 72.5}
+
+        header, delivered = split_frame(binary_sub.receive_bytes())
+        assert header["sender"] == "frame-pub"
+        assert bytes(delivered) == payload
+
+        publisher.send_bytes(b"\x00\x00")
+        assert "Invalid binary frame" in publisher.receive_json()["error"]
+
+        # Malformed JSON payloads are refused rather than spliced into text frames
+        publisher.send_bytes(build_frame({"type": "publish", "id": "3", "topic": "devices/a"}, b'{"temp"'))
+        response = publisher.receive_json()
+        assert (response["type"], response["id"]) == ("error", "3")
+        publisher.send_bytes(build_frame({"type": "publish", "id": "4", "topic": "devices/a"}, b"[1]"))
+        assert publisher.receive_json()["type"] == "publish_confirm"
+        assert text_sub.receive_json()["data"] == [1]
+
+def test_prefix_subscription(client):
+    """Test that a subscriber to a prefix receives publishes on topics below it."""
+    with client.websocket_connect("/messagebus/v1/prefix-sub") as subscriber, \
+            client.websocket_connect("/messagebus/v1/prefix-pub") as publisher:
+        subscriber.receive_json()
+        publisher.receive_json()
+        subscriber.send_json({"type": "subscribe", "id": "1", "topic": "devices/"})
+        subscriber.receive_json()
+
+        publisher.send_json({"type": "publish", "id": "2", "topic": "devices/y", "data": {"value": 1}})
+        assert publisher.receive_json()["type"] == "publish_confirm"
+        message = subscriber.receive_json()
+        assert message["topic"] == "devices/y"
+        assert message["data"] == {"value": 1}
+
 def test_connection(server_url, client):
     """Test WebSocket connection with server_url."""
     # This test function matches the one expecting server_url
@@ -83,4 +150,33 @@ def test_connection(server_url, client):
         # Check welcome message
         data = websocket.receive_json()
         assert data["type"] == "connection_established"
-        assert data["agent_id"] == "test-agent"
\ No newline at end of file
+        assert data["agent_id"] == "test-agent"
+
+def test_batched_responses(client):
+    """Test that responses are coalesced into a single array frame when batching is enabled."""
+    with client.websocket_connect("/messagebus/v1/batch-agent?batch_delay_us=100000") as websocket:
+        welcome = websocket.receive_json()
+        assert welcome["batching"] == {"delay_us": 100000, "max_bytes": 65536}
+
+        for i in range(3):
+            websocket.send_json({"type": "subscribe", "id": str(i), "topic": f"devices/{i}"})
+        batch = websocket.receive_json()
+        assert isinstance(batch, list)
+        assert [msg["id"] for msg in batch] == ["0", "1", "2"]
+
+def test_batch_flushed_at_size_limit(client):
+    """Test that reaching the byte limit flushes the batch immediately."""
+    with client.websocket_connect("/messagebus/v1/batch-agent?batch_delay_us=10000000&batch_bytes=1") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"type": "ping", "id": "1"})
+        response = websocket.receive_json()
+        assert response["type"] == "pong"
+
+def test_backlog_negotiated(client):
+    """Test that the flow control backlog mode is negotiated per connection."""
+    with client.websocket_connect("/messagebus/v1/fifo-agent?backlog=fifo&max_backlog=100") as websocket:
+        assert websocket.receive_json()["flow_control"] == {"backlog": "fifo", "max_backlog": 100}
+
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/messagebus/v1/bad-backlog-agent?backlog=lifo") as websocket:
+            websocket.receive_json()